@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Compara dois resultados JSON do pytest-benchmark e acusa regressões.
+
+Uma regressão é uma mediana acima do limite percentual em relação à base, ou um
+aumento no número de consultas SQL (extra_info['consultas']).
+
+Uso:
+    python benchmarks/comparar.py .benchmarks/base.json .benchmarks/atual.json --limite 15
+"""
+import argparse
+import json
+import sys
+
+
+def carregar(caminho):
+    with open(caminho) as arquivo:
+        dados = json.load(arquivo)
+    return {item['fullname']: item for item in dados['benchmarks']}
+
+
+def comparar(base, atual, limite):
+    """
+    Retorna uma linha por benchmark presente nos dois arquivos:
+    (nome, mediana_base, mediana_atual, variacao_pct, consultas_base, consultas_atual, regrediu).
+    """
+    linhas = []
+    for nome in sorted(set(base) & set(atual)):
+        mediana_base = base[nome]['stats']['median']
+        mediana_atual = atual[nome]['stats']['median']
+        variacao = (mediana_atual / mediana_base - 1) * 100 if mediana_base else 0.0
+        
+        consultas_base = base[nome].get('extra_info', {}).get('consultas')
+        consultas_atual = atual[nome].get('extra_info', {}).get('consultas')
+        mais_consultas = (
+            consultas_base is not None and consultas_atual is not None and consultas_atual > consultas_base
+        )
+        
+        linhas.append((
+            nome, mediana_base, mediana_atual, variacao,
+            consultas_base, consultas_atual, variacao > limite or mais_consultas,
+        ))
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('base')
+    parser.add_argument('atual')
+    parser.add_argument('--limite', type=float, default=10.0, help='Piora máxima tolerada na mediana (%%).')
+    args = parser.parse_args()
+    
+    base, atual = carregar(args.base), carregar(args.atual)
+    linhas = comparar(base, atual, args.limite)
+    
+    print(f"{'benchmark':<70}{'base ms':>10}{'atual ms':>10}{'var %':>8}{'consultas':>12}")
+    for nome, m_base, m_atual, variacao, c_base, c_atual, regrediu in linhas:
+        consultas = f'{c_base}→{c_atual}' if c_base is not None else '-'
+        marca = '  REGRESSÃO' if regrediu else ''
+        print(f'{nome[-70:]:<70}{m_base * 1000:>10.2f}{m_atual * 1000:>10.2f}{variacao:>+8.1f}{consultas:>12}{marca}')
+    
+    for nome in sorted(set(base) - set(atual)):
+        print(f'ausente no resultado atual: {nome}')
+    
+    regressoes = sum(1 for linha in linhas if linha[-1])
+    if regressoes:
+        print(f'\n{regressoes} regressão(ões) acima de {args.limite}%.')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
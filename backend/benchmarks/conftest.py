@@ -0,0 +1,74 @@
+"""
+Benchmarks dos caminhos críticos de modelos e views.
+
+Execução (a partir de backend/):
+    pytest benchmarks --benchmark-json=.benchmarks/atual.json
+    python benchmarks/comparar.py .benchmarks/base.json .benchmarks/atual.json --limite 15
+
+Cada benchmark roda com bases de tamanhos diferentes (TAMANHOS) e registra em
+`extra_info` o número de consultas SQL de uma execução, gravado junto no JSON.
+"""
+import os
+import sys
+from io import StringIO
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ccbj_financeiro.settings')
+os.environ.setdefault('DJANGO_ENVIRONMENT', 'testing')
+
+TAMANHOS = [10, 100, 1000]
+
+
+@pytest.fixture(params=TAMANHOS, ids=lambda n: f'n{n}')
+def dados(request, db):
+    """
+    Popula o banco com `n` contratos (e parcelas, movimentos e estrutura proporcionais).
+    """
+    from django.core.management import call_command
+    from core.models import Usuario
+    
+    n = request.param
+    call_command(
+        'gerar_dados_carga',
+        setores=4, fontes=2, metas=2, atividades=2, rubricas=2,
+        bolsistas=n, credores=max(1, n // 2), contratos=n,
+        max_parcelas=6, semente=n, forcar=True, stdout=StringIO(),
+    )
+    return {'n': n, 'usuario': Usuario.objects.get(username='carga')}
+
+
+@pytest.fixture
+def cliente(dados):
+    from rest_framework.test import APIClient
+    
+    cliente = APIClient()
+    cliente.force_authenticate(user=dados['usuario'])
+    return cliente
+
+
+@pytest.fixture
+def medir(benchmark):
+    """
+    Mede `funcao` com o pytest-benchmark e anota a contagem de consultas de uma execução.
+    
+    `preparar`, se informado, roda antes de cada rodada fora da medição e devolve os
+    argumentos posicionais da função (para operações que consomem estado, como pagamentos).
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    
+    def _medir(funcao, preparar=None, rodadas=5):
+        argumentos = preparar() if preparar else ()
+        with CaptureQueriesContext(connection) as consultas:
+            funcao(*argumentos)
+        benchmark.extra_info['consultas'] = len(consultas)
+        
+        if preparar:
+            return benchmark.pedantic(
+                funcao, setup=lambda: (preparar(), {}), rounds=rodadas, iterations=1
+            )
+        return benchmark.pedantic(funcao, rounds=rodadas, iterations=1, warmup_rounds=1)
+    
+    return _medir
@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+# Um ano de extrato
+LANCAMENTOS = 100_000
+
+
+@pytest.fixture
+def extrato(dados):
+    from core.models import ExtratoBancario, LancamentoExtrato, MovimentoFinanceiro
+    
+    base = MovimentoFinanceiro.objects.filter(tipo='saida').first()
+    inicio = date(2024, 1, 1)
+    movimentos = MovimentoFinanceiro.objects.bulk_create([
+        MovimentoFinanceiro(
+            tipo='saida',
+            fonte_recurso_id=base.fonte_recurso_id,
+            setor_id=base.setor_id,
+            rubrica_id=base.rubrica_id,
+            valor=Decimal(100 + indice % 5000) / 10,
+            data_movimento=inicio + timedelta(days=indice % 365),
+            descricao='Movimento de benchmark',
+            usuario=dados['usuario'],
+        )
+        for indice in range(LANCAMENTOS)
+    ], batch_size=5000)
+    
+    extrato = ExtratoBancario.objects.create(
+        arquivo_nome='benchmark.csv', formato='csv', importado_por=dados['usuario'],
+        data_inicio=inicio, data_fim=inicio + timedelta(days=366), total_lancamentos=LANCAMENTOS,
+    )
+    LancamentoExtrato.objects.bulk_create([
+        LancamentoExtrato(
+            extrato=extrato,
+            data=movimento.data_movimento + timedelta(days=indice % 2),
+            valor=-movimento.valor,
+        )
+        for indice, movimento in enumerate(movimentos)
+    ], batch_size=5000)
+    return extrato
+
+
+def test_conciliar_um_ano(extrato, medir):
+    from core.models import LancamentoExtrato
+    from core.services.conciliacao import conciliar
+    
+    def preparar():
+        LancamentoExtrato.objects.filter(extrato=extrato).update(movimento=None)
+        return (extrato,)
+    
+    medir(conciliar, preparar=preparar, rodadas=3)
@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+from django.utils import timezone
+from core.models import AlocacaoRecurso, Contrato, Credor
+
+
+def test_contrato_save_com_clean(dados, medir):
+    """
+    Contrato.save() executa clean(): sobreposição de bolsista e saldo da rubrica no setor.
+    """
+    alocacao = AlocacaoRecurso.objects.select_related('rubrica__atividade__meta').first()
+    credor = Credor.objects.first()
+    hoje = timezone.now().date()
+    
+    def preparar():
+        rubrica = alocacao.rubrica
+        return (Contrato(
+            tipo='servico',
+            nome_curso_acao='Benchmark',
+            setor_id=alocacao.setor_id,
+            credor=credor,
+            data_inicio=hoje,
+            data_fim=hoje + timezone.timedelta(days=90),
+            meta=rubrica.atividade.meta,
+            atividade=rubrica.atividade,
+            rubrica=rubrica,
+            valor_total=Decimal('1.00'),
+            criado_por=dados['usuario'],
+            atualizado_por=dados['usuario'],
+        ),)
+    
+    medir(lambda contrato: contrato.save(), preparar=preparar)
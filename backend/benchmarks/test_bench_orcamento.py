@@ -0,0 +1,40 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from core.services.orcamento import montar_arvore, verificar_consistencia
+
+# (fontes, metas, atividades, rubricas) por nível: 1 mil e 100 mil rubricas
+ESTRUTURAS = [(10, 10, 10, 1), (10, 10, 10, 100)]
+
+
+@pytest.fixture(params=ESTRUTURAS, ids=lambda e: f'rubricas{e[0] * e[1] * e[2] * e[3]}')
+def estrutura(request, db):
+    fontes, metas, atividades, rubricas = request.param
+    call_command(
+        'gerar_dados_carga',
+        setores=4, fontes=fontes, metas=metas, atividades=atividades, rubricas=rubricas,
+        bolsistas=20, credores=10, contratos=200, max_parcelas=2, semente=1,
+        forcar=True, stdout=StringIO(),
+    )
+
+
+def test_verificar_consistencia(estrutura, medir):
+    medir(verificar_consistencia)
+
+
+def test_montar_arvore(estrutura, medir):
+    medir(montar_arvore)
+
+
+def test_simulacao_mil_operacoes(dados, medir):
+    from core.models import AlocacaoRecurso
+    from core.services.simulacao import simular
+    
+    posicoes = list(AlocacaoRecurso.objects.values_list('setor_id', 'rubrica_id')[:50])
+    operacoes = [
+        {'tipo': 'contrato', 'setor': setor_id, 'rubrica': rubrica_id, 'valor': '150.00'}
+        for indice in range(1000)
+        for setor_id, rubrica_id in [posicoes[indice % len(posicoes)]]
+    ]
+    medir(lambda: simular(operacoes))
@@ -0,0 +1,48 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+from core.renderers import ORJSONRenderer
+
+TOTAL_CONTRATOS = 10_000
+
+
+@pytest.fixture(scope='module')
+def relatorio_contratos():
+    """
+    Payload com o formato de RelatorioContratosView para 10 mil contratos.
+    """
+    rng = random.Random(0)
+    inicio = date(2024, 1, 1)
+    contratos = [
+        {
+            'id': i,
+            'nome_curso_acao': f'Oficina de Teatro {i}',
+            'tipo': rng.choice(['bolsa', 'servico']),
+            'status_processo': 'em_andamento',
+            'setor__nome': f'Setor {i % 10:03d}',
+            'data_inicio': inicio + timedelta(days=i % 365),
+            'data_fim': inicio + timedelta(days=i % 365 + 180),
+            'valor_total': Decimal(rng.randrange(100000, 5000000)).scaleb(-2),
+            'total_pago': Decimal(rng.randrange(0, 100000)).scaleb(-2),
+            'quantidade_parcelas': rng.randint(1, 12),
+        }
+        for i in range(TOTAL_CONTRATOS)
+    ]
+    return {
+        'relatorio_id': 1,
+        'dados': {
+            'contratos': contratos,
+            'total_contratos': len(contratos),
+            'valor_total': sum(c['valor_total'] for c in contratos),
+            'valor_pago': sum(c['total_pago'] for c in contratos),
+        },
+    }
+
+
+@pytest.mark.parametrize('renderer', [JSONRenderer, ORJSONRenderer], ids=lambda r: r.__name__)
+def test_renderizar_relatorio_contratos(benchmark, relatorio_contratos, renderer):
+    conteudo = benchmark(renderer().render, relatorio_contratos)
+    benchmark.extra_info['bytes'] = len(conteudo)
@@ -0,0 +1,32 @@
+import pytest
+from core.models import Contrato, MovimentoFinanceiro, ParcelaContrato
+from core.serializers.contratos_serializers import (
+    ContratoSerializer, MovimentoFinanceiroSerializer, ParcelaContratoSerializer
+)
+from core.serializers.leitura import plano_leitura
+
+SERIALIZERS = [
+    (ContratoSerializer, Contrato),
+    (ParcelaContratoSerializer, ParcelaContrato),
+    (MovimentoFinanceiroSerializer, MovimentoFinanceiro),
+]
+
+
+def _serializer(serializer_class, queryset):
+    return serializer_class(queryset.select_related(), many=True).data
+
+
+def _rapido(serializer_class, queryset):
+    plano = plano_leitura(serializer_class)
+    return plano.serializar(plano.aplicar(queryset))
+
+
+@pytest.mark.parametrize('caminho', [_serializer, _rapido], ids=['serializer', 'rapido'])
+@pytest.mark.parametrize('serializer_class, modelo', SERIALIZERS, ids=lambda v: getattr(v, '__name__', ''))
+def test_serializar_listagem(dados, medir, benchmark, caminho, serializer_class, modelo):
+    """
+    Custo de serializar a listagem inteira; `linhas` permite normalizar por mil linhas.
+    """
+    queryset = modelo.objects.order_by('pk')
+    benchmark.extra_info['linhas'] = queryset.count()
+    medir(lambda: caminho(serializer_class, queryset))
@@ -0,0 +1,101 @@
+from collections import defaultdict
+from decimal import Decimal
+from itertools import cycle
+
+import pytest
+from django.db import transaction
+from django.urls import reverse
+from core.models import AlocacaoRecurso, MovimentoFinanceiro, ParcelaContrato, Setor, TransferenciaRecurso
+from core.services.pagamentos import ajustar_total_pago
+
+DASHBOARDS = ['dashboard_resumo', 'dashboard_contratos', 'dashboard_financeiro']
+RELATORIOS = ['relatorio_contratos', 'relatorio_financeiro', 'relatorio_bolsistas']
+
+
+def _get(cliente, url):
+    resposta = cliente.get(url)
+    assert resposta.status_code == 200, resposta.content[:200]
+    return resposta
+
+
+def _reabrir(ids):
+    """
+    Desfaz os pagamentos das parcelas fora da medição: remove as saídas geradas por
+    eles, devolve o valor em total_pago e volta as parcelas para pendente.
+    """
+    with transaction.atomic():
+        deltas = defaultdict(Decimal)
+        for contrato_id, valor in ParcelaContrato.objects.filter(pk__in=ids, status='pago').values_list(
+            'contrato_id', 'valor'
+        ):
+            deltas[contrato_id] -= valor
+        ajustar_total_pago(deltas)
+        MovimentoFinanceiro.objects.filter(parcela_id__in=ids, tipo='saida').delete()
+        ParcelaContrato.objects.filter(pk__in=ids).update(status='pendente', data_pagamento=None)
+
+
+@pytest.mark.parametrize('nome', DASHBOARDS)
+def test_dashboard(cliente, medir, nome):
+    url = reverse(nome)
+    medir(lambda: _get(cliente, url))
+
+
+@pytest.mark.parametrize('nome', RELATORIOS)
+def test_relatorio(cliente, medir, nome):
+    url = reverse(nome)
+    medir(lambda: _get(cliente, url))
+
+
+def test_arvore_orcamentaria(cliente, medir):
+    # Em testes o cache é DummyCache: mede sempre a montagem completa da árvore
+    url = reverse('estrutura_arvore')
+    medir(lambda: _get(cliente, url))
+
+
+def test_registrar_pagamento(cliente, medir):
+    parcelas = cycle(ParcelaContrato.objects.values_list('pk', flat=True)[:50])
+    
+    def preparar():
+        # Reabre a parcela fora da medição para que toda rodada registre um pagamento novo
+        pk = next(parcelas)
+        _reabrir([pk])
+        return (pk,)
+    
+    def pagar(pk):
+        resposta = cliente.post(reverse('parcelacontrato-registrar-pagamento', args=[pk]), {}, format='json')
+        assert resposta.status_code == 200, resposta.content[:200]
+    
+    medir(pagar, preparar=preparar)
+
+
+def test_aprovar_transferencia(dados, cliente, medir):
+    alocacao = AlocacaoRecurso.objects.first()
+    destino = Setor.objects.exclude(pk=alocacao.setor_id).first()
+    
+    def preparar():
+        return (TransferenciaRecurso.objects.create(
+            setor_origem_id=alocacao.setor_id,
+            setor_destino=destino,
+            rubrica_id=alocacao.rubrica_id,
+            valor=Decimal('1.00'),
+        ).pk,)
+    
+    def aprovar(pk):
+        resposta = cliente.post(reverse('transferenciarecurso-aprovar', args=[pk]), {}, format='json')
+        assert resposta.status_code == 200, resposta.content[:200]
+    
+    medir(aprovar, preparar=preparar)
+
+
+def test_pagar_lote(cliente, medir):
+    ids = list(ParcelaContrato.objects.values_list('pk', flat=True)[:200])
+    
+    def preparar():
+        _reabrir(ids)
+        return ()
+    
+    def pagar():
+        resposta = cliente.post(reverse('parcelacontrato-pagar-lote'), {'parcelas': ids}, format='json')
+        assert resposta.status_code == 200, resposta.content[:200]
+    
+    medir(pagar, preparar=preparar)
@@ -42,6 +42,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.AuditoriaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -114,12 +115,22 @@ AUTH_USER_MODEL = 'core.Usuario'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.JWTAuthenticationComCache',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson quando instalado; sem ele, os mesmos renderers/parsers caem no JSON padrão do DRF
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': (
@@ -154,6 +165,89 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Retenção de dados das tabelas que só crescem
+# acao: 'excluir' ou 'arquivar' (grava JSON Lines compactado em RETENCAO_DIRETORIO_ARQUIVO antes de excluir)
+RETENCAO_POLITICAS = {
+    'notificacoes': {
+        'modelo': 'core.Notificacao',
+        'campo_data': 'data_criacao',
+        'dias': int(os.environ.get('RETENCAO_NOTIFICACOES_DIAS', 180)),
+        'acao': 'excluir',
+        'filtro': {'lida': True},
+    },
+    'auditoria': {
+        'modelo': 'core.RegistroAuditoria',
+        'campo_data': 'data_hora',
+        'dias': int(os.environ.get('RETENCAO_AUDITORIA_DIAS', 1825)),
+        'acao': 'arquivar',
+    },
+    'historico_processos': {
+        'modelo': 'core.HistoricoProcesso',
+        'campo_data': 'data_alteracao',
+        'dias': int(os.environ.get('RETENCAO_HISTORICO_DIAS', 1825)),
+        'acao': 'arquivar',
+    },
+}
+RETENCAO_DIRETORIO_ARQUIVO = os.environ.get('RETENCAO_DIRETORIO_ARQUIVO', os.path.join(BASE_DIR, 'arquivo'))
+
+# Particionamento mensal por intervalo (somente PostgreSQL, ver comando gerenciar_particoes).
+# Tabelas referenciadas por chaves estrangeiras de outras tabelas não são convertidas; por
+# isso MovimentoFinanceiro (alvo de LancamentoExtrato.movimento) fica de fora
+PARTICIONAMENTO_TABELAS = {
+    'core.RegistroAuditoria': 'data_hora',
+}
+
+# Modelos com trilha de auditoria automática (RegistroAuditoria)
+# 'excluir' lista campos que não geram registro quando alterados
+AUDITORIA_MODELOS = {
+    'core.Contrato': {'excluir': ['atualizado_em', 'ultima_verificacao', 'busca_vetor']},
+    'core.AlocacaoRecurso': {},
+    'core.TransferenciaRecurso': {},
+    'core.ParcelaContrato': {},
+}
+# Username a quem são atribuídos os registros gravados sem usuário autenticado
+# (sem ele, esses registros são descartados)
+AUDITORIA_USUARIO_SISTEMA = os.environ.get('AUDITORIA_USUARIO_SISTEMA')
+
+# Horizonte (em meses) das projeções de fluxo de caixa calculadas a partir das parcelas
+PROJECAO_HORIZONTE_MESES = int(os.environ.get('PROJECAO_HORIZONTE_MESES', 12))
+PROJECAO_HORIZONTE_MAXIMO = 60
+
+# Limite de operações hipotéticas por requisição de simulação orçamentária
+SIMULACAO_MAX_OPERACOES = 10000
+
+# Séries temporais do dashboard: pontos por série e validade do cache (segundos)
+SERIES_MAX_PONTOS = 1000
+SERIES_CACHE_TIMEOUT = 300
+
+# Recuo (segundos) da marca da exportação analítica incremental, para transações em andamento no corte
+EXPORTACAO_SOBREPOSICAO_SEGUNDOS = int(os.environ.get('EXPORTACAO_SOBREPOSICAO_SEGUNDOS', 300))
+
+# Níveis de Perfil.nivel_acesso restritos aos dados do próprio setor
+ACESSO_NIVEIS_POR_SETOR = ['gestor']
+
+# Validade (segundos) do retrato do usuário guardado pela autenticação JWT
+AUTH_CACHE_TIMEOUT = int(os.environ.get('AUTH_CACHE_TIMEOUT', 60))
+
+# Distância máxima (em dias) entre lançamento do extrato e movimento na conciliação automática
+CONCILIACAO_JANELA_DIAS = int(os.environ.get('CONCILIACAO_JANELA_DIAS', 3))
+
+# Conta pagadora usada nos arquivos de remessa CNAB 240
+CNAB_EMPRESA = {
+    'banco': os.environ.get('CNAB_BANCO', '001'),
+    'nome_banco': os.environ.get('CNAB_NOME_BANCO', 'BANCO DO BRASIL'),
+    'agencia': os.environ.get('CNAB_AGENCIA', ''),
+    'conta': os.environ.get('CNAB_CONTA', ''),
+    'cnpj': os.environ.get('CNAB_CNPJ', ''),
+    'convenio': os.environ.get('CNAB_CONVENIO', ''),
+    'nome': os.environ.get('CNAB_NOME_EMPRESA', 'CCBJ'),
+    'logradouro': os.environ.get('CNAB_LOGRADOURO', ''),
+    'numero': os.environ.get('CNAB_NUMERO', ''),
+    'cidade': os.environ.get('CNAB_CIDADE', 'FORTALEZA'),
+    'cep': os.environ.get('CNAB_CEP', ''),
+    'uf': os.environ.get('CNAB_UF', 'CE'),
+}
+
 # CORS Settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
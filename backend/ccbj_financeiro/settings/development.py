@@ -1,15 +1,15 @@
 from .base import *
+from .banco import configurar_banco
 
 # Configurações específicas para desenvolvimento
 DEBUG = True
 
-# Database para desenvolvimento
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Database para desenvolvimento (SQLite, a menos que DATABASE_URL seja definida,
+# como no deploy/docker-compose.yml)
+DATABASES = configurar_banco({
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'db.sqlite3',
+})
 
 # Configurações de email para desenvolvimento
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -1,4 +1,5 @@
 from .base import *
+from .banco import configurar_banco
 
 # Configurações específicas para produção
 DEBUG = False
@@ -6,16 +7,26 @@ DEBUG = False
 ALLOWED_HOSTS = ['sistema.ccbj.com.br', 'www.sistema.ccbj.com.br']
 
 # Database para produção
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.environ.get('DB_NAME', 'ccbj_financeiro'),
-        'USER': os.environ.get('DB_USER', 'ccbj_user'),
-        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
-        'HOST': os.environ.get('DB_HOST', 'localhost'),
-        'PORT': os.environ.get('DB_PORT', '5432'),
+# DATABASE_URL tem precedência sobre as variáveis DB_*; conexões persistentes,
+# health checks e pool são configurados em settings/banco.py
+DATABASES = configurar_banco({
+    'ENGINE': 'django.db.backends.postgresql',
+    'NAME': os.environ.get('DB_NAME', 'ccbj_financeiro'),
+    'USER': os.environ.get('DB_USER', 'ccbj_user'),
+    'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+    'HOST': os.environ.get('DB_HOST', 'localhost'),
+    'PORT': os.environ.get('DB_PORT', '5432'),
+})
+
+# Cache compartilhado entre os workers, necessário para que a invalidação
+# por versão (core.services.cache) valha para todos os processos
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
     }
-}
 
 # Configurações de segurança para produção
 SECURE_BROWSER_XSS_FILTER = True
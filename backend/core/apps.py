@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+    
+    def ready(self):
+        # Registra os receivers de sinais do app
+        from core import signals
+        from core.services.busca import configurar_indices_apos_migrate
+        
+        post_migrate.connect(configurar_indices_apos_migrate, sender=self)
@@ -0,0 +1,97 @@
+"""
+Autenticação JWT com cache do usuário autenticado.
+
+O JWTAuthentication do simplejwt busca o usuário no banco a cada requisição. Aqui a
+busca (usuário e perfil, com um select_related) é feita uma vez por token e guardada
+no cache como um retrato compacto: id, is_active, is_staff, is_superuser, nível de
+acesso e setor do perfil. Nas requisições seguintes o usuário é remontado a partir do
+retrato com os demais campos adiados; um campo fora do retrato é carregado do banco
+só se for lido.
+
+A chave leva o id do usuário e o jti do token, dentro de um namespace por usuário
+(core.services.cache); os sinais de Usuario e Perfil invalidam esse namespace, o que
+cobre alterações de cadastro, de perfil e de senha.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from core.models import Perfil, Usuario
+from core.services.cache import chave, invalidar
+
+CAMPOS_USUARIO = ('id', 'is_active', 'is_staff', 'is_superuser')
+CAMPOS_PERFIL = ('id', 'usuario_id', 'nivel_acesso', 'setor_id')
+
+
+def namespace_usuario(usuario_id):
+    return f'auth_usuario_{usuario_id}'
+
+
+def invalidar_usuario(usuario_id):
+    """
+    Descarta os retratos em cache do usuário (todos os tokens).
+    """
+    invalidar(namespace_usuario(usuario_id))
+
+
+def retrato(usuario):
+    """
+    Dados do usuário (e do perfil, se houver) guardados no cache.
+    """
+    dados = {campo: getattr(usuario, campo) for campo in CAMPOS_USUARIO}
+    perfil = getattr(usuario, 'perfil', None)
+    dados['perfil'] = {campo: getattr(perfil, campo) for campo in CAMPOS_PERFIL} if perfil else None
+    return dados
+
+
+def _instancia(modelo, dados):
+    # from_db com só parte dos campos: os demais ficam adiados, como em .only()
+    campos = [campo.attname for campo in modelo._meta.concrete_fields if campo.attname in dados]
+    return modelo.from_db(router.db_for_read(modelo), campos, [dados[campo] for campo in campos])
+
+
+def usuario_do_retrato(dados):
+    """
+    Usuario montado a partir do retrato, com o perfil já no cache da relação (None
+    quando o usuário não tem perfil, sem nova consulta).
+    """
+    usuario = _instancia(Usuario, dados)
+    perfil = _instancia(Perfil, dados['perfil']) if dados['perfil'] else None
+    if perfil is not None:
+        perfil._state.fields_cache['usuario'] = usuario
+    usuario._state.fields_cache['perfil'] = perfil
+    return usuario
+
+
+class JWTAuthenticationComCache(JWTAuthentication):
+    """
+    JWTAuthentication que busca o usuário no cache (por id e jti do token) antes do banco.
+    """
+    
+    def get_user(self, validated_token):
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        
+        chave_cache = chave(
+            namespace_usuario(usuario_id), 'retrato', validated_token.get(api_settings.JTI_CLAIM, '-')
+        )
+        dados = cache.get(chave_cache)
+        if dados is None:
+            try:
+                usuario = Usuario.objects.select_related('perfil').get(**{api_settings.USER_ID_FIELD: usuario_id})
+            except Usuario.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            dados = retrato(usuario)
+            cache.set(chave_cache, dados, settings.AUTH_CACHE_TIMEOUT)
+        else:
+            usuario = usuario_do_retrato(dados)
+        
+        if not usuario.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return usuario
@@ -0,0 +1,30 @@
+from rest_framework.filters import BaseFilterBackend
+from core.services.busca import buscar
+
+
+class BuscaTextualFilter(BaseFilterBackend):
+    """
+    Busca textual ranqueada pelo parâmetro `?q=`, usando o índice do modelo
+    (tsvector/GIN no PostgreSQL, FTS5 no SQLite).
+    
+    Deve ser o último backend da view: sem `?ordering=` explícito, os resultados
+    são ordenados por relevância.
+    """
+    search_param = 'q'
+    
+    def filter_queryset(self, request, queryset, view):
+        termo = request.query_params.get(self.search_param, '').strip()
+        if not termo:
+            return queryset
+        
+        ordenar = 'ordering' not in request.query_params
+        return buscar(queryset, termo, ordenar=ordenar)
+    
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Busca textual ranqueada por relevância.',
+            'schema': {'type': 'string'},
+        }]
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.services.retencao import obter_politicas, aplicar_politica
+
+
+class Command(BaseCommand):
+    help = 'Aplica as políticas de retenção (RETENCAO_POLITICAS), arquivando ou excluindo registros antigos em lotes.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'politicas',
+            nargs='*',
+            help='Nomes das políticas a aplicar. Sem argumentos, aplica todas.'
+        )
+        parser.add_argument('--lote', type=int, default=1000, help='Registros por transação.')
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Apenas conta os registros que seriam afetados.'
+        )
+    
+    def handle(self, *args, **options):
+        politicas = obter_politicas()
+        nomes = options['politicas'] or list(politicas)
+        
+        desconhecidas = set(nomes) - set(politicas)
+        if desconhecidas:
+            raise CommandError(f"Políticas não configuradas: {', '.join(sorted(desconhecidas))}")
+        
+        for nome in nomes:
+            politica = politicas[nome]
+            
+            try:
+                total = aplicar_politica(nome, politica, lote=options['lote'], simular=options['simular'])
+            except LookupError:
+                self.stderr.write(self.style.WARNING(f"{nome}: modelo {politica['modelo']} não encontrado, ignorando."))
+                continue
+            
+            verbo = 'seriam processados' if options['simular'] else 'processados'
+            self.stdout.write(f"{nome}: {total} registros {verbo} ({politica.get('acao', 'excluir')}, > {politica['dias']} dias)")
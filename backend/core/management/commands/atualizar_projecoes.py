@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Usuario
+from core.services.projecao import atualizar_projecoes, janela
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula as projeções orçamentárias mensais (previsto pelas parcelas dos contratos, '
+        'realizado pelos movimentos financeiros) no horizonte informado.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', type=date.fromisoformat, help='Mês inicial (AAAA-MM-DD); padrão: mês atual.')
+        parser.add_argument('--meses', type=int, help='Quantidade de meses do horizonte.')
+        parser.add_argument('--setor', type=int, help='Recalcula só as projeções deste setor.')
+        parser.add_argument(
+            '--usuario',
+            required=True,
+            help='Username gravado em criado_por nas projeções novas.'
+        )
+        parser.add_argument('--lote', type=int, default=1000, help='Linhas por comando INSERT.')
+    
+    def handle(self, *args, **options):
+        try:
+            usuario = Usuario.objects.get(username=options['usuario'])
+        except Usuario.DoesNotExist:
+            raise CommandError(f"Usuário '{options['usuario']}' não encontrado.")
+        
+        inicio, fim = janela(options['inicio'], options['meses'])
+        gravadas = atualizar_projecoes(
+            usuario, inicio=options['inicio'], meses=options['meses'],
+            setor=options['setor'], lote=options['lote']
+        )
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'{gravadas} projeções gravadas de {inicio:%m/%Y} até antes de {fim:%m/%Y}.'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from core.services.busca import configurar_indices
+
+
+class Command(BaseCommand):
+    help = 'Cria os índices de busca textual (GIN/tsvector no PostgreSQL, FTS5 no SQLite).'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--reconstruir',
+            action='store_true',
+            help='Recalcula o conteúdo indexado de todos os registros.'
+        )
+    
+    def handle(self, *args, **options):
+        configurar_indices(options['database'], reconstruir=options['reconstruir'])
+        self.stdout.write(self.style.SUCCESS('Índices de busca configurados.'))
@@ -0,0 +1,46 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from core.services.exportacao import CONJUNTOS, FORMATOS, TAMANHO_LOTE, exportar
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta contratos, parcelas, movimentos e a estrutura orçamentária em Parquet ou Arrow '
+        'para o BI. Por padrão exporta só o que mudou desde a execução anterior.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--saida', required=True, help='Diretório onde os arquivos são gravados.')
+        parser.add_argument(
+            '--conjuntos',
+            nargs='+',
+            choices=list(CONJUNTOS),
+            default=list(CONJUNTOS),
+            help='Conjuntos a exportar (padrão: todos).'
+        )
+        parser.add_argument('--formato', choices=FORMATOS, default='parquet')
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Exporta todas as linhas, ignorando a marca da última exportação.'
+        )
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help='Linhas lidas por lote do cursor.')
+    
+    def handle(self, *args, **options):
+        if not os.path.isdir(options['saida']):
+            raise CommandError(f"Diretório '{options['saida']}' não encontrado.")
+        
+        for conjunto in options['conjuntos']:
+            try:
+                resultado = exportar(
+                    conjunto, options['saida'], formato=options['formato'],
+                    completo=options['completo'], tamanho=options['lote']
+                )
+            except RuntimeError as erro:
+                raise CommandError(str(erro))
+            
+            intervalo = f" (desde {resultado['desde']})" if resultado['desde'] else ''
+            self.stdout.write(self.style.SUCCESS(
+                f"{conjunto}: {resultado['linhas']} linhas{intervalo} em {resultado['arquivo']}"
+            ))
@@ -0,0 +1,394 @@
+import random
+import secrets
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from core.models import (
+    Usuario, Perfil, Setor, FonteRecurso, Meta, Atividade, Rubrica, AlocacaoRecurso,
+    Bolsista, Credor, Contrato, ParcelaContrato, MovimentoFinanceiro
+)
+from core.services import movimento_mensal
+from core.services.cache import invalidar
+
+CENTAVO = Decimal('0.01')
+
+NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Fábio', 'Gabriela', 'Hugo', 'Iara', 'João',
+         'Karina', 'Lucas', 'Marina', 'Nelson', 'Olga', 'Paulo', 'Raquel', 'Sérgio', 'Tânia', 'Vítor']
+SOBRENOMES = ['Almeida', 'Barbosa', 'Cavalcante', 'Dias', 'Esteves', 'Freitas', 'Gomes', 'Holanda',
+              'Lima', 'Moreira', 'Nogueira', 'Oliveira', 'Pinheiro', 'Queiroz', 'Rocha', 'Sampaio']
+ATIVIDADES = ['Oficina de', 'Curso de', 'Residência em', 'Laboratório de', 'Mostra de', 'Festival de']
+LINGUAGENS = ['Teatro', 'Dança', 'Audiovisual', 'Música', 'Artes Visuais', 'Literatura', 'Circo',
+              'Fotografia', 'Cultura Digital', 'Patrimônio']
+RUBRICAS = ['Bolsas', 'Serviços de Terceiros PJ', 'Material de Consumo', 'Passagens e Diárias',
+            'Locação de Equipamentos', 'Divulgação']
+BANCOS = ['001', '033', '104', '237', '341']
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera uma massa de dados realista para testes de carga: setores, árvore '
+        'FonteRecurso→Meta→Atividade→Rubrica, alocações, bolsistas, credores, contratos, '
+        'parcelas e movimentos, inseridos em lotes com bulk_create. Só roda com DEBUG '
+        'ativo, salvo com --forcar.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--setores', type=int, default=10)
+        parser.add_argument('--fontes', type=int, default=3)
+        parser.add_argument('--metas', type=int, default=5, help='Metas por fonte.')
+        parser.add_argument('--atividades', type=int, default=4, help='Atividades por meta.')
+        parser.add_argument('--rubricas', type=int, default=3, help='Rubricas por atividade.')
+        parser.add_argument('--bolsistas', type=int, default=3000)
+        parser.add_argument('--credores', type=int, default=1000)
+        parser.add_argument('--contratos', type=int, default=10000)
+        parser.add_argument('--max-parcelas', type=int, default=12)
+        parser.add_argument('--lote', type=int, default=1000, help='Registros por bulk_create.')
+        parser.add_argument('--semente', type=int, default=42, help='Semente do gerador aleatório.')
+        parser.add_argument('--usuario', default='carga', help='Usuário criado para autenticar o teste de carga.')
+        parser.add_argument('--senha', help='Senha do usuário; se omitida, uma senha aleatória é gerada e exibida.')
+        parser.add_argument('--superusuario', action='store_true',
+                            help='Cria o usuário como superusuário (por padrão, só is_staff).')
+        parser.add_argument('--forcar', action='store_true',
+                            help='Roda mesmo com DEBUG desativado (ex.: homologação, testes automatizados).')
+    
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['forcar']:
+            raise CommandError(
+                'DEBUG está desativado: este comando cria um usuário administrativo e milhares de '
+                'registros fictícios. Use --forcar se o banco de destino for mesmo descartável.'
+            )
+        
+        if min(options['setores'], options['fontes'], options['metas'],
+               options['atividades'], options['rubricas']) < 1:
+            raise CommandError('A estrutura precisa de ao menos um item em cada nível.')
+        
+        if options['contratos'] and not (options['bolsistas'] or options['credores']):
+            raise CommandError('Contratos exigem bolsistas ou credores.')
+        
+        self.rng = random.Random(options['semente'])
+        self.lote = options['lote']
+        self.hoje = timezone.now().date()
+        
+        with transaction.atomic():
+            self.usuario, senha_gerada = self._criar_usuario(
+                options['usuario'], options['senha'], options['superusuario']
+            )
+            setores = self._criar_setores(options['setores'])
+            self._criar_perfil(setores[0])
+        
+        # A árvore orçamentária é dimensionada a partir dos contratos planejados,
+        # para que alocações e valores previstos cubram o que foi comprometido
+        n_rubricas = options['fontes'] * options['metas'] * options['atividades'] * options['rubricas']
+        planos = self._planejar_contratos(options['contratos'], len(setores), n_rubricas, options['max_parcelas'])
+        
+        with transaction.atomic():
+            rubricas = self._criar_estrutura(options, setores, planos)
+        
+        bolsistas = self._criar_pessoas(Bolsista, options['bolsistas'])
+        credores = self._criar_pessoas(Credor, options['credores'])
+        
+        totais = self._criar_contratos(planos, setores, rubricas, bolsistas, credores)
+        totais['entradas'] = self._criar_entradas(setores, rubricas)
+        
+        invalidar('estrutura')
+        invalidar('contratos')
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Gerados {len(setores)} setores, {len(rubricas)} rubricas, {len(bolsistas)} bolsistas, "
+            f"{len(credores)} credores, {totais['contratos']} contratos, {totais['parcelas']} parcelas e "
+            f"{totais['movimentos'] + totais['entradas']} movimentos. Login do teste de carga: {self.usuario.username}"
+        ))
+        if senha_gerada:
+            self.stdout.write(f'Senha gerada para {self.usuario.username}: {senha_gerada}')
+    
+    def _criar_usuario(self, username, senha, superusuario):
+        """
+        Cria o usuário do teste de carga (is_staff, para os endpoints administrativos) e
+        retorna (usuario, senha_gerada). A senha só é gerada quando o usuário é novo e
+        nenhuma foi informada; um usuário já existente mantém a senha que tem.
+        """
+        usuario, criado = Usuario.objects.get_or_create(
+            username=username,
+            defaults={
+                'email': f'{username}@carga.ccbj.org.br',
+                'first_name': 'Teste',
+                'last_name': 'de Carga',
+                'is_staff': True,
+                'is_superuser': superusuario,
+            }
+        )
+        senha_gerada = None
+        if criado:
+            if senha is None:
+                senha = senha_gerada = secrets.token_urlsafe(12)
+            usuario.set_password(senha)
+            usuario.save(update_fields=['password'])
+        return usuario, senha_gerada
+    
+    def _criar_perfil(self, setor):
+        Perfil.objects.get_or_create(
+            usuario=self.usuario,
+            defaults={
+                'nome_completo': 'Teste de Carga',
+                'cargo': 'Automação',
+                'setor': setor,
+                'nivel_acesso': 'admin',
+            }
+        )
+    
+    def _criar_setores(self, quantidade):
+        inicio = Setor.objects.count()
+        return Setor.objects.bulk_create(
+            [
+                Setor(nome=f'Setor {inicio + i + 1:03d}', descricao='Gerado para teste de carga',
+                      responsavel=self.usuario)
+                for i in range(quantidade)
+            ],
+            batch_size=self.lote
+        )
+    
+    def _planejar_contratos(self, quantidade, n_setores, n_rubricas, max_parcelas):
+        planos = []
+        for i in range(quantidade):
+            parcelas = self.rng.randint(1, max(1, max_parcelas))
+            valor_parcela = Decimal(self.rng.randrange(40000, 600000)).scaleb(-2)
+            inicio = self.hoje - timedelta(days=self.rng.randint(0, 720))
+            planos.append({
+                'setor': self.rng.randrange(n_setores),
+                'rubrica': self.rng.randrange(n_rubricas),
+                'bolsa': self.rng.random() < 0.7,
+                'parcelas': parcelas,
+                'valor_parcela': valor_parcela,
+                'inicio': inicio,
+                'fim': inicio + timedelta(days=30 * parcelas),
+            })
+        return planos
+    
+    def _criar_estrutura(self, options, setores, planos):
+        comprometido = defaultdict(Decimal)
+        for plano in planos:
+            comprometido[plano['setor'], plano['rubrica']] += plano['valor_parcela'] * plano['parcelas']
+        
+        # Folga de 10% a 30% sobre o comprometido em cada par setor/rubrica
+        alocado = {
+            chave: (valor * Decimal(self.rng.randint(110, 130)) / 100).quantize(CENTAVO)
+            for chave, valor in comprometido.items()
+        }
+        previsto_rubrica = defaultdict(Decimal)
+        for (_, indice), valor in alocado.items():
+            previsto_rubrica[indice] += valor
+        
+        por_fonte = options['metas'] * options['atividades'] * options['rubricas']
+        por_meta = options['atividades'] * options['rubricas']
+        por_atividade = options['rubricas']
+        
+        def soma(inicio, tamanho):
+            return sum((previsto_rubrica[i] for i in range(inicio, inicio + tamanho)), Decimal('0'))
+        
+        inicio_fontes = FonteRecurso.objects.count()
+        fontes = FonteRecurso.objects.bulk_create([
+            FonteRecurso(
+                nome=f'Fonte de Recurso {inicio_fontes + f + 1:02d}',
+                valor_total=(soma(f * por_fonte, por_fonte) * Decimal('1.05')).quantize(CENTAVO),
+                data_inicio=self.hoje - timedelta(days=730),
+                data_fim=self.hoje + timedelta(days=365),
+            )
+            for f in range(options['fontes'])
+        ])
+        
+        metas = Meta.objects.bulk_create([
+            Meta(
+                fonte_recurso=fonte,
+                codigo=f'F{fonte.pk}.M{m + 1}',
+                descricao=f'Meta {m + 1} da {fonte.nome}',
+                valor_previsto=soma((f * options['metas'] + m) * por_meta, por_meta),
+            )
+            for f, fonte in enumerate(fontes)
+            for m in range(options['metas'])
+        ], batch_size=self.lote)
+        
+        atividades = Atividade.objects.bulk_create([
+            Atividade(
+                meta=meta,
+                codigo=f'{meta.codigo}.A{a + 1}',
+                descricao=f'{self.rng.choice(ATIVIDADES)} {self.rng.choice(LINGUAGENS)}',
+                valor_previsto=soma((m * options['atividades'] + a) * por_atividade, por_atividade),
+            )
+            for m, meta in enumerate(metas)
+            for a in range(options['atividades'])
+        ], batch_size=self.lote)
+        
+        rubricas = Rubrica.objects.bulk_create([
+            Rubrica(
+                atividade=atividade,
+                nome=f'{RUBRICAS[r % len(RUBRICAS)]} ({atividade.codigo})',
+                valor_previsto=previsto_rubrica[a * options['rubricas'] + r],
+            )
+            for a, atividade in enumerate(atividades)
+            for r in range(options['rubricas'])
+        ], batch_size=self.lote)
+        
+        # As rubricas mantêm em cache as instâncias de atividade, meta e fonte usadas acima
+        AlocacaoRecurso.objects.bulk_create([
+            AlocacaoRecurso(
+                fonte_recurso=rubricas[r].atividade.meta.fonte_recurso,
+                setor=setores[s],
+                rubrica=rubricas[r],
+                valor_alocado=valor,
+                observacao='Gerado para teste de carga',
+            )
+            for (s, r), valor in alocado.items()
+        ], batch_size=self.lote)
+        
+        return rubricas
+    
+    def _documento(self, modelo, sequencia):
+        numero = f'{sequencia:011d}' if modelo is Bolsista else f'{sequencia:014d}'
+        if modelo is Bolsista:
+            return f'{numero[:3]}.{numero[3:6]}.{numero[6:9]}-{numero[9:]}'
+        return f'{numero[:2]}.{numero[2:5]}.{numero[5:8]}/{numero[8:12]}-{numero[12:]}'
+    
+    def _criar_pessoas(self, modelo, quantidade):
+        # Documentos sequenciais a partir de uma faixa reservada evitam colisão com dados reais
+        base = 90_000_000_000 if modelo is Bolsista else 90_000_000_000_000
+        base += modelo.objects.count()
+        criados = []
+        
+        for inicio in range(0, quantidade, self.lote):
+            objetos = []
+            for i in range(inicio, min(quantidade, inicio + self.lote)):
+                nome = f'{self.rng.choice(NOMES)} {self.rng.choice(SOBRENOMES)} {self.rng.choice(SOBRENOMES)}'
+                dados = {
+                    'endereco': f'Rua {self.rng.choice(SOBRENOMES)}, {self.rng.randint(1, 2000)} - Fortaleza/CE',
+                    'telefone': f'85 9{self.rng.randint(10000000, 99999999)}',
+                    'banco': self.rng.choice(BANCOS),
+                    'agencia': f'{self.rng.randint(1, 9999):04d}',
+                    'conta': f'{self.rng.randint(1, 999999):06d}-{self.rng.randint(0, 9)}',
+                }
+                if modelo is Bolsista:
+                    objetos.append(Bolsista(nome=nome, cpf=self._documento(Bolsista, base + i), **dados))
+                else:
+                    objetos.append(Credor(
+                        razao_social=f'{nome} Produções Culturais LTDA',
+                        nome_fantasia=f'{self.rng.choice(LINGUAGENS)} {self.rng.choice(SOBRENOMES)}',
+                        cnpj=self._documento(Credor, base + i),
+                        **dados
+                    ))
+            with transaction.atomic():
+                criados.extend(modelo.objects.bulk_create(objetos))
+        
+        return criados
+    
+    def _criar_contratos(self, planos, setores, rubricas, bolsistas, credores):
+        totais = {'contratos': 0, 'parcelas': 0, 'movimentos': 0}
+        
+        for inicio in range(0, len(planos), self.lote):
+            contratos, parcelas_por_contrato = [], []
+            
+            for plano in planos[inicio:inicio + self.lote]:
+                rubrica = rubricas[plano['rubrica']]
+                bolsa = bool(bolsistas) and (plano['bolsa'] or not credores)
+                
+                parcelas = []
+                for n in range(plano['parcelas']):
+                    prevista = plano['inicio'] + timedelta(days=30 * n)
+                    pago = prevista < self.hoje and self.rng.random() < 0.85
+                    parcelas.append((n + 1, prevista, pago))
+                total_pago = plano['valor_parcela'] * sum(1 for _, _, pago in parcelas if pago)
+                
+                contratos.append(Contrato(
+                    tipo='bolsa' if bolsa else 'servico',
+                    nome_curso_acao=f'{self.rng.choice(ATIVIDADES)} {self.rng.choice(LINGUAGENS)}',
+                    status_processo='concluido' if plano['fim'] < self.hoje else 'em_andamento',
+                    status_contrato='concluido' if plano['fim'] < self.hoje else 'em_execucao',
+                    setor=setores[plano['setor']],
+                    bolsista=self.rng.choice(bolsistas) if bolsa else None,
+                    credor=None if bolsa else self.rng.choice(credores),
+                    responsavel=f'{self.rng.choice(NOMES)} {self.rng.choice(SOBRENOMES)}',
+                    data_inicio=plano['inicio'],
+                    data_fim=plano['fim'],
+                    meta=rubrica.atividade.meta,
+                    atividade=rubrica.atividade,
+                    rubrica=rubrica,
+                    valor_total=plano['valor_parcela'] * plano['parcelas'],
+                    quantidade_parcelas=plano['parcelas'],
+                    total_pago=total_pago,
+                    criado_por=self.usuario,
+                    atualizado_por=self.usuario,
+                ))
+                parcelas_por_contrato.append((plano, parcelas))
+            
+            with transaction.atomic():
+                Contrato.objects.bulk_create(contratos)
+                
+                objetos = [
+                    ParcelaContrato(
+                        contrato=contrato,
+                        numero_parcela=numero,
+                        valor=plano['valor_parcela'],
+                        data_prevista=prevista,
+                        data_pagamento=prevista if pago else None,
+                        status='pago' if pago else 'pendente',
+                    )
+                    for contrato, (plano, parcelas) in zip(contratos, parcelas_por_contrato)
+                    for numero, prevista, pago in parcelas
+                ]
+                ParcelaContrato.objects.bulk_create(objetos, batch_size=self.lote)
+                
+                movimentos = [
+                    MovimentoFinanceiro(
+                        tipo='saida',
+                        fonte_recurso_id=parcela.contrato.meta.fonte_recurso_id,
+                        setor=parcela.contrato.setor,
+                        rubrica=parcela.contrato.rubrica,
+                        contrato=parcela.contrato,
+                        parcela=parcela,
+                        valor=parcela.valor,
+                        data_movimento=parcela.data_pagamento,
+                        descricao=f'Pagamento da parcela {parcela.numero_parcela} do contrato {parcela.contrato.nome_curso_acao}',
+                        usuario=self.usuario,
+                    )
+                    for parcela in objetos
+                    if parcela.status == 'pago'
+                ]
+                MovimentoFinanceiro.objects.bulk_create(movimentos, batch_size=self.lote)
+                movimento_mensal.registrar(movimentos)
+            
+            totais['contratos'] += len(contratos)
+            totais['parcelas'] += len(objetos)
+            totais['movimentos'] += len(movimentos)
+            self.stdout.write(f"  {totais['contratos']}/{len(planos)} contratos")
+        
+        return totais
+    
+    def _criar_entradas(self, setores, rubricas):
+        # Repasses mensais de cada fonte nos últimos 24 meses
+        primeira_rubrica = {}
+        for rubrica in rubricas:
+            primeira_rubrica.setdefault(rubrica.atividade.meta.fonte_recurso_id, rubrica)
+        
+        movimentos = []
+        for fonte_id, rubrica in primeira_rubrica.items():
+            fonte = rubrica.atividade.meta.fonte_recurso
+            parcela_mensal = (fonte.valor_total / 24).quantize(CENTAVO)
+            for mes in range(24):
+                movimentos.append(MovimentoFinanceiro(
+                    tipo='entrada',
+                    fonte_recurso_id=fonte_id,
+                    setor=setores[0],
+                    rubrica=rubrica,
+                    valor=parcela_mensal,
+                    data_movimento=(self.hoje.replace(day=1) - timedelta(days=30 * mes)).replace(day=5),
+                    descricao=f'Repasse mensal - {fonte.nome}',
+                    usuario=self.usuario,
+                ))
+        
+        with transaction.atomic():
+            MovimentoFinanceiro.objects.bulk_create(movimentos, batch_size=self.lote)
+            movimento_mensal.registrar(movimentos)
+        return len(movimentos)
@@ -0,0 +1,45 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.services import cnab
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera o arquivo de remessa CNAB 240 (pagamento a fornecedores) das parcelas pendentes '
+        'vencendo até a data informada ou das parcelas listadas, registrando a remessa pelo NSA.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--saida', required=True, help='Caminho do arquivo .rem gerado.')
+        parser.add_argument('--ate', type=date.fromisoformat, help='Inclui parcelas com data prevista até esta data.')
+        parser.add_argument('--parcelas', type=int, nargs='+', help='Ids das parcelas a incluir.')
+        parser.add_argument(
+            '--data-pagamento',
+            type=date.fromisoformat,
+            help='Data de pagamento informada ao banco (AAAA-MM-DD); padrão: hoje.'
+        )
+        parser.add_argument(
+            '--reenviar',
+            action='store_true',
+            help='Inclui parcelas já enviadas em remessa ainda sem retorno (o envio anterior é cancelado).'
+        )
+    
+    def handle(self, *args, **options):
+        if options['ate'] is None and not options['parcelas']:
+            raise CommandError('Informe --ate ou --parcelas.')
+        
+        parcelas = cnab.parcelas_remessa(options['parcelas'], options['ate'], options['reenviar'])
+        if not parcelas.exists():
+            raise CommandError('Nenhuma parcela pendente para a remessa.')
+        
+        data_pagamento = options['data_pagamento'] or timezone.localdate()
+        remessa = cnab.registrar_remessa(parcelas, data_pagamento, reenviar=options['reenviar'])
+        registros = cnab.gerar_registros(cnab.parcelas_da_remessa(remessa), data_pagamento, remessa.nsa)
+        with open(options['saida'], 'wb', buffering=0) as arquivo:
+            linhas = cnab.escrever_remessa(arquivo, registros)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Remessa {remessa.nsa:06d} gravada em {options['saida']} ({linhas} registros)."
+        ))
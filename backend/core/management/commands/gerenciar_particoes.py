@@ -0,0 +1,208 @@
+from datetime import date, datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+
+def _primeiro_dia(ano, mes):
+    while mes > 12:
+        ano, mes = ano + 1, mes - 12
+    return date(ano, mes, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        'Gerencia o particionamento mensal por intervalo (PostgreSQL) das tabelas '
+        'configuradas em PARTICIONAMENTO_TABELAS.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--converter',
+            action='store_true',
+            help=(
+                'Converte tabelas ainda não particionadas (cria a tabela particionada e copia os dados). '
+                'Tabelas referenciadas por chaves estrangeiras de outras tabelas são recusadas.'
+            )
+        )
+        parser.add_argument(
+            '--meses',
+            type=int,
+            default=3,
+            help='Quantidade de partições futuras a manter criadas a partir do mês atual.'
+        )
+    
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f'Particionamento disponível apenas no PostgreSQL (banco atual: {connection.vendor}).'
+            ))
+            return
+        
+        for rotulo, coluna in getattr(settings, 'PARTICIONAMENTO_TABELAS', {}).items():
+            try:
+                tabela = apps.get_model(rotulo)._meta.db_table
+            except LookupError:
+                self.stderr.write(self.style.WARNING(f'{rotulo}: modelo não encontrado, ignorando.'))
+                continue
+            
+            if not self._particionada(tabela):
+                if not options['converter']:
+                    self.stdout.write(f'{tabela}: não particionada (use --converter).')
+                    continue
+                referencias = self._referencias(tabela)
+                if referencias:
+                    self.stderr.write(self.style.WARNING(
+                        f"{tabela}: referenciada por chaves estrangeiras ({', '.join(referencias)}); "
+                        'conversão recusada.'
+                    ))
+                    continue
+                self._converter(tabela, coluna, options['meses'])
+            
+            criadas = self._criar_particoes_futuras(tabela, coluna, options['meses'])
+            self.stdout.write(self.style.SUCCESS(f'{tabela}: {criadas} partições novas.'))
+    
+    def _particionada(self, tabela):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [tabela])
+            linha = cursor.fetchone()
+        
+        if linha is None:
+            raise CommandError(f'Tabela {tabela} não existe. Execute as migrações primeiro.')
+        return linha[0] == 'p'
+    
+    def _referencias(self, tabela):
+        """
+        Chaves estrangeiras de outras tabelas que apontam para `tabela`, como "tabela.restrição".
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+                "WHERE confrelid = %s::regclass AND conrelid <> confrelid AND contype = 'f'",
+                [tabela]
+            )
+            return [f'{origem}.{nome}' for origem, nome in cursor.fetchall()]
+    
+    def _criar_particao(self, cursor, tabela, coluna, inicio):
+        """
+        Cria a partição do mês de `inicio`, se ainda não existir.
+        
+        Linhas do mês gravadas antes da partição existir (ex.: um mês em que o comando
+        não rodou) ficam em <tabela>_padrao, e o PostgreSQL recusa criar a partição
+        enquanto a DEFAULT tiver linhas do intervalo. Nesse caso a DEFAULT é desanexada,
+        a partição é criada, as linhas do mês são movidas para ela e a DEFAULT volta.
+        """
+        fim = _primeiro_dia(inicio.year, inicio.month + 1)
+        nome = f"{tabela}_p{inicio.strftime('%Y_%m')}"
+        padrao = f'{tabela}_padrao'
+        
+        cursor.execute("SELECT to_regclass(%s)", [nome])
+        if cursor.fetchone()[0] is not None:
+            return False
+        
+        pendentes = False
+        cursor.execute("SELECT to_regclass(%s)", [padrao])
+        if cursor.fetchone()[0] is not None:
+            cursor.execute(
+                f'SELECT 1 FROM "{padrao}" WHERE "{coluna}" >= %s AND "{coluna}" < %s LIMIT 1',
+                [inicio, fim]
+            )
+            pendentes = cursor.fetchone() is not None
+        
+        with transaction.atomic():
+            if pendentes:
+                cursor.execute(f'ALTER TABLE "{tabela}" DETACH PARTITION "{padrao}"')
+            
+            cursor.execute(
+                f'CREATE TABLE "{nome}" PARTITION OF "{tabela}" '
+                f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fim.isoformat()}')"
+            )
+            
+            if pendentes:
+                cursor.execute(
+                    f'WITH movidas AS (DELETE FROM "{padrao}" WHERE "{coluna}" >= %s AND "{coluna}" < %s '
+                    f'RETURNING *) INSERT INTO "{nome}" SELECT * FROM movidas',
+                    [inicio, fim]
+                )
+                self.stdout.write(f'{nome}: {cursor.rowcount} linhas movidas de {padrao}.')
+                cursor.execute(f'ALTER TABLE "{tabela}" ATTACH PARTITION "{padrao}" DEFAULT')
+        
+        return True
+    
+    def _criar_particoes_futuras(self, tabela, coluna, meses):
+        hoje = date.today()
+        criadas = 0
+        
+        with connection.cursor() as cursor:
+            for deslocamento in range(meses + 1):
+                inicio = _primeiro_dia(hoje.year, hoje.month + deslocamento)
+                if self._criar_particao(cursor, tabela, coluna, inicio):
+                    criadas += 1
+        
+        return criadas
+    
+    @transaction.atomic
+    def _converter(self, tabela, coluna, meses):
+        """
+        Troca a tabela comum por uma tabela particionada com o mesmo nome.
+        
+        A chave primária passa a ser (id, coluna), exigência do PostgreSQL para tabelas
+        particionadas. A tabela original fica como <tabela>_legado para conferência e
+        remoção manual.
+        
+        Só vale para tabelas que nenhuma outra referencia (ver `_referencias`): as chaves
+        estrangeiras de entrada continuariam apontando para <tabela>_legado e não podem
+        ser recriadas, porque `id` deixa de ser único sozinho na tabela particionada.
+        """
+        legado = f'{tabela}_legado'
+        
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{tabela}" RENAME TO "{legado}"')
+            cursor.execute(
+                f'CREATE TABLE "{tabela}" (LIKE "{legado}" INCLUDING DEFAULTS INCLUDING IDENTITY '
+                f'INCLUDING CONSTRAINTS) PARTITION BY RANGE ("{coluna}")'
+            )
+            cursor.execute(f'ALTER TABLE "{tabela}" ADD PRIMARY KEY ("id", "{coluna}")')
+            
+            # Chaves estrangeiras e índices não únicos não são copiados pelo LIKE
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype = 'f'",
+                [legado]
+            )
+            for nome, definicao in cursor.fetchall():
+                cursor.execute(f'ALTER TABLE "{tabela}" ADD CONSTRAINT "{nome}_p" {definicao}')
+            
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes "
+                "WHERE tablename = %s AND indexdef NOT LIKE 'CREATE UNIQUE%%'",
+                [legado]
+            )
+            for nome, definicao in cursor.fetchall():
+                definicao = definicao.replace(f'INDEX {nome} ', f'INDEX {nome}_p ', 1)
+                definicao = definicao.replace(f' ON public.{legado} ', f' ON public.{tabela} ', 1)
+                cursor.execute(definicao)
+            
+            # Partições para todo o intervalo já existente e uma partição padrão de segurança
+            cursor.execute(f'SELECT MIN("{coluna}"), MAX("{coluna}") FROM "{legado}"')
+            minimo, maximo = cursor.fetchone()
+            if minimo is not None:
+                if isinstance(maximo, datetime):
+                    maximo = maximo.date()
+                mes = _primeiro_dia(minimo.year, minimo.month)
+                while mes <= maximo:
+                    self._criar_particao(cursor, tabela, coluna, mes)
+                    mes = _primeiro_dia(mes.year, mes.month + 1)
+            cursor.execute(f'CREATE TABLE "{tabela}_padrao" PARTITION OF "{tabela}" DEFAULT')
+            
+            cursor.execute(f'INSERT INTO "{tabela}" SELECT * FROM "{legado}"')
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 1)) FROM \"{tabela}\"",
+                [tabela]
+            )
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'{tabela}: convertida para particionamento por {coluna}. Tabela original mantida em {legado}.'
+        ))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from core.models import Notificacao, ContadorNotificacoes
+
+
+class Command(BaseCommand):
+    help = 'Recalcula do zero os contadores de notificações não lidas de todos os usuários.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Quantidade de contadores gravados por comando INSERT.'
+        )
+    
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Uma única consulta agrupada com o total real por usuário
+            totais = dict(
+                Notificacao.objects.filter(lida=False)
+                .values('usuario_id')
+                .annotate(total=Count('id'))
+                .values_list('usuario_id', 'total')
+            )
+            
+            # Zerar contadores de usuários que não têm mais notificações pendentes
+            zerados = ContadorNotificacoes.objects.exclude(
+                usuario_id__in=list(totais)
+            ).exclude(nao_lidas=0).update(nao_lidas=0)
+            
+            ContadorNotificacoes.objects.bulk_create(
+                [
+                    ContadorNotificacoes(usuario_id=usuario_id, nao_lidas=total)
+                    for usuario_id, total in totais.items()
+                ],
+                batch_size=options['lote'],
+                update_conflicts=True,
+                unique_fields=['usuario'],
+                update_fields=['nao_lidas'],
+            )
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(totais)} contadores recalculados, {zerados} zerados.'
+        ))
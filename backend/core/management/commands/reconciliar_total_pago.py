@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from core.models import Contrato
+from core.services.cache import invalidar
+from core.services.pagamentos import total_pago_calculado
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara Contrato.total_pago com a soma das parcelas pagas e, com --corrigir, '
+        'regrava os contratos com desvio.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corrigir',
+            action='store_true',
+            help='Corrige os desvios encontrados (sem esta opção, apenas relata).'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Quantidade de contratos corrigidos por comando UPDATE.'
+        )
+        parser.add_argument(
+            '--detalhar',
+            action='store_true',
+            help='Lista cada contrato com desvio.'
+        )
+    
+    def handle(self, *args, **options):
+        # Uma consulta: só os contratos em que o valor gravado difere da soma das parcelas
+        desvios = list(
+            Contrato.objects.annotate(calculado=total_pago_calculado())
+            .exclude(total_pago=F('calculado'))
+            .order_by('pk')
+            .values_list('pk', 'total_pago', 'calculado')
+        )
+        
+        if options['detalhar']:
+            for pk, gravado, calculado in desvios:
+                self.stdout.write(f'Contrato {pk}: gravado {gravado}, parcelas pagas {calculado}')
+        
+        if not desvios:
+            self.stdout.write(self.style.SUCCESS('Nenhum desvio em total_pago.'))
+            return
+        
+        if not options['corrigir']:
+            self.stdout.write(self.style.WARNING(
+                f'{len(desvios)} contratos com total_pago divergente. Use --corrigir para ajustar.'
+            ))
+            return
+        
+        ids = [pk for pk, _, _ in desvios]
+        corrigidos = 0
+        with transaction.atomic():
+            for inicio in range(0, len(ids), options['lote']):
+                corrigidos += Contrato.objects.filter(pk__in=ids[inicio:inicio + options['lote']]).update(
+                    total_pago=total_pago_calculado()
+                )
+        invalidar('contratos')
+        
+        self.stdout.write(self.style.SUCCESS(f'{corrigidos} contratos corrigidos.'))
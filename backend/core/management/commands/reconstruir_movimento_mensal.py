@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from core.services.movimento_mensal import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói a consolidação mensal (MovimentoMensal) a partir dos movimentos financeiros, '
+        'em lotes de meses com uma transação por lote.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', type=date.fromisoformat, help='Mês inicial (AAAA-MM-DD); padrão: primeiro movimento.')
+        parser.add_argument('--fim', type=date.fromisoformat, help='Mês final (AAAA-MM-DD); padrão: último movimento.')
+        parser.add_argument('--meses-por-lote', type=int, default=3, help='Meses recalculados por transação.')
+    
+    def handle(self, *args, **options):
+        if options['meses_por_lote'] < 1:
+            raise CommandError('--meses-por-lote deve ser positivo.')
+        if options['inicio'] and options['fim'] and options['inicio'] > options['fim']:
+            raise CommandError('--inicio deve ser anterior a --fim.')
+        
+        meses, linhas = reconstruir(options['inicio'], options['fim'], options['meses_por_lote'])
+        
+        self.stdout.write(self.style.SUCCESS(f'{meses} meses reconstruídos, {linhas} linhas gravadas.'))
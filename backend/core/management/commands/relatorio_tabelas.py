@@ -0,0 +1,94 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, DatabaseError
+
+
+class Command(BaseCommand):
+    help = 'Mostra contagem de linhas, tamanho e inchaço (bloat) das tabelas monitoradas.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Inclui todas as tabelas do app core, e não só as de retenção/particionamento.'
+        )
+    
+    def handle(self, *args, **options):
+        tabelas = self._tabelas(options['todas'])
+        
+        if connection.vendor == 'postgresql':
+            linhas = self._estatisticas_postgresql(tabelas)
+        else:
+            linhas = self._estatisticas_genericas(tabelas)
+        
+        self.stdout.write(
+            f"{'tabela':<40} {'linhas':>12} {'mortas':>10} {'bloat %':>8} {'total MB':>10} {'índices MB':>11}"
+        )
+        for tabela, vivas, mortas, total, indices in linhas:
+            bloat = (mortas / (vivas + mortas) * 100) if mortas is not None and (vivas + mortas) else None
+            self.stdout.write(
+                f"{tabela:<40} {vivas:>12} {self._fmt(mortas):>10} {self._fmt(bloat, '.1f'):>8} "
+                f"{self._fmt_mb(total):>10} {self._fmt_mb(indices):>11}"
+            )
+    
+    def _tabelas(self, todas):
+        if todas:
+            return [modelo._meta.db_table for modelo in apps.get_app_config('core').get_models()]
+        
+        rotulos = [p['modelo'] for p in getattr(settings, 'RETENCAO_POLITICAS', {}).values()]
+        rotulos += list(getattr(settings, 'PARTICIONAMENTO_TABELAS', {}))
+        
+        tabelas = []
+        for rotulo in dict.fromkeys(rotulos):
+            try:
+                tabelas.append(apps.get_model(rotulo)._meta.db_table)
+            except LookupError:
+                self.stderr.write(self.style.WARNING(f'{rotulo}: modelo não encontrado, ignorando.'))
+        return tabelas
+    
+    def _estatisticas_postgresql(self, tabelas):
+        # pg_stat_user_tables lista as partições separadamente; somamos pelo nome da tabela pai
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT COALESCE(pai.relname, s.relname) AS tabela,
+                       SUM(s.n_live_tup), SUM(s.n_dead_tup),
+                       SUM(pg_total_relation_size(s.relid)), SUM(pg_indexes_size(s.relid))
+                FROM pg_stat_user_tables s
+                LEFT JOIN pg_inherits i ON i.inhrelid = s.relid
+                LEFT JOIN pg_class pai ON pai.oid = i.inhparent
+                WHERE COALESCE(pai.relname, s.relname) = ANY(%s)
+                GROUP BY 1
+                ORDER BY 4 DESC
+                """,
+                [tabelas]
+            )
+            return [(t, int(v), int(m), int(tot), int(idx)) for t, v, m, tot, idx in cursor.fetchall()]
+    
+    def _estatisticas_genericas(self, tabelas):
+        linhas = []
+        with connection.cursor() as cursor:
+            for tabela in tabelas:
+                cursor.execute(f'SELECT COUNT(*) FROM "{tabela}"')
+                vivas = cursor.fetchone()[0]
+                
+                total = None
+                if connection.vendor == 'sqlite':
+                    # dbstat só existe quando o SQLite é compilado com SQLITE_ENABLE_DBSTAT_VTAB
+                    try:
+                        cursor.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [tabela])
+                        total = cursor.fetchone()[0]
+                    except DatabaseError:
+                        pass
+                
+                linhas.append((tabela, vivas, None, total, None))
+        return linhas
+    
+    @staticmethod
+    def _fmt(valor, formato='d'):
+        return '-' if valor is None else format(valor, formato)
+    
+    @staticmethod
+    def _fmt_mb(valor):
+        return '-' if valor is None else f'{valor / (1024 * 1024):.1f}'
@@ -0,0 +1,41 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from core.services.orcamento import verificar_consistencia, descrever_violacao
+
+
+class Command(BaseCommand):
+    help = (
+        'Verifica se as somas da estrutura orçamentária cabem nos limites de cada nível '
+        '(metas na fonte, atividades na meta, rubricas na atividade, alocações na rubrica).'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--fonte', type=int, help='Verifica só o ramo desta fonte de recurso.')
+        parser.add_argument('--meta', type=int, help='Verifica só o ramo desta meta.')
+        parser.add_argument('--atividade', type=int, help='Verifica só o ramo desta atividade.')
+        parser.add_argument('--json', action='store_true', help='Imprime as violações em JSON.')
+        parser.add_argument(
+            '--falhar',
+            action='store_true',
+            help='Termina com código de saída 1 se houver violações (para uso em CI/cron).'
+        )
+    
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        violacoes = verificar_consistencia(
+            fonte=options['fonte'], meta=options['meta'], atividade=options['atividade']
+        )
+        duracao = time.perf_counter() - inicio
+        
+        if options['json']:
+            self.stdout.write(json.dumps(violacoes, default=str, ensure_ascii=False, indent=2))
+        else:
+            for violacao in violacoes:
+                self.stdout.write(descrever_violacao(violacao))
+            estilo = self.style.WARNING if violacoes else self.style.SUCCESS
+            self.stdout.write(estilo(f'{len(violacoes)} violações encontradas em {duracao:.2f}s.'))
+        
+        if violacoes and options['falhar']:
+            raise CommandError(f'{len(violacoes)} violações de consistência orçamentária.')
@@ -0,0 +1,14 @@
+from core.services.auditoria import contexto_auditoria
+
+
+class AuditoriaMiddleware:
+    """
+    Abre um buffer de auditoria por requisição e grava os registros ao final.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        with contexto_auditoria(request=request):
+            return self.get_response(request)
@@ -8,8 +8,11 @@ from .contratos import (
     Contrato, ParcelaContrato, HistoricoProcesso, MovimentoFinanceiro
 )
 from .sistema import (
-    ConfiguracaoSistema, Notificacao, RelatorioGerado, ProjecaoOrcamentaria
+    ConfiguracaoSistema, Notificacao, ContadorNotificacoes, RelatorioGerado,
+    ProjecaoOrcamentaria, MovimentoMensal
 )
+from .conciliacao import ExtratoBancario, LancamentoExtrato, RemessaCnab, ItemRemessaCnab
+from .acompanhamento import AcompanhamentoProcesso, FiltroSalvo
 
 __all__ = [
     'Usuario', 'Perfil', 'RegistroAuditoria',
@@ -17,5 +20,8 @@ __all__ = [
     'Rubrica', 'AlocacaoRecurso', 'TransferenciaRecurso',
     'Credor', 'Bolsista',
     'Contrato', 'ParcelaContrato', 'HistoricoProcesso', 'MovimentoFinanceiro',
-    'ConfiguracaoSistema', 'Notificacao', 'RelatorioGerado', 'ProjecaoOrcamentaria'
+    'ConfiguracaoSistema', 'Notificacao', 'ContadorNotificacoes', 'RelatorioGerado',
+    'ProjecaoOrcamentaria', 'MovimentoMensal',
+    'ExtratoBancario', 'LancamentoExtrato', 'RemessaCnab', 'ItemRemessaCnab',
+    'AcompanhamentoProcesso', 'FiltroSalvo'
 ]
@@ -26,54 +26,6 @@ class AcompanhamentoProcesso(models.Model):
         return f"{self.usuario.username} - {self.contrato.nome_curso_acao}"
 
 
-class Notificacao(models.Model):
-    """
-    Modelo para armazenar notificações sobre processos.
-    """
-    TIPO_CHOICES = [
-        ('status', 'Mudança de Status'),
-        ('pagamento', 'Pagamento Realizado'),
-        ('prazo', 'Prazo Próximo'),
-        ('vencimento', 'Contrato Vencido'),
-        ('sistema', 'Notificação do Sistema'),
-    ]
-    
-    PRIORIDADE_CHOICES = [
-        ('baixa', 'Baixa'),
-        ('media', 'Média'),
-        ('alta', 'Alta'),
-    ]
-    
-    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='notificacoes')
-    contrato = models.ForeignKey(Contrato, on_delete=models.CASCADE, related_name='notificacoes', null=True, blank=True)
-    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
-    titulo = models.CharField(max_length=255)
-    mensagem = models.TextField()
-    data_criacao = models.DateTimeField(auto_now_add=True)
-    lida = models.BooleanField(default=False)
-    data_leitura = models.DateTimeField(null=True, blank=True)
-    prioridade = models.CharField(max_length=10, choices=PRIORIDADE_CHOICES, default='media')
-    enviado_email = models.BooleanField(default=False)
-    
-    class Meta:
-        verbose_name = 'Notificação'
-        verbose_name_plural = 'Notificações'
-        ordering = ['-data_criacao']
-    
-    def __str__(self):
-        return self.titulo
-    
-    def marcar_como_lida(self):
-        """
-        Marca a notificação como lida e registra a data de leitura.
-        """
-        from django.utils import timezone
-        
-        self.lida = True
-        self.data_leitura = timezone.now()
-        self.save()
-
-
 class FiltroSalvo(models.Model):
     """
     Modelo para salvar filtros personalizados de busca de processos.
@@ -103,6 +55,9 @@ class FiltroSalvo(models.Model):
     ordenacao = models.CharField(max_length=100, default='-data_inicio')
     itens_por_pagina = models.PositiveIntegerField(default=25)
     
+    # Forma compilada dos filtros (ids resolvidos e predicados exatos), gerada no save()
+    filtro_compilado = models.JSONField(blank=True, null=True, editable=False)
+    
     class Meta:
         verbose_name = 'Filtro Salvo'
         verbose_name_plural = 'Filtros Salvos'
@@ -111,57 +66,174 @@ class FiltroSalvo(models.Model):
     def __str__(self):
         return f"{self.nome} ({self.usuario.username})"
     
-    def aplicar_filtro(self, queryset):
+    # Listas de ids maiores que isto não são guardadas em cache; o filtro é aplicado direto no banco
+    LIMITE_IDS_CACHE = 5000
+    CACHE_TIMEOUT = 60 * 15
+    
+    def save(self, *args, **kwargs):
+        self.filtro_compilado = self.compilar()
+        super().save(*args, **kwargs)
+    
+    def compilar(self):
         """
-        Aplica os filtros salvos a um queryset de contratos.
+        Resolve os filtros textuais da estrutura (setor, fonte, meta, atividade, rubrica)
+        em conjuntos de ids e os demais campos em predicados exatos sobre colunas do contrato.
+        
+        O resultado é gravado em `filtro_compilado`, de modo que aplicar o filtro não
+        precisa de JOINs nem de `icontains` nas tabelas relacionadas.
         """
+        from django.db.models import Q
+        from .estrutura import Setor, Meta, Atividade, Rubrica
+        
+        predicados = {}
+        
         if self.setor:
-            queryset = queryset.filter(setor__nome__icontains=self.setor)
+            predicados['setor_id__in'] = list(
+                Setor.objects.filter(nome__icontains=self.setor).values_list('id', flat=True)
+            )
         
+        metas = None
         if self.fonte_recurso:
-            queryset = queryset.filter(meta__fonte_recurso__nome__icontains=self.fonte_recurso)
-        
+            metas = set(
+                Meta.objects.filter(fonte_recurso__nome__icontains=self.fonte_recurso)
+                .values_list('id', flat=True)
+            )
         if self.meta:
-            queryset = queryset.filter(meta__nome__icontains=self.meta)
+            ids = set(
+                Meta.objects.filter(Q(codigo__icontains=self.meta) | Q(descricao__icontains=self.meta))
+                .values_list('id', flat=True)
+            )
+            metas = ids if metas is None else metas & ids
+        if metas is not None:
+            predicados['meta_id__in'] = sorted(metas)
         
         if self.atividade:
-            queryset = queryset.filter(atividade__nome__icontains=self.atividade)
+            predicados['atividade_id__in'] = list(
+                Atividade.objects.filter(
+                    Q(codigo__icontains=self.atividade) | Q(descricao__icontains=self.atividade)
+                ).values_list('id', flat=True)
+            )
         
         if self.rubrica:
-            queryset = queryset.filter(rubrica__nome__icontains=self.rubrica)
+            predicados['rubrica_id__in'] = list(
+                Rubrica.objects.filter(nome__icontains=self.rubrica).values_list('id', flat=True)
+            )
         
         if self.status_contrato:
-            status_list = self.status_contrato.split(',')
-            queryset = queryset.filter(status_contrato__in=status_list)
+            predicados['status_contrato__in'] = [s.strip() for s in self.status_contrato.split(',') if s.strip()]
         
         if self.tipo_contrato:
-            tipos_list = self.tipo_contrato.split(',')
-            queryset = queryset.filter(tipo__in=tipos_list)
+            predicados['tipo__in'] = [t.strip() for t in self.tipo_contrato.split(',') if t.strip()]
+        
+        intervalos = [
+            ('data_inicio__gte', self.data_inicio_de),
+            ('data_inicio__lte', self.data_inicio_ate),
+            ('data_fim__gte', self.data_fim_de),
+            ('data_fim__lte', self.data_fim_ate),
+            ('valor_total__gte', self.valor_minimo),
+            ('valor_total__lte', self.valor_maximo),
+        ]
+        for lookup, valor in intervalos:
+            if valor:
+                predicados[lookup] = str(valor)
+        
+        return {
+            'predicados': predicados,
+            'texto_busca': self.texto_busca or None,
+        }
+    
+    CAMPOS_ESTRUTURA = ('setor', 'fonte_recurso', 'meta', 'atividade', 'rubrica')
+    
+    @classmethod
+    def recompilar_estrutura(cls):
+        """
+        Recompila os filtros que dependem de nomes da estrutura orçamentária.
+        
+        Chamado quando setores, fontes, metas, atividades ou rubricas são gravados,
+        para que a leitura dos filtros nunca precise recompilar nem gravar.
+        """
+        from django.db.models import Q
+        
+        dependentes = Q()
+        for campo in cls.CAMPOS_ESTRUTURA:
+            dependentes |= Q(**{f'{campo}__gt': ''})
+        
+        filtros = list(cls.objects.filter(dependentes))
+        for filtro in filtros:
+            filtro.filtro_compilado = filtro.compilar()
+        cls.objects.bulk_update(filtros, ['filtro_compilado'], batch_size=500)
+    
+    def filtros_compilados(self):
+        """
+        Retorna o filtro compilado gravado. Filtros ainda sem forma compilada são
+        compilados só em memória; a leitura não grava no banco.
+        """
+        return self.filtro_compilado or self.compilar()
+    
+    def _ids_texto(self, texto):
+        from .contratos import Contrato
+        from .credores import Bolsista, Credor
+        from core.services.busca import buscar
         
-        if self.data_inicio_de:
-            queryset = queryset.filter(data_inicio__gte=self.data_inicio_de)
+        # Cada entidade é consultada pelo seu índice textual; o contrato entra se
+        # ele próprio, seu bolsista ou seu credor corresponder ao termo
+        contratos = buscar(Contrato.objects.all(), texto, ordenar=False).values('id')
+        bolsistas = buscar(Bolsista.objects.all(), texto, ordenar=False).values('id')
+        credores = buscar(Credor.objects.all(), texto, ordenar=False).values('id')
         
-        if self.data_inicio_ate:
-            queryset = queryset.filter(data_inicio__lte=self.data_inicio_ate)
+        return Contrato.objects.filter(
+            models.Q(pk__in=contratos) |
+            models.Q(bolsista_id__in=bolsistas) |
+            models.Q(credor_id__in=credores)
+        ).values_list('id', flat=True)
+    
+    def _queryset_resultado(self, queryset):
+        compilado = self.filtros_compilados()
+        queryset = queryset.filter(**compilado['predicados'])
         
-        if self.data_fim_de:
-            queryset = queryset.filter(data_fim__gte=self.data_fim_de)
+        if compilado['texto_busca']:
+            queryset = queryset.filter(pk__in=self._ids_texto(compilado['texto_busca']))
         
-        if self.data_fim_ate:
-            queryset = queryset.filter(data_fim__lte=self.data_fim_ate)
+        return queryset
+    
+    def ids_resultado(self):
+        """
+        Retorna a lista de ids de contratos que atendem ao filtro, usando o cache quando possível.
         
-        if self.valor_minimo:
-            queryset = queryset.filter(valor_total__gte=self.valor_minimo)
+        A chave inclui a versão do namespace 'contratos', que é incrementada a cada
+        gravação de contrato, e a versão do namespace 'estrutura', incrementada junto
+        com a recompilação dos filtros.
+        """
+        from django.core.cache import cache
+        from .contratos import Contrato
+        from core.services.cache import chave, versao
+        
+        if not self.pk:
+            return None
         
-        if self.valor_maximo:
-            queryset = queryset.filter(valor_total__lte=self.valor_maximo)
+        chave_cache = chave('contratos', 'filtro_salvo', self.pk, versao('estrutura'))
         
-        if self.texto_busca:
-            queryset = queryset.filter(
-                models.Q(nome_curso_acao__icontains=self.texto_busca) |
-                models.Q(bolsista__nome__icontains=self.texto_busca) |
-                models.Q(credor__nome__icontains=self.texto_busca) |
-                models.Q(responsavel__icontains=self.texto_busca)
+        ids = cache.get(chave_cache)
+        if ids is None:
+            ids = list(
+                self._queryset_resultado(Contrato.objects.all())
+                .values_list('id', flat=True)[:self.LIMITE_IDS_CACHE + 1]
             )
+            if len(ids) > self.LIMITE_IDS_CACHE:
+                return None
+            cache.set(chave_cache, ids, self.CACHE_TIMEOUT)
+        
+        return ids
+    
+    def aplicar_filtro(self, queryset):
+        """
+        Aplica os filtros salvos a um queryset de contratos.
+        """
+        ids = self.ids_resultado()
+        
+        if ids is None:
+            queryset = self._queryset_resultado(queryset)
+        else:
+            queryset = queryset.filter(pk__in=ids)
         
         return queryset.order_by(self.ordenacao)
@@ -0,0 +1,139 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from .usuario import Usuario
+from .contratos import MovimentoFinanceiro, ParcelaContrato
+
+
+class ExtratoBancario(models.Model):
+    """
+    Extrato bancário importado (OFX ou CSV) para conciliação com os movimentos financeiros.
+    """
+    FORMATO_CHOICES = [
+        ('ofx', 'OFX'),
+        ('csv', 'CSV'),
+    ]
+    
+    arquivo_nome = models.CharField(max_length=255)
+    formato = models.CharField(max_length=3, choices=FORMATO_CHOICES)
+    banco = models.CharField(max_length=100, blank=True)
+    conta = models.CharField(max_length=30, blank=True)
+    data_inicio = models.DateField(null=True, blank=True)
+    data_fim = models.DateField(null=True, blank=True)
+    total_lancamentos = models.PositiveIntegerField(default=0)
+    total_conciliados = models.PositiveIntegerField(default=0)
+    importado_por = models.ForeignKey(
+        Usuario,
+        on_delete=models.PROTECT,
+        related_name='extratos_importados'
+    )
+    data_importacao = models.DateTimeField(auto_now_add=True)
+    data_conciliacao = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('extrato bancário')
+        verbose_name_plural = _('extratos bancários')
+        ordering = ['-data_importacao']
+        
+    def __str__(self):
+        return f"{self.arquivo_nome} ({self.data_inicio} a {self.data_fim})"
+
+
+class LancamentoExtrato(models.Model):
+    """
+    Linha do extrato bancário. `valor` é positivo para créditos e negativo para débitos;
+    `movimento` guarda o vínculo da conciliação.
+    """
+    extrato = models.ForeignKey(
+        ExtratoBancario,
+        on_delete=models.CASCADE,
+        related_name='lancamentos'
+    )
+    data = models.DateField()
+    valor = models.DecimalField(max_digits=15, decimal_places=2)
+    descricao = models.CharField(max_length=255, blank=True)
+    documento = models.CharField(max_length=100, blank=True)
+    movimento = models.OneToOneField(
+        MovimentoFinanceiro,
+        on_delete=models.SET_NULL,
+        related_name='lancamento_extrato',
+        null=True,
+        blank=True
+    )
+    conciliado_manualmente = models.BooleanField(default=False)
+    
+    class Meta:
+        verbose_name = _('lançamento de extrato')
+        verbose_name_plural = _('lançamentos de extrato')
+        ordering = ['data', 'id']
+        indexes = [
+            models.Index(fields=['extrato', 'movimento'], name='lancamento_extrato_conciliado'),
+        ]
+        
+    def __str__(self):
+        return f"{self.data} {self.valor} {self.descricao}"
+
+
+class RemessaCnab(models.Model):
+    """
+    Arquivo de remessa CNAB 240 gerado, identificado pelo número sequencial (NSA).
+    """
+    nsa = models.PositiveIntegerField(unique=True)
+    data_pagamento = models.DateField()
+    total_parcelas = models.PositiveIntegerField(default=0)
+    gerada_por = models.ForeignKey(
+        Usuario,
+        on_delete=models.PROTECT,
+        related_name='remessas_cnab',
+        null=True,
+        blank=True
+    )
+    data_geracao = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('remessa CNAB')
+        verbose_name_plural = _('remessas CNAB')
+        ordering = ['-nsa']
+        
+    def __str__(self):
+        return f"Remessa {self.nsa:06d} ({self.total_parcelas} parcelas)"
+
+
+class ItemRemessaCnab(models.Model):
+    """
+    Parcela incluída numa remessa CNAB. Enquanto a situação é 'enviada', a parcela fica
+    fora das remessas seguintes; o retorno a passa para 'paga' ou 'rejeitada'.
+    """
+    SITUACAO_CHOICES = [
+        ('enviada', 'Enviada'),
+        ('paga', 'Paga'),
+        ('rejeitada', 'Rejeitada'),
+        ('cancelada', 'Cancelada'),
+    ]
+    
+    remessa = models.ForeignKey(
+        RemessaCnab,
+        on_delete=models.CASCADE,
+        related_name='itens'
+    )
+    parcela = models.ForeignKey(
+        ParcelaContrato,
+        on_delete=models.CASCADE,
+        related_name='itens_remessa_cnab'
+    )
+    situacao = models.CharField(max_length=10, choices=SITUACAO_CHOICES, default='enviada')
+    ocorrencias = models.CharField(max_length=10, blank=True)
+    
+    class Meta:
+        verbose_name = _('item de remessa CNAB')
+        verbose_name_plural = _('itens de remessa CNAB')
+        constraints = [
+            # Uma parcela só pode estar aguardando retorno em uma remessa por vez
+            models.UniqueConstraint(
+                fields=['parcela'],
+                condition=models.Q(situacao='enviada'),
+                name='parcela_em_uma_remessa_enviada'
+            ),
+        ]
+        
+    def __str__(self):
+        return f"{self.remessa.nsa:06d}: parcela {self.parcela_id} ({self.get_situacao_display()})"
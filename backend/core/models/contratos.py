@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from .usuario import Usuario
@@ -61,6 +62,9 @@ class Contrato(models.Model):
     status_anterior = models.CharField(max_length=30, choices=StatusContrato.choices, blank=True, null=True)
     motivo_alteracao_status = models.TextField(blank=True, null=True)
     
+    # Vetor de busca textual, mantido por trigger no PostgreSQL (ver core.services.busca)
+    busca_vetor = SearchVectorField(blank=True, null=True, editable=False)
+    
     class Meta:
         verbose_name = 'Contrato'
         verbose_name_plural = 'Contratos'
@@ -248,29 +252,24 @@ class Parcela(models.Model):
         return f"{self.contrato.nome_curso_acao} - Parcela {self.numero}"
     
     def save(self, *args, **kwargs):
-        # Se a parcela foi marcada como paga, atualizar o total pago no contrato
-        is_new_payment = False
-        if self.pk:
-            old_instance = Parcela.objects.get(pk=self.pk)
-            if not old_instance.pago and self.pago:
-                is_new_payment = True
-        else:
-            if self.pago:
-                is_new_payment = True
-        
-        super().save(*args, **kwargs)
+        # total_pago acompanha a parcela por variação (pagamento, estorno ou mudança de
+        # valor), na mesma transação, sem reagregar as parcelas do contrato
+        from core.services.pagamentos import ajustar_total_pago
         
-        if is_new_payment:
-            # Atualizar o total pago no contrato
-            total_pago = Parcela.objects.filter(
-                contrato=self.contrato,
-                pago=True
-            ).aggregate(
-                total=models.Sum('valor')
-            )['total'] or Decimal('0')
+        with transaction.atomic():
+            contribuicao_anterior = Decimal('0')
+            if self.pk:
+                anterior = Parcela.objects.filter(pk=self.pk).values_list('pago', 'valor').first()
+                if anterior and anterior[0]:
+                    contribuicao_anterior = anterior[1]
+            
+            super().save(*args, **kwargs)
             
-            self.contrato.total_pago = total_pago
-            self.contrato.save()
+            delta = (self.valor if self.pago else Decimal('0')) - contribuicao_anterior
+            if delta:
+                ajustar_total_pago({self.contrato_id: delta})
+                if Parcela.contrato.is_cached(self):
+                    self.contrato.total_pago += delta
 
 
 class HistoricoStatusContrato(models.Model):
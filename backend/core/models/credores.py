@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.translation import gettext_lazy as _
 
 
@@ -17,6 +18,9 @@ class Credor(models.Model):
     conta = models.CharField(max_length=20)
     ativo = models.BooleanField(default=True)
     
+    # Vetor de busca textual, mantido por trigger no PostgreSQL (ver core.services.busca)
+    busca_vetor = SearchVectorField(blank=True, null=True, editable=False)
+    
     class Meta:
         verbose_name = _('credor')
         verbose_name_plural = _('credores')
@@ -40,6 +44,9 @@ class Bolsista(models.Model):
     conta = models.CharField(max_length=20)
     ativo = models.BooleanField(default=True)
     
+    # Vetor de busca textual, mantido por trigger no PostgreSQL (ver core.services.busca)
+    busca_vetor = SearchVectorField(blank=True, null=True, editable=False)
+    
     class Meta:
         verbose_name = _('bolsista')
         verbose_name_plural = _('bolsistas')
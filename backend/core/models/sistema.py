@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.utils.translation import gettext_lazy as _
 from .usuario import Usuario
 from .estrutura import Setor, Rubrica, FonteRecurso
@@ -55,6 +57,63 @@ class Notificacao(models.Model):
         return f"{self.titulo} ({self.get_tipo_display()})"
 
 
+class ContadorNotificacoes(models.Model):
+    """
+    Contador desnormalizado de notificações não lidas por usuário.
+    Mantido por incrementos/decrementos com F() para evitar COUNT(*) a cada consulta.
+    """
+    usuario = models.OneToOneField(
+        Usuario,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='contador_notificacoes'
+    )
+    nao_lidas = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = _('contador de notificações')
+        verbose_name_plural = _('contadores de notificações')
+        
+    def __str__(self):
+        return f"{self.usuario_id}: {self.nao_lidas} não lidas"
+    
+    @classmethod
+    def ajustar(cls, usuario_id, delta):
+        """
+        Soma `delta` (positivo ou negativo) ao contador do usuário sem ler a linha antes.
+        
+        Deve ser chamado depois da alteração nas notificações: um usuário ainda sem
+        contador (notificações anteriores à desnormalização) é inicializado com o COUNT
+        das não lidas, que já reflete a alteração, em vez de partir de `delta`.
+        """
+        if not delta:
+            return
+        
+        atualizados = cls.objects.filter(usuario_id=usuario_id).update(
+            nao_lidas=Greatest(F('nao_lidas') + delta, 0)
+        )
+        
+        if not atualizados:
+            cls.objects.get_or_create(
+                usuario_id=usuario_id,
+                defaults={'nao_lidas': Notificacao.objects.filter(usuario_id=usuario_id, lida=False).count()}
+            )
+    
+    @classmethod
+    def obter(cls, usuario_id):
+        """
+        Retorna o número de notificações não lidas do usuário.
+        Usuários sem contador (anteriores à desnormalização) são inicializados com um COUNT único.
+        """
+        valor = cls.objects.filter(usuario_id=usuario_id).values_list('nao_lidas', flat=True).first()
+        
+        if valor is None:
+            valor = Notificacao.objects.filter(usuario_id=usuario_id, lida=False).count()
+            cls.objects.get_or_create(usuario_id=usuario_id, defaults={'nao_lidas': valor})
+        
+        return valor
+
+
 class RelatorioGerado(models.Model):
     """
     Registro de relatórios gerados pelo sistema.
@@ -110,6 +169,8 @@ class ProjecaoOrcamentaria(models.Model):
     mes_referencia = models.DateField()
     valor_previsto = models.DecimalField(max_digits=15, decimal_places=2)
     valor_realizado = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    # Parte do previsto em parcelas ainda não pagas (preenchida por atualizar_projecoes)
+    valor_pendente = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     observacao = models.TextField(blank=True, null=True)
     criado_por = models.ForeignKey(
         Usuario,
@@ -123,6 +184,63 @@ class ProjecaoOrcamentaria(models.Model):
         verbose_name = _('projeção orçamentária')
         verbose_name_plural = _('projeções orçamentárias')
         ordering = ['mes_referencia']
+        constraints = [
+            # Chave do upsert feito por core.services.projecao.atualizar_projecoes
+            models.UniqueConstraint(
+                fields=['setor', 'fonte_recurso', 'rubrica', 'mes_referencia'],
+                name='projecao_unica_por_mes'
+            ),
+        ]
         
     def __str__(self):
         return f"Projeção para {self.setor.nome} - {self.rubrica.nome} ({self.mes_referencia.strftime('%m/%Y')})"
+
+
+class MovimentoMensal(models.Model):
+    """
+    Totais mensais de MovimentoFinanceiro por tipo, fonte, setor e rubrica.
+    Mantido por core.services.movimento_mensal a cada inclusão, alteração ou exclusão de movimento.
+    """
+    ano_mes = models.DateField()
+    tipo = models.CharField(max_length=20)
+    fonte_recurso = models.ForeignKey(
+        FonteRecurso,
+        on_delete=models.CASCADE,
+        related_name='movimentos_mensais',
+        null=True,
+        blank=True
+    )
+    setor = models.ForeignKey(
+        Setor,
+        on_delete=models.CASCADE,
+        related_name='movimentos_mensais',
+        null=True,
+        blank=True
+    )
+    rubrica = models.ForeignKey(
+        Rubrica,
+        on_delete=models.CASCADE,
+        related_name='movimentos_mensais',
+        null=True,
+        blank=True
+    )
+    valor_total = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    quantidade = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = _('movimento mensal')
+        verbose_name_plural = _('movimentos mensais')
+        ordering = ['ano_mes', 'tipo']
+        constraints = [
+            # Dimensões nulas contam como uma chave só (NULL seria distinto no índice único)
+            models.UniqueConstraint(
+                F('ano_mes'), F('tipo'),
+                Coalesce('fonte_recurso', Value(0)),
+                Coalesce('setor', Value(0)),
+                Coalesce('rubrica', Value(0)),
+                name='movimento_mensal_unico'
+            ),
+        ]
+        
+    def __str__(self):
+        return f"{self.ano_mes:%m/%Y} {self.tipo}: {self.valor_total} ({self.quantidade})"
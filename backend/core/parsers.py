@@ -0,0 +1,32 @@
+"""
+Parsers JSON de alto desempenho para o DRF (orjson com fallback para o JSONParser padrão).
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+class ORJSONParser(JSONParser):
+    """
+    Parser JSON baseado em orjson, com fallback para o parser padrão do DRF.
+    """
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        
+        try:
+            conteudo = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                conteudo = conteudo.decode(encoding).encode('utf-8')
+            return orjson.loads(conteudo)
+        except (ValueError, UnicodeError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
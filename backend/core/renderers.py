@@ -0,0 +1,42 @@
+"""
+Renderers JSON de alto desempenho para o DRF.
+
+O ORJSONRenderer usa o orjson quando instalado e cai no JSONRenderer padrão caso
+contrário. A saída é equivalente à do encoder do DRF: Decimal vira número, datas e
+datas/horas seguem ISO 8601 com 'Z' para UTC, e chaves não textuais viram texto.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+if orjson is not None:
+    OPCOES_ORJSON = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+else:
+    OPCOES_ORJSON = 0
+
+# Tipos que o orjson não conhece (Decimal, UUID, timedelta, lazy strings, QuerySet...)
+# recebem o mesmo tratamento do encoder do DRF
+_padrao = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renderer JSON baseado em orjson, com fallback para o renderer padrão do DRF.
+    
+    Pode ser usado globalmente (REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']) ou por
+    view, via `renderer_classes`.
+    """
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        
+        # Indentação explícita (?indent / Accept: ...; indent=4) fica com o renderer padrão
+        if orjson is None or self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        
+        return orjson.dumps(data, default=_padrao, option=OPCOES_ORJSON)
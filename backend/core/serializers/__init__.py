@@ -3,3 +3,4 @@ from .estrutura_serializers import *
 from .credores_serializers import *
 from .contratos_serializers import *
 from .sistema_serializers import *
+from .conciliacao_serializers import *
@@ -0,0 +1,64 @@
+from rest_framework import serializers
+from core.models import ExtratoBancario, LancamentoExtrato, MovimentoFinanceiro
+
+
+class ExtratoBancarioSerializer(serializers.ModelSerializer):
+    """
+    Serializer para o modelo ExtratoBancario.
+    """
+    formato_display = serializers.ReadOnlyField(source='get_formato_display')
+    importado_por_nome = serializers.ReadOnlyField(source='importado_por.get_full_name')
+    
+    class Meta:
+        model = ExtratoBancario
+        fields = ['id', 'arquivo_nome', 'formato', 'formato_display', 'banco', 'conta',
+                  'data_inicio', 'data_fim', 'total_lancamentos', 'total_conciliados',
+                  'importado_por', 'importado_por_nome', 'data_importacao', 'data_conciliacao']
+        read_only_fields = fields
+
+
+class LancamentoExtratoSerializer(serializers.ModelSerializer):
+    """
+    Serializer para o modelo LancamentoExtrato.
+    """
+    class Meta:
+        model = LancamentoExtrato
+        fields = ['id', 'extrato', 'data', 'valor', 'descricao', 'documento',
+                  'movimento', 'conciliado_manualmente']
+        read_only_fields = ['extrato', 'data', 'valor', 'descricao', 'documento', 'conciliado_manualmente']
+    
+    def validate_movimento(self, value):
+        if value is None:
+            return value
+        if value.tipo not in ('entrada', 'saida'):
+            raise serializers.ValidationError('Só movimentos de entrada ou saída podem ser conciliados.')
+        vinculado = getattr(value, 'lancamento_extrato', None)
+        if vinculado is not None and vinculado.pk != self.instance.pk:
+            raise serializers.ValidationError('Este movimento já está conciliado com outro lançamento.')
+        return value
+
+
+class ImportacaoExtratoSerializer(serializers.Serializer):
+    """
+    Serializer para a importação de extrato bancário (OFX ou CSV).
+    """
+    arquivo = serializers.FileField()
+    banco = serializers.CharField(required=False, allow_blank=True, max_length=100)
+    conta = serializers.CharField(required=False, allow_blank=True, max_length=30)
+    conciliar = serializers.BooleanField(required=False, default=True)
+
+
+class ConciliacaoParametrosSerializer(serializers.Serializer):
+    """
+    Serializer para os parâmetros da conciliação automática.
+    """
+    janela = serializers.IntegerField(required=False, min_value=0, max_value=31)
+
+
+class MovimentoPendenteSerializer(serializers.ModelSerializer):
+    """
+    Serializer resumido dos movimentos ainda não conciliados.
+    """
+    class Meta:
+        model = MovimentoFinanceiro
+        fields = ['id', 'tipo', 'valor', 'data_movimento', 'descricao', 'contrato', 'parcela']
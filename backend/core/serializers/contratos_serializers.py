@@ -1,11 +1,13 @@
 from rest_framework import serializers
+from core.serializers.dinamicos import CamposDinamicosMixin
+from core.services.pagamentos import LIMITE_LOTE
 from core.models import (
     Contrato, ParcelaContrato, HistoricoProcesso, MovimentoFinanceiro
 )
 from core.serializers.credores_serializers import CredorSerializer, BolsistaSerializer
 
 
-class ParcelaContratoSerializer(serializers.ModelSerializer):
+class ParcelaContratoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo ParcelaContrato.
     """
@@ -15,7 +17,7 @@ class ParcelaContratoSerializer(serializers.ModelSerializer):
                   'data_pagamento', 'status', 'atividade_pagamento', 'observacao']
 
 
-class HistoricoProcessoSerializer(serializers.ModelSerializer):
+class HistoricoProcessoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo HistoricoProcesso.
     """
@@ -31,7 +33,7 @@ class HistoricoProcessoSerializer(serializers.ModelSerializer):
         read_only_fields = ['data_alteracao']
 
 
-class MovimentoFinanceiroSerializer(serializers.ModelSerializer):
+class MovimentoFinanceiroSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo MovimentoFinanceiro.
     """
@@ -49,44 +51,45 @@ class MovimentoFinanceiroSerializer(serializers.ModelSerializer):
                   'comprovante_url', 'usuario', 'usuario_nome']
 
 
-class ContratoSerializer(serializers.ModelSerializer):
+class ContratoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo Contrato.
     """
     tipo_display = serializers.ReadOnlyField(source='get_tipo_display')
     status_processo_display = serializers.ReadOnlyField(source='get_status_processo_display')
     setor_nome = serializers.ReadOnlyField(source='setor.nome')
-    programa_nome = serializers.ReadOnlyField(source='programa.nome')
     atividade_codigo = serializers.ReadOnlyField(source='atividade.codigo')
     rubrica_nome = serializers.ReadOnlyField(source='rubrica.nome')
     meta_codigo = serializers.ReadOnlyField(source='meta.codigo')
-    responsavel_nome = serializers.ReadOnlyField(source='responsavel.get_full_name')
     criado_por_nome = serializers.ReadOnlyField(source='criado_por.get_full_name')
     atualizado_por_nome = serializers.ReadOnlyField(source='atualizado_por.get_full_name')
+    data_criacao = serializers.DateTimeField(source='criado_em', read_only=True)
+    data_atualizacao = serializers.DateTimeField(source='atualizado_em', read_only=True)
     
     class Meta:
         model = Contrato
         fields = ['id', 'tipo', 'tipo_display', 'nome_curso_acao', 'status_processo', 
                   'status_processo_display', 'setor', 'setor_nome', 'programa', 
-                  'programa_nome', 'bolsista', 'credor', 'responsavel', 'responsavel_nome', 
+                  'bolsista', 'credor', 'responsavel', 
                   'data_inicio', 'data_fim', 'atividade', 'atividade_codigo', 'rubrica', 
                   'rubrica_nome', 'meta', 'meta_codigo', 'valor_total', 'quantidade_parcelas', 
                   'observacoes_parcela', 'total_pago', 'data_criacao', 'data_atualizacao', 
                   'criado_por', 'criado_por_nome', 'atualizado_por', 'atualizado_por_nome']
-        read_only_fields = ['data_criacao', 'data_atualizacao', 'total_pago']
+        read_only_fields = ['total_pago']
+        expansoes = {
+            'parcelas': (ParcelaContratoSerializer, {'many': True}),
+            'historicos': (HistoricoProcessoSerializer, {'many': True}),
+            'bolsista_detalhes': (BolsistaSerializer, {'source': 'bolsista'}),
+            'credor_detalhes': (CredorSerializer, {'source': 'credor'}),
+        }
 
 
 class ContratoDetalhadoSerializer(ContratoSerializer):
     """
     Serializer para o modelo Contrato com detalhes de parcelas e histórico.
     """
-    parcelas = ParcelaContratoSerializer(many=True, read_only=True)
-    historicos = HistoricoProcessoSerializer(many=True, read_only=True)
-    bolsista_detalhes = BolsistaSerializer(source='bolsista', read_only=True)
-    credor_detalhes = CredorSerializer(source='credor', read_only=True)
-    
     class Meta(ContratoSerializer.Meta):
-        fields = ContratoSerializer.Meta.fields + ['parcelas', 'historicos', 'bolsista_detalhes', 'credor_detalhes']
+        expandir_padrao = ['parcelas', 'historicos', 'bolsista_detalhes', 'credor_detalhes']
 
 
 class VerificacaoDisponibilidadeOrcamentariaSerializer(serializers.Serializer):
@@ -146,3 +149,37 @@ class VerificacaoDisponibilidadeOrcamentariaSerializer(serializers.Serializer):
             )
         
         return data
+
+
+class PagamentoLoteSerializer(serializers.Serializer):
+    """
+    Serializer para o pagamento de parcelas em lote.
+    """
+    parcelas = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=LIMITE_LOTE
+    )
+    data_pagamento = serializers.DateField(required=False)
+    atividade_pagamento = serializers.CharField(required=False, allow_blank=True)
+    observacao = serializers.CharField(required=False, allow_blank=True)
+
+
+class RemessaCnabSerializer(serializers.Serializer):
+    """
+    Serializer para a geração da remessa CNAB 240 das parcelas pendentes.
+    """
+    parcelas = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    data_ate = serializers.DateField(required=False)
+    data_pagamento = serializers.DateField(required=False)
+    reenviar = serializers.BooleanField(required=False, default=False)
+    
+    def validate(self, data):
+        if 'parcelas' not in data and 'data_ate' not in data:
+            raise serializers.ValidationError('Informe as parcelas ou a data limite (data_ate).')
+        return data
+
+
+class RetornoCnabSerializer(serializers.Serializer):
+    """
+    Serializer para o envio do arquivo de retorno CNAB 240.
+    """
+    arquivo = serializers.FileField()
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from core.serializers.dinamicos import CamposDinamicosMixin
 from core.models import Credor, Bolsista
 
 
-class CredorSerializer(serializers.ModelSerializer):
+class CredorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo Credor.
     """
@@ -12,7 +13,7 @@ class CredorSerializer(serializers.ModelSerializer):
                   'telefone', 'email', 'banco', 'agencia', 'conta', 'ativo']
 
 
-class BolsistaSerializer(serializers.ModelSerializer):
+class BolsistaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo Bolsista.
     """
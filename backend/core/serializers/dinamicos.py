@@ -0,0 +1,182 @@
+"""
+Campos dinâmicos para os serializers da API.
+
+- `?fields=id,nome_curso_acao,valor_total` limita as colunas da resposta;
+- `?expand=parcelas,historicos` inclui relações aninhadas declaradas em `Meta.expansoes`.
+
+`planejar_consulta` deriva do serializer já podado o `.only()`, o `select_related` e
+o `prefetch_related` necessários, para que o queryset busque só o que será serializado.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+PARAMETRO_CAMPOS = 'fields'
+PARAMETRO_EXPANSAO = 'expand'
+
+
+def _lista_parametro(request, nome):
+    if request is None or nome not in request.query_params:
+        return None
+    return [item.strip() for item in request.query_params[nome].split(',') if item.strip()]
+
+
+class CamposDinamicosMixin:
+    """
+    Mixin para ModelSerializers com `?fields=` e `?expand=`.
+    
+    Meta.expansoes: {nome: (SerializerClass ou caminho, {kwargs})} com as relações que podem ser
+    aninhadas sob demanda. Meta.expandir_padrao: expansões incluídas quando `?expand=`
+    não é informado (mantém o formato dos serializers *Detalhado).
+    
+    Só o serializer da linha principal lê os parâmetros; serializers aninhados usam
+    todos os seus campos. Em gravações (POST/PUT/PATCH), `?fields=` só recorta a
+    resposta: os campos de entrada continuam todos disponíveis para validação.
+    """
+    
+    def _e_raiz(self):
+        pai = self.parent
+        return pai is None or (isinstance(pai, serializers.ListSerializer) and pai.parent is None)
+    
+    def expansoes_solicitadas(self):
+        declaradas = getattr(self.Meta, 'expansoes', {})
+        solicitadas = _lista_parametro(self.context.get('request'), PARAMETRO_EXPANSAO) if self._e_raiz() else None
+        if solicitadas is None:
+            solicitadas = getattr(self.Meta, 'expandir_padrao', [])
+        return [nome for nome in declaradas if nome in solicitadas]
+    
+    def campos_solicitados(self):
+        return _lista_parametro(self.context.get('request'), PARAMETRO_CAMPOS) if self._e_raiz() else None
+    
+    def _gravacao(self):
+        request = self.context.get('request')
+        return request is not None and request.method not in SAFE_METHODS
+    
+    def get_fields(self):
+        campos = super().get_fields()
+        
+        expansoes = self.expansoes_solicitadas()
+        for nome in expansoes:
+            classe, opcoes = self.Meta.expansoes[nome]
+            if isinstance(classe, str):
+                classe = import_string(classe)
+            campos[nome] = classe(**{'read_only': True, **opcoes})
+        
+        solicitados = self.campos_solicitados()
+        if solicitados and not self._gravacao():
+            for nome in list(campos):
+                if nome not in solicitados and nome not in expansoes:
+                    del campos[nome]
+        
+        return campos
+    
+    def to_representation(self, instance):
+        dados = super().to_representation(instance)
+        solicitados = self.campos_solicitados() if self._gravacao() else None
+        if solicitados:
+            expansoes = self.expansoes_solicitadas()
+            for nome in list(dados):
+                if nome not in solicitados and nome not in expansoes:
+                    del dados[nome]
+        return dados
+
+
+def _serializer_linha(serializer):
+    return serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+
+
+def _campo_modelo(modelo, nome):
+    try:
+        return modelo._meta.get_field(nome)
+    except FieldDoesNotExist:
+        return None
+
+
+def planejar_consulta(queryset, serializer):
+    """
+    Aplica ao queryset o `.only()`, `select_related` e `prefetch_related` que os
+    campos do serializer exigem. Se algum campo depender de algo fora das colunas
+    (propriedades, métodos), o `.only()` é omitido e apenas os joins são planejados.
+    """
+    serializer = _serializer_linha(serializer)
+    modelo = queryset.model
+    anotacoes = queryset.query.annotations
+    
+    colunas = {modelo._meta.pk.name}
+    joins = set()
+    prefetches = []
+    podar = True
+    
+    for campo in serializer.fields.values():
+        if campo.write_only:
+            continue
+        if campo.source == '*' or isinstance(campo, serializers.SerializerMethodField):
+            podar = False
+            continue
+        
+        *relacoes, ultimo = campo.source_attrs
+        if not relacoes and ultimo in anotacoes:
+            continue
+        
+        atual = modelo
+        caminho = []
+        for nome in relacoes:
+            relacao = _campo_modelo(atual, nome)
+            if relacao is None or not relacao.concrete or not (relacao.many_to_one or relacao.one_to_one):
+                relacao = None
+                break
+            caminho.append(relacao.name)
+            atual = relacao.related_model
+        if relacoes and relacao is None:
+            podar = False
+            continue
+        
+        if caminho:
+            joins.add('__'.join(caminho))
+        prefixo = '__'.join(caminho + [''])
+        
+        aninhado = _serializer_linha(campo) if isinstance(campo, serializers.BaseSerializer) else None
+        if ultimo.startswith('get_') and ultimo.endswith('_display'):
+            nome_modelo = ultimo[4:-8]
+        elif ultimo == 'get_full_name':
+            colunas.update({prefixo + 'first_name', prefixo + 'last_name'})
+            continue
+        else:
+            nome_modelo = ultimo
+        
+        campo_modelo = _campo_modelo(atual, nome_modelo)
+        if campo_modelo is None:
+            podar = False
+            continue
+        
+        if campo_modelo.is_relation and (campo_modelo.one_to_many or campo_modelo.many_to_many
+                                         or (campo_modelo.one_to_one and not campo_modelo.concrete)):
+            # Relação reversa ou M2M: prefetch com o queryset planejado pelo serializer aninhado
+            consulta = campo_modelo.related_model._default_manager.all()
+            if aninhado is not None:
+                consulta = planejar_consulta(consulta, aninhado)
+                if campo_modelo.one_to_many or campo_modelo.one_to_one:
+                    # O prefetch precisa da FK de volta para associar as linhas ao pai
+                    imediatos, adiar = consulta.query.deferred_loading
+                    if imediatos and not adiar:
+                        consulta = consulta.only(*imediatos, campo_modelo.field.name)
+            prefetches.append(Prefetch(prefixo + campo_modelo.name, queryset=consulta))
+            continue
+        
+        if campo_modelo.is_relation and aninhado is not None:
+            joins.add(prefixo + campo_modelo.name)
+            continue
+        
+        colunas.add(prefixo + campo_modelo.name)
+    
+    if joins:
+        queryset = queryset.select_related(*sorted(joins))
+        # Com select_related, o .only() precisa listar as FKs atravessadas
+        colunas.update(joins)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    if podar:
+        queryset = queryset.only(*sorted(colunas))
+    return queryset
@@ -1,11 +1,12 @@
 from rest_framework import serializers
+from core.serializers.dinamicos import CamposDinamicosMixin
 from core.models import (
     Setor, Programa, FonteRecurso, Meta, Atividade, 
     Rubrica, AlocacaoRecurso, TransferenciaRecurso
 )
 
 
-class SetorSerializer(serializers.ModelSerializer):
+class SetorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo Setor.
     """
@@ -16,7 +17,7 @@ class SetorSerializer(serializers.ModelSerializer):
         fields = ['id', 'nome', 'descricao', 'responsavel', 'responsavel_nome', 'ativo']
 
 
-class ProgramaSerializer(serializers.ModelSerializer):
+class ProgramaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo Programa.
     """
@@ -25,16 +26,19 @@ class ProgramaSerializer(serializers.ModelSerializer):
         fields = ['id', 'nome', 'descricao', 'data_inicio', 'data_fim', 'ativo']
 
 
-class FonteRecursoSerializer(serializers.ModelSerializer):
+class FonteRecursoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo FonteRecurso.
     """
     class Meta:
         model = FonteRecurso
         fields = ['id', 'nome', 'descricao', 'valor_total', 'data_inicio', 'data_fim', 'ativo']
+        expansoes = {
+            'metas': ('core.serializers.estrutura_serializers.MetaSerializer', {'many': True}),
+        }
 
 
-class MetaSerializer(serializers.ModelSerializer):
+class MetaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo Meta.
     """
@@ -43,9 +47,12 @@ class MetaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Meta
         fields = ['id', 'fonte_recurso', 'fonte_recurso_nome', 'codigo', 'descricao', 'valor_previsto', 'ativo']
+        expansoes = {
+            'atividades': ('core.serializers.estrutura_serializers.AtividadeSerializer', {'many': True}),
+        }
 
 
-class AtividadeSerializer(serializers.ModelSerializer):
+class AtividadeSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo Atividade.
     """
@@ -54,9 +61,12 @@ class AtividadeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Atividade
         fields = ['id', 'meta', 'meta_codigo', 'codigo', 'descricao', 'valor_previsto', 'ativo']
+        expansoes = {
+            'rubricas': ('core.serializers.estrutura_serializers.RubricaSerializer', {'many': True}),
+        }
 
 
-class RubricaSerializer(serializers.ModelSerializer):
+class RubricaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo Rubrica.
     """
@@ -67,7 +77,7 @@ class RubricaSerializer(serializers.ModelSerializer):
         fields = ['id', 'atividade', 'atividade_codigo', 'nome', 'descricao', 'valor_previsto', 'ativo']
 
 
-class AlocacaoRecursoSerializer(serializers.ModelSerializer):
+class AlocacaoRecursoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo AlocacaoRecurso.
     """
@@ -82,7 +92,7 @@ class AlocacaoRecursoSerializer(serializers.ModelSerializer):
         read_only_fields = ['data_alocacao']
 
 
-class TransferenciaRecursoSerializer(serializers.ModelSerializer):
+class TransferenciaRecursoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para o modelo TransferenciaRecurso.
     """
@@ -103,27 +113,21 @@ class MetaDetalhadaSerializer(MetaSerializer):
     """
     Serializer para o modelo Meta com detalhes de atividades.
     """
-    atividades = AtividadeSerializer(many=True, read_only=True)
-    
     class Meta(MetaSerializer.Meta):
-        fields = MetaSerializer.Meta.fields + ['atividades']
+        expandir_padrao = ['atividades']
 
 
 class FonteRecursoDetalhadaSerializer(FonteRecursoSerializer):
     """
     Serializer para o modelo FonteRecurso com detalhes de metas.
     """
-    metas = MetaSerializer(many=True, read_only=True)
-    
     class Meta(FonteRecursoSerializer.Meta):
-        fields = FonteRecursoSerializer.Meta.fields + ['metas']
+        expandir_padrao = ['metas']
 
 
 class AtividadeDetalhadaSerializer(AtividadeSerializer):
     """
     Serializer para o modelo Atividade com detalhes de rubricas.
     """
-    rubricas = RubricaSerializer(many=True, read_only=True)
-    
     class Meta(AtividadeSerializer.Meta):
-        fields = AtividadeSerializer.Meta.fields + ['rubricas']
+        expandir_padrao = ['rubricas']
@@ -0,0 +1,196 @@
+"""
+Caminho rápido de leitura para listagens.
+
+Em vez de instanciar o modelo e percorrer os campos do serializer linha a linha, o
+plano de leitura é derivado uma única vez do ModelSerializer: cada campo vira uma
+coluna de `values_list()` e uma função que produz o mesmo valor que o DRF produziria
+(displays de choices por dicionário pré-calculado, `fk.atributo` por join e
+`get_full_name` a partir de first_name/last_name). Campos que não podem ser mapeados
+(métodos, serializers aninhados, arquivos, propriedades) desativam o caminho rápido
+para aquele serializer, e a view segue o fluxo padrão.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.encoding import force_str
+from rest_framework import serializers
+
+# Sinaliza campos omitidos da saída, como o DRF faz (SkipField) quando um campo
+# somente leitura atravessa uma FK nula
+OMITIR = object()
+
+# Tipos de campo cujo valor depende de mais do que a coluna (request, outros objetos)
+CAMPOS_NAO_SUPORTADOS = (
+    serializers.BaseSerializer,
+    serializers.ManyRelatedField,
+    serializers.SerializerMethodField,
+    serializers.FileField,
+    serializers.HyperlinkedRelatedField,
+    serializers.SlugRelatedField,
+    serializers.StringRelatedField,
+)
+
+_planos = {}
+# Combinações de ?fields= vêm do cliente; o cache não cresce além disso
+LIMITE_PLANOS = 512
+
+
+class PlanoLeitura:
+    """
+    Colunas de `values_list()` e extratores, na ordem dos campos do serializer.
+    """
+    
+    def __init__(self, colunas, extratores):
+        self.colunas = colunas
+        self.extratores = extratores
+    
+    def aplicar(self, queryset):
+        # prefetch_related não se aplica a tuplas e select_related é ignorado por values_list
+        return queryset.prefetch_related(None).values_list(*self.colunas)
+    
+    def serializar(self, linhas):
+        extratores = self.extratores
+        resultado = []
+        for linha in linhas:
+            item = {}
+            for nome, extrair in extratores:
+                valor = extrair(linha)
+                if valor is not OMITIR:
+                    item[nome] = valor
+            resultado.append(item)
+        return resultado
+
+
+def _campo_modelo(modelo, nome):
+    try:
+        return modelo._meta.get_field(nome)
+    except FieldDoesNotExist:
+        return None
+
+
+def _representacao(campo):
+    if isinstance(campo, serializers.PrimaryKeyRelatedField):
+        # values_list já devolve a chave; o DRF só a repassa (ou ao pk_field)
+        return campo.pk_field.to_representation if campo.pk_field is not None else None
+    if isinstance(campo, serializers.ReadOnlyField):
+        return None
+    return campo.to_representation
+
+
+def _extrator(campo, modelo, coluna):
+    """
+    Monta a função que extrai o valor do campo de uma linha de `values_list()`.
+    Retorna None quando o campo não pode ser resolvido só com colunas.
+    """
+    if campo.source == '*' or isinstance(campo, CAMPOS_NAO_SUPORTADOS):
+        return None
+    
+    *relacoes, ultimo = campo.source_attrs
+    atual = modelo
+    caminho = []
+    checagens = []
+    
+    for nome in relacoes:
+        relacao = _campo_modelo(atual, nome)
+        if relacao is None or not relacao.concrete or not (relacao.many_to_one or relacao.one_to_one):
+            return None
+        caminho.append(relacao.name)
+        if relacao.null:
+            # Campo gravável sobre FK nula gera erro no DRF, não omissão; não há equivalente aqui
+            if campo.required:
+                return None
+            checagens.append(coluna('__'.join(caminho)))
+        atual = relacao.related_model
+    
+    prefixo = '__'.join(caminho + [''])
+    
+    if ultimo.startswith('get_') and ultimo.endswith('_display'):
+        campo_modelo = _campo_modelo(atual, ultimo[4:-8])
+        if campo_modelo is None or not campo_modelo.choices:
+            return None
+        indice = coluna(prefixo + campo_modelo.name)
+        rotulos = dict(campo_modelo.flatchoices)
+        
+        def valor(linha):
+            bruto = linha[indice]
+            return force_str(rotulos.get(bruto, bruto), strings_only=True)
+    
+    elif ultimo == 'get_full_name':
+        if _campo_modelo(atual, 'first_name') is None or _campo_modelo(atual, 'last_name') is None:
+            return None
+        primeiro, sobrenome = coluna(prefixo + 'first_name'), coluna(prefixo + 'last_name')
+        
+        def valor(linha):
+            return f'{linha[primeiro]} {linha[sobrenome]}'.strip()
+    
+    else:
+        campo_modelo = _campo_modelo(atual, ultimo)
+        if campo_modelo is None or not campo_modelo.concrete or campo_modelo.many_to_many:
+            return None
+        if campo_modelo.is_relation and not isinstance(campo, serializers.PrimaryKeyRelatedField):
+            return None
+        indice = coluna(prefixo + campo_modelo.name)
+        
+        def valor(linha):
+            return linha[indice]
+    
+    representar = _representacao(campo)
+    
+    def extrair(linha):
+        for indice_fk in checagens:
+            if linha[indice_fk] is None:
+                return OMITIR
+        bruto = valor(linha)
+        if bruto is None or representar is None:
+            return bruto
+        return representar(bruto)
+    
+    return extrair
+
+
+def plano_leitura(serializer_class, campos=None):
+    """
+    Retorna o PlanoLeitura do serializer (memorizado por classe e seleção de campos)
+    ou None se algum campo exigir a serialização completa. `campos` restringe o plano
+    aos nomes informados (`?fields=`), na ordem do serializer.
+    """
+    chave = (serializer_class, campos)
+    if chave in _planos:
+        return _planos[chave]
+    
+    plano = None
+    modelo = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+    
+    if modelo is not None:
+        colunas = []
+        indices = {}
+        
+        def coluna(lookup):
+            if lookup not in indices:
+                indices[lookup] = len(colunas)
+                colunas.append(lookup)
+            return indices[lookup]
+        
+        todos = serializer_class().fields
+        if campos is None:
+            selecionados = list(todos.items())
+        elif all(nome in todos for nome in campos):
+            selecionados = [(nome, campo) for nome, campo in todos.items() if nome in campos]
+        else:
+            # Expansões fora dos campos padrão: segue a serialização completa
+            selecionados = None
+        
+        extratores = [] if selecionados is not None else None
+        for nome, campo in selecionados or []:
+            if campo.write_only:
+                continue
+            extrair = _extrator(campo, modelo, coluna)
+            if extrair is None:
+                extratores = None
+                break
+            extratores.append((nome, extrair))
+        
+        if extratores is not None:
+            plano = PlanoLeitura(colunas, extratores)
+    
+    if len(_planos) < LIMITE_PLANOS:
+        _planos[chave] = plano
+    return plano
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from core.models import (
     ConfiguracaoSistema, Notificacao, RelatorioGerado, ProjecaoOrcamentaria
@@ -54,9 +55,38 @@ class ProjecaoOrcamentariaSerializer(serializers.ModelSerializer):
         model = ProjecaoOrcamentaria
         fields = ['id', 'setor', 'setor_nome', 'fonte_recurso', 'fonte_recurso_nome', 
                   'rubrica', 'rubrica_nome', 'mes_referencia', 'valor_previsto', 
-                  'valor_realizado', 'observacao', 'criado_por', 'criado_por_nome', 
+                  'valor_realizado', 'valor_pendente', 'observacao', 'criado_por', 'criado_por_nome', 
                   'data_criacao', 'data_atualizacao']
-        read_only_fields = ['data_criacao', 'data_atualizacao']
+        read_only_fields = ['valor_pendente', 'data_criacao', 'data_atualizacao']
+
+
+class ProjecaoParametrosSerializer(serializers.Serializer):
+    """
+    Serializer para os parâmetros de cálculo e de relatório das projeções.
+    """
+    inicio = serializers.DateField(required=False)
+    meses = serializers.IntegerField(required=False, min_value=1, max_value=settings.PROJECAO_HORIZONTE_MAXIMO)
+    setor = serializers.IntegerField(required=False)
+    fonte_recurso = serializers.IntegerField(required=False)
+    rubrica = serializers.IntegerField(required=False)
+
+
+class SerieParametrosSerializer(serializers.Serializer):
+    """
+    Serializer para os parâmetros das séries temporais do dashboard.
+    """
+    METRICAS = ['contratado', 'contratos', 'pago', 'entradas', 'saidas', 'saldo']
+    
+    metrica = serializers.ChoiceField(choices=METRICAS)
+    granularidade = serializers.ChoiceField(choices=['dia', 'semana', 'mes', 'trimestre', 'ano'], default='mes')
+    inicio = serializers.DateField(required=False)
+    fim = serializers.DateField(required=False)
+    agrupamento = serializers.ChoiceField(choices=['setor', 'fonte', 'rubrica', 'tipo'], required=False)
+    
+    def validate(self, data):
+        if data.get('inicio') and data.get('fim') and data['inicio'] > data['fim']:
+            raise serializers.ValidationError('A data inicial deve ser anterior à final.')
+        return data
 
 
 class DashboardResumoSerializer(serializers.Serializer):
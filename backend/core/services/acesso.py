@@ -0,0 +1,97 @@
+"""
+Escopo de dados por usuário (Perfil.nivel_acesso e Perfil.setor).
+
+O ContextoAcesso é montado uma vez por requisição, com no máximo uma consulta ao
+perfil, e guardado na própria requisição; viewsets e dashboards filtram por ele em
+vez de consultar o perfil a cada queryset. Administradores (perfil 'admin' ou
+superusuário) veem tudo; os níveis em ACESSO_NIVEIS_POR_SETOR veem só o próprio
+setor; usuários sem perfil que não sejam da equipe não veem dados de setor.
+"""
+from django.conf import settings
+from django.db.models import Q
+
+from core.models import Perfil
+
+
+def chave_setores(setores):
+    """
+    Identificação de um conjunto de setores para chaves de cache (None = todos).
+    """
+    if setores is None:
+        return 'todos'
+    return 's' + '-'.join(map(str, sorted(setores))) if setores else 'nenhum'
+
+
+class ContextoAcesso:
+    """
+    Setores visíveis para o usuário da requisição (`setores` None = todos).
+    """
+    
+    def __init__(self, usuario_id=None, nivel_acesso=None, setor_id=None, irrestrito=False):
+        self.usuario_id = usuario_id
+        self.nivel_acesso = nivel_acesso
+        self.setor_id = setor_id
+        if irrestrito or nivel_acesso == 'admin':
+            self.setores = None
+        elif nivel_acesso in settings.ACESSO_NIVEIS_POR_SETOR or nivel_acesso is None:
+            self.setores = frozenset([setor_id]) if setor_id is not None else frozenset()
+        else:
+            self.setores = None
+    
+    @classmethod
+    def do_usuario(cls, usuario):
+        if usuario is None or not usuario.is_authenticated:
+            return cls()
+        
+        # Perfil já carregado (select_related ou retrato da autenticação) evita a consulta;
+        # None no cache da relação indica usuário sem perfil
+        cache_relacoes = usuario._state.fields_cache if hasattr(usuario, '_state') else {}
+        if 'perfil' in cache_relacoes:
+            perfil = cache_relacoes['perfil']
+            dados = (perfil.nivel_acesso, perfil.setor_id) if perfil is not None else None
+        else:
+            dados = Perfil.objects.filter(usuario_id=usuario.pk).values_list('nivel_acesso', 'setor_id').first()
+        
+        if dados is None:
+            return cls(usuario.pk, irrestrito=usuario.is_superuser or usuario.is_staff)
+        nivel_acesso, setor_id = dados
+        return cls(usuario.pk, nivel_acesso, setor_id, irrestrito=usuario.is_superuser)
+    
+    @property
+    def irrestrito(self):
+        return self.setores is None
+    
+    @property
+    def chave(self):
+        """
+        Identificação do escopo para chaves de cache ('todos' ou os ids dos setores).
+        """
+        return chave_setores(self.setores)
+    
+    def filtrar(self, queryset, *campos):
+        """
+        Restringe o queryset aos setores visíveis. `campos` são os caminhos até o setor
+        (padrão 'setor'); com mais de um, basta um deles estar no escopo.
+        """
+        if self.setores is None:
+            return queryset
+        condicao = Q()
+        for campo in campos or ('setor',):
+            condicao |= Q(**{f'{campo}__in': self.setores})
+        return queryset.filter(condicao)
+    
+    def permite(self, setor_id):
+        return self.setores is None or setor_id in self.setores
+
+
+def contexto_acesso(request):
+    """
+    ContextoAcesso do usuário da requisição, calculado uma vez e guardado na requisição
+    (na HttpRequest subjacente, para valer também fora da view do DRF).
+    """
+    base = getattr(request, '_request', request)
+    contexto = getattr(base, '_contexto_acesso', None)
+    if contexto is None or contexto.usuario_id != getattr(request.user, 'pk', None):
+        contexto = ContextoAcesso.do_usuario(request.user)
+        base._contexto_acesso = contexto
+    return contexto
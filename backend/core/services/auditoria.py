@@ -0,0 +1,233 @@
+"""
+Trilha de auditoria automática para RegistroAuditoria.
+
+O estado carregado de cada instância auditada é guardado em post_init, e a
+diferença é calculada em pre_save a partir desse estado, sem SELECT extra.
+Os registros são acumulados em um buffer por requisição (ou por bloco
+`contexto_auditoria`) e gravados com um único bulk_create no final; registros de
+transações desfeitas não chegam ao buffer.
+
+Todo registro precisa de um usuário. Sem usuário autenticado (requisições anônimas,
+`contexto_auditoria()` sem usuário), o buffer usa o usuário de sistema configurado em
+AUDITORIA_USUARIO_SISTEMA (username); sem ele, os registros são descartados com um
+aviso no log. Gravações fora de qualquer buffer (comandos e scripts que não abrem
+`contexto_auditoria`) não são auditadas.
+"""
+import contextvars
+import logging
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+
+logger = logging.getLogger('core')
+
+_buffer_atual = contextvars.ContextVar('auditoria_buffer', default=None)
+_encoder = DjangoJSONEncoder()
+
+# Modelo -> tupla de attnames auditados, preenchido por registrar_modelos()
+_campos_por_modelo = {}
+
+
+def _serializar(valor):
+    if valor is None or isinstance(valor, (str, int, float, bool, dict, list)):
+        return valor
+    try:
+        return _encoder.default(valor)
+    except TypeError:
+        return str(valor)
+
+
+def _estado(instance):
+    dados = instance.__dict__
+    return {campo: dados[campo] for campo in _campos_por_modelo[type(instance)] if campo in dados}
+
+
+def _capturar_estado(sender, instance, **kwargs):
+    instance._auditoria_estado = _estado(instance)
+
+
+def _calcular_diferenca(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    
+    antigo = getattr(instance, '_auditoria_estado', None)
+    if antigo is None:
+        return
+    
+    dados = instance.__dict__
+    antes, depois = {}, {}
+    for campo, valor in antigo.items():
+        novo = dados.get(campo, valor)
+        if novo != valor:
+            antes[campo] = _serializar(valor)
+            depois[campo] = _serializar(novo)
+    
+    instance._auditoria_diferenca = (antes, depois)
+
+
+def _registrar_gravacao(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    
+    if created:
+        acao, antes = 'criar', None
+        depois = {campo: _serializar(valor) for campo, valor in _estado(instance).items()}
+    else:
+        antes, depois = instance.__dict__.pop('_auditoria_diferenca', (None, None))
+        if not depois:
+            return
+        acao = 'alterar'
+    
+    # O estado gravado passa a ser a nova referência para o próximo save()
+    instance._auditoria_estado = _estado(instance)
+    _enfileirar(sender, instance.pk, acao, antes, depois)
+
+
+def _registrar_exclusao(sender, instance, **kwargs):
+    antes = {campo: _serializar(valor) for campo, valor in _estado(instance).items()}
+    _enfileirar(sender, instance.pk, 'excluir', antes, None)
+
+
+def _enfileirar(modelo, registro_id, acao, antes, depois):
+    buffer = _buffer_atual.get()
+    if buffer is None:
+        return
+    
+    RegistroAuditoria = apps.get_model('core', 'RegistroAuditoria')
+    registro = RegistroAuditoria(
+        acao=acao,
+        tabela_afetada=modelo._meta.db_table,
+        registro_id=registro_id,
+        dados_antigos=antes,
+        dados_novos=depois,
+    )
+    
+    # Só entra no buffer se a transação for confirmada; fora de atomic() executa na hora
+    transaction.on_commit(lambda: buffer.registros.append(registro))
+
+
+def registrar_alteracoes(modelo, alteracoes):
+    """
+    Enfileira registros de alteração para gravações feitas sem save() (QuerySet.update),
+    que não disparam os sinais. `alteracoes` é uma sequência de (pk, antes, depois),
+    com `antes` e `depois` como dicionários campo -> valor.
+    """
+    if modelo not in _campos_por_modelo:
+        return
+    
+    for registro_id, antes, depois in alteracoes:
+        _enfileirar(
+            modelo, registro_id, 'alterar',
+            {campo: _serializar(valor) for campo, valor in antes.items()},
+            {campo: _serializar(valor) for campo, valor in depois.items()},
+        )
+
+
+def usuario_sistema():
+    """
+    Usuário de AUDITORIA_USUARIO_SISTEMA, a quem são atribuídos os registros gravados sem
+    usuário autenticado. Retorna None se não houver configuração ou o usuário não existir.
+    """
+    username = getattr(settings, 'AUDITORIA_USUARIO_SISTEMA', None)
+    if not username:
+        return None
+    
+    usuario = apps.get_model('core', 'Usuario').objects.filter(username=username).first()
+    if usuario is None:
+        logger.warning('Auditoria: usuário de sistema %s não encontrado', username)
+    return usuario
+
+
+class BufferAuditoria:
+    """
+    Acumula registros de auditoria e os grava de uma vez.
+    """
+    
+    def __init__(self, request=None, usuario=None):
+        self.request = request
+        self.usuario = usuario
+        self.registros = []
+    
+    def _usuario(self):
+        if self.usuario is not None:
+            return self.usuario
+        
+        # O DRF autentica dentro da view e repassa o usuário para a HttpRequest
+        usuario = getattr(self.request, 'user', None)
+        if usuario is not None and usuario.is_authenticated:
+            return usuario
+        return usuario_sistema()
+    
+    def _ip_origem(self):
+        if self.request is None:
+            return None
+        
+        encaminhado = self.request.META.get('HTTP_X_FORWARDED_FOR')
+        if encaminhado:
+            return encaminhado.split(',')[0].strip()
+        return self.request.META.get('REMOTE_ADDR')
+    
+    def descarregar(self):
+        registros, self.registros = self.registros, []
+        if not registros:
+            return
+        
+        usuario = self._usuario()
+        if usuario is None:
+            logger.warning(
+                'Auditoria: %s registros descartados por falta de usuário autenticado '
+                '(configure AUDITORIA_USUARIO_SISTEMA)', len(registros)
+            )
+            return
+        
+        ip_origem = self._ip_origem()
+        for registro in registros:
+            registro.usuario_id = usuario.pk
+            registro.ip_origem = ip_origem
+        
+        RegistroAuditoria = apps.get_model('core', 'RegistroAuditoria')
+        RegistroAuditoria.objects.bulk_create(registros)
+
+
+@contextmanager
+def contexto_auditoria(usuario=None, request=None):
+    """
+    Ativa a captura de auditoria fora do ciclo de requisição (comandos, scripts).
+    
+        with contexto_auditoria(usuario):
+            contrato.save()
+    """
+    buffer = BufferAuditoria(request=request, usuario=usuario)
+    token = _buffer_atual.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _buffer_atual.reset(token)
+        buffer.descarregar()
+
+
+def registrar_modelos():
+    """
+    Conecta os sinais de auditoria aos modelos configurados em AUDITORIA_MODELOS.
+    """
+    for rotulo, opcoes in getattr(settings, 'AUDITORIA_MODELOS', {}).items():
+        try:
+            modelo = apps.get_model(rotulo)
+        except LookupError:
+            logger.warning('Auditoria: modelo %s não encontrado', rotulo)
+            continue
+        
+        excluir = set(opcoes.get('excluir', ()))
+        _campos_por_modelo[modelo] = tuple(
+            campo.attname for campo in modelo._meta.concrete_fields
+            if campo.name not in excluir and campo.attname not in excluir
+        )
+        
+        post_init.connect(_capturar_estado, sender=modelo, dispatch_uid=f'auditoria_init_{rotulo}')
+        pre_save.connect(_calcular_diferenca, sender=modelo, dispatch_uid=f'auditoria_pre_save_{rotulo}')
+        post_save.connect(_registrar_gravacao, sender=modelo, dispatch_uid=f'auditoria_post_save_{rotulo}')
+        post_delete.connect(_registrar_exclusao, sender=modelo, dispatch_uid=f'auditoria_delete_{rotulo}')
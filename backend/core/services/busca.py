@@ -0,0 +1,301 @@
+"""
+Busca textual indexada para contratos, bolsistas e credores.
+
+- PostgreSQL: coluna `busca_vetor` (SearchVectorField) mantida por trigger, índice GIN
+  e configuração `pt_unaccent` (português sem acentos).
+- SQLite: tabelas virtuais FTS5 mantidas por triggers, com remoção de diacríticos.
+- Outros bancos (ou SQLite sem FTS5): `icontains` nos mesmos campos.
+
+As estruturas são criadas após o migrate (sinal post_migrate) e podem ser
+reconstruídas com o comando `configurar_busca --reconstruir`.
+"""
+import logging
+import re
+
+from django.apps import apps
+from django.db import connections, DEFAULT_DB_ALIAS, DatabaseError
+from django.db.models import Q, F, Func, Value, FloatField, IntegerField
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger('core')
+
+CONFIGURACAO_PG = 'pt_unaccent'
+
+# Campos indexados por entidade: (campo, peso). Campos de documento (CPF/CNPJ)
+# também são indexados só com dígitos, para aceitar busca com ou sem pontuação.
+INDICES = {
+    'contrato': {
+        'modelo': 'core.Contrato',
+        'campos': [('nome_curso_acao', 'A'), ('responsavel', 'B'), ('observacoes_parcela', 'C')],
+        'documentos': [],
+    },
+    'bolsista': {
+        'modelo': 'core.Bolsista',
+        'campos': [('nome', 'A'), ('cpf', 'A')],
+        'documentos': ['cpf'],
+    },
+    'credor': {
+        'modelo': 'core.Credor',
+        'campos': [('razao_social', 'A'), ('nome_fantasia', 'A'), ('cnpj', 'A')],
+        'documentos': ['cnpj'],
+    },
+}
+
+PESOS_FTS = {'A': 10.0, 'B': 5.0, 'C': 1.0}
+
+_fts_disponivel = {}
+
+
+def _indice_do_modelo(modelo):
+    rotulo = modelo._meta.label
+    for nome, indice in INDICES.items():
+        if indice['modelo'] == rotulo:
+            return nome, indice
+    raise ValueError(f'Modelo {rotulo} não possui índice de busca.')
+
+
+def _tokens(termo):
+    """
+    Quebra o termo em palavras; CPF/CNPJ digitados com pontuação viram um único token numérico.
+    """
+    termo = re.sub(r'(?<=\d)[.\-/](?=\d)', '', termo)
+    return re.findall(r'\w+', termo)
+
+
+# ---------------------------------------------------------------------------
+# Consulta
+# ---------------------------------------------------------------------------
+
+def buscar(queryset, termo, ordenar=True):
+    """
+    Filtra o queryset pelo termo usando o índice textual do modelo e anota `relevancia`.
+    Com `ordenar=True`, ordena do resultado mais relevante para o menos relevante.
+    """
+    tokens = _tokens(termo or '')
+    if not tokens:
+        return queryset
+    
+    nome, indice = _indice_do_modelo(queryset.model)
+    conexao = connections[queryset.db]
+    
+    if conexao.vendor == 'postgresql':
+        queryset = _buscar_postgresql(queryset, tokens)
+    elif conexao.vendor == 'sqlite' and _tabela_fts_existe(conexao, nome):
+        queryset = _buscar_sqlite(queryset, conexao, nome, indice, tokens)
+    else:
+        queryset = _buscar_icontains(queryset, indice, tokens)
+    
+    return queryset.order_by('-relevancia') if ordenar else queryset
+
+
+def _buscar_postgresql(queryset, tokens):
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+    
+    # Prefixo em cada palavra para acompanhar a digitação ("mar" encontra "Maria")
+    consulta = SearchQuery(
+        ' & '.join(f'{token}:*' for token in tokens),
+        config=CONFIGURACAO_PG,
+        search_type='raw'
+    )
+    return queryset.filter(busca_vetor=consulta).annotate(
+        relevancia=SearchRank(F('busca_vetor'), consulta)
+    )
+
+
+def _buscar_sqlite(queryset, conexao, nome, indice, tokens):
+    """
+    Filtra pela tabela FTS5 com uma subconsulta (sem limite de resultados) e anota a
+    relevância com o bm25 de cada linha, calculado só para as linhas encontradas.
+    """
+    expressao = ' '.join(f'"{token}"*' for token in tokens)
+    pesos = ', '.join(str(PESOS_FTS[peso]) for _, peso in _colunas_fts(indice))
+    fts = f'busca_{nome}'
+    
+    encontrados = RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [expressao])
+    # Subconsulta correlacionada pelo pk (resolvido pelo ORM, o que respeita aliases em
+    # subconsultas). bm25 é menor para os mais relevantes: o sinal invertido faz
+    # '-relevancia' ordenar igual ao PostgreSQL
+    relevancia = Func(
+        F('pk'), Value(expressao),
+        template=f'(SELECT -bm25({fts}, {pesos}) FROM {fts} WHERE {fts}.rowid = %(expressions)s)',
+        arg_joiner=f' AND {fts} MATCH ',
+        output_field=FloatField()
+    )
+    return queryset.filter(pk__in=encontrados).annotate(relevancia=relevancia)
+
+
+def _buscar_icontains(queryset, indice, tokens):
+    condicao = Q()
+    for token in tokens:
+        por_token = Q()
+        for campo, _ in indice['campos']:
+            por_token |= Q(**{f'{campo}__icontains': token})
+        condicao &= por_token
+    
+    return queryset.filter(condicao).annotate(relevancia=Value(0, output_field=IntegerField()))
+
+
+# ---------------------------------------------------------------------------
+# Criação e manutenção dos índices
+# ---------------------------------------------------------------------------
+
+def _colunas_fts(indice):
+    colunas = list(indice['campos'])
+    colunas += [(f'{campo}_digitos', 'A') for campo in indice['documentos']]
+    return colunas
+
+
+def _tabela_fts_existe(conexao, nome):
+    chave = (conexao.alias, nome)
+    if chave not in _fts_disponivel:
+        _fts_disponivel[chave] = _estrutura_existe(conexao, nome, INDICES[nome])
+    return _fts_disponivel[chave]
+
+
+def _estrutura_existe(conexao, nome, indice):
+    """
+    Indica se a estrutura de busca da entidade já foi criada (tabela FTS5 no SQLite,
+    trigger do vetor no PostgreSQL).
+    """
+    if conexao.vendor == 'postgresql':
+        tabela = apps.get_model(indice['modelo'])._meta.db_table
+        consulta, parametros = "SELECT 1 FROM pg_trigger WHERE tgname = %s", [f'{tabela}_busca_vetor_trg']
+    else:
+        consulta, parametros = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [f'busca_{nome}']
+    with conexao.cursor() as cursor:
+        cursor.execute(consulta, parametros)
+        return cursor.fetchone() is not None
+
+
+def _sql_postgresql(nome, indice):
+    tabela = apps.get_model(indice['modelo'])._meta.db_table
+    colunas = ', '.join(campo for campo, _ in indice['campos'])
+    
+    partes = [
+        f"setweight(to_tsvector('{CONFIGURACAO_PG}', coalesce(NEW.{campo}, '')), '{peso}')"
+        for campo, peso in indice['campos']
+    ]
+    partes += [
+        f"to_tsvector('simple', regexp_replace(coalesce(NEW.{campo}, ''), '\\D', '', 'g'))"
+        for campo in indice['documentos']
+    ]
+    expressao = ' || '.join(partes)
+    
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION {tabela}_busca_vetor() RETURNS trigger AS $$
+        BEGIN
+            NEW.busca_vetor := {expressao};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"DROP TRIGGER IF EXISTS {tabela}_busca_vetor_trg ON {tabela}",
+        f"""
+        CREATE TRIGGER {tabela}_busca_vetor_trg BEFORE INSERT OR UPDATE OF {colunas} ON {tabela}
+        FOR EACH ROW EXECUTE FUNCTION {tabela}_busca_vetor()
+        """,
+        f"CREATE INDEX IF NOT EXISTS {tabela}_busca_gin ON {tabela} USING gin (busca_vetor)",
+    ]
+
+
+def _sql_sqlite(nome, indice):
+    tabela = apps.get_model(indice['modelo'])._meta.db_table
+    fts = f'busca_{nome}'
+    colunas = [coluna for coluna, _ in _colunas_fts(indice)]
+    
+    valores = [f'new.{campo}' for campo, _ in indice['campos']]
+    valores += [
+        f"replace(replace(replace(new.{campo}, '.', ''), '-', ''), '/', '')"
+        for campo in indice['documentos']
+    ]
+    inserir = (
+        f"INSERT INTO {fts}(rowid, {', '.join(colunas)}) "
+        f"VALUES (new.id, {', '.join(valores)});"
+    )
+    
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{', '.join(colunas)}, tokenize = 'unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {tabela}_busca_ai AFTER INSERT ON {tabela} BEGIN {inserir} END",
+        f"CREATE TRIGGER IF NOT EXISTS {tabela}_busca_ad AFTER DELETE ON {tabela} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = old.id; END",
+        f"CREATE TRIGGER IF NOT EXISTS {tabela}_busca_au AFTER UPDATE OF "
+        f"{', '.join(campo for campo, _ in indice['campos'])} ON {tabela} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = old.id; {inserir} END",
+    ]
+
+
+def _sql_reconstruir(conexao, nome, indice):
+    tabela = apps.get_model(indice['modelo'])._meta.db_table
+    
+    if conexao.vendor == 'postgresql':
+        # Reescrever uma coluna indexada dispara o trigger BEFORE UPDATE, que recalcula o vetor
+        primeiro_campo = indice['campos'][0][0]
+        return [f"UPDATE {tabela} SET {primeiro_campo} = {primeiro_campo}"]
+    
+    fts = f'busca_{nome}'
+    colunas = [coluna for coluna, _ in _colunas_fts(indice)]
+    valores = [campo for campo, _ in indice['campos']]
+    valores += [
+        f"replace(replace(replace({campo}, '.', ''), '-', ''), '/', '')"
+        for campo in indice['documentos']
+    ]
+    return [
+        f"DELETE FROM {fts}",
+        f"INSERT INTO {fts}(rowid, {', '.join(colunas)}) SELECT id, {', '.join(valores)} FROM {tabela}",
+    ]
+
+
+def configurar_indices(using=DEFAULT_DB_ALIAS, reconstruir=False):
+    """
+    Cria (de forma idempotente) as estruturas de busca do banco `using`.
+    Com `reconstruir=True`, recalcula o conteúdo indexado de todas as linhas; sem ele,
+    só as estruturas criadas agora são preenchidas com as linhas já existentes.
+    """
+    conexao = connections[using]
+    
+    if conexao.vendor == 'postgresql':
+        comandos = [
+            "CREATE EXTENSION IF NOT EXISTS unaccent",
+            f"""
+            DO $$ BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{CONFIGURACAO_PG}') THEN
+                    CREATE TEXT SEARCH CONFIGURATION {CONFIGURACAO_PG} (COPY = portuguese);
+                    ALTER TEXT SEARCH CONFIGURATION {CONFIGURACAO_PG}
+                        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+                END IF;
+            END $$
+            """,
+        ]
+        gerar = _sql_postgresql
+    elif conexao.vendor == 'sqlite':
+        comandos = []
+        gerar = _sql_sqlite
+    else:
+        logger.info('Busca textual: banco %s usa o modo icontains', conexao.vendor)
+        return
+    
+    try:
+        # Os triggers só indexam escritas futuras: estruturas novas precisam da carga inicial
+        for nome, indice in INDICES.items():
+            preencher = reconstruir or not _estrutura_existe(conexao, nome, indice)
+            comandos += gerar(nome, indice)
+            if preencher:
+                comandos += _sql_reconstruir(conexao, nome, indice)
+        
+        with conexao.cursor() as cursor:
+            for comando in comandos:
+                cursor.execute(comando)
+    except DatabaseError:
+        logger.exception('Busca textual: não foi possível configurar os índices; usando icontains')
+    finally:
+        _fts_disponivel.clear()
+
+
+def configurar_indices_apos_migrate(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Receiver de post_migrate: cria as estruturas que ainda não existem e indexa as
+    linhas que já estavam no banco.
+    """
+    configurar_indices(using)
@@ -0,0 +1,49 @@
+"""
+Versionamento de chaves de cache por namespace.
+
+Em vez de apagar chaves individualmente, cada namespace tem um número de versão
+que faz parte das chaves. Invalidar o namespace é só incrementar a versão; as
+entradas antigas deixam de ser lidas e expiram sozinhas.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _chave_versao(namespace):
+    return f'versao:{namespace}'
+
+
+def versao(namespace):
+    """
+    Retorna a versão atual do namespace, inicializando-a se necessário.
+    """
+    chave = _chave_versao(namespace)
+    valor = cache.get(chave)
+    
+    if valor is None:
+        # Valor inicial baseado no relógio para não reaproveitar versões antigas
+        # caso a chave de versão seja descartada pelo cache
+        valor = int(time.time() * 1000)
+        if not cache.add(chave, valor, timeout=None):
+            valor = cache.get(chave, valor)
+    
+    return valor
+
+
+def invalidar(*namespaces):
+    """
+    Invalida todas as entradas dos namespaces informados.
+    """
+    for namespace in namespaces:
+        try:
+            cache.incr(_chave_versao(namespace))
+        except ValueError:
+            cache.set(_chave_versao(namespace), int(time.time() * 1000), timeout=None)
+
+
+def chave(namespace, *partes):
+    """
+    Monta uma chave de cache versionada: <namespace>:v<versão>:<partes...>
+    """
+    return ':'.join([namespace, f'v{versao(namespace)}', *map(str, partes)])
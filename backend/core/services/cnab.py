@@ -0,0 +1,440 @@
+"""
+Arquivos CNAB 240 (FEBRABAN) de pagamento a fornecedores: remessa e retorno.
+
+A remessa é gerada registro a registro a partir de um iterator sobre as parcelas
+(com bolsista/credor via select_related), então a memória não cresce com o tamanho
+do lote: `gerar_registros` produz as linhas de 240 posições e `escrever_remessa`
+as grava num arquivo binário bufferizado; `blocos_remessa` agrupa as linhas em
+blocos de bytes para StreamingHttpResponse.
+
+Cada lote do arquivo agrupa uma forma de lançamento: crédito em conta no próprio
+banco da empresa (01) ou TED para outros bancos (41). O "seu número" do segmento A
+leva o id da parcela, o que permite ao retorno baixar as parcelas pagas em lote.
+
+Cada remessa fica registrada em RemessaCnab (pelo NSA), com um ItemRemessaCnab por
+parcela: parcelas enviadas e ainda sem retorno não entram em novas remessas, salvo
+com `reenviar`.
+"""
+import io
+import re
+import unicodedata
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import ConfiguracaoSistema, ItemRemessaCnab, ParcelaContrato, RemessaCnab
+from core.services.pagamentos import LIMITE_LOTE, registrar_pagamentos_lote
+
+TAMANHO_REGISTRO = 240
+FIM_DE_LINHA = '\r\n'
+
+FORMA_CREDITO_CONTA = '01'
+FORMA_TED = '41'
+
+# Ocorrência do retorno que indica crédito efetivado
+OCORRENCIA_PAGO = '00'
+
+CHAVE_NSA = 'cnab_nsa'
+
+
+def _texto(valor, tamanho):
+    """
+    Campo alfanumérico: maiúsculas sem acentos, alinhado à esquerda e completado com brancos.
+    """
+    texto = unicodedata.normalize('NFKD', str(valor or '')).encode('ascii', 'ignore').decode('ascii')
+    return texto.upper()[:tamanho].ljust(tamanho)
+
+
+def _numero(valor, tamanho):
+    """
+    Campo numérico: só dígitos, alinhado à direita e completado com zeros.
+    """
+    digitos = re.sub(r'\D', '', str(valor or ''))
+    return digitos[-tamanho:].rjust(tamanho, '0')
+
+
+def _valor(valor, tamanho):
+    """
+    Valor monetário com duas casas decimais implícitas.
+    """
+    centavos = int((Decimal(valor or 0) * 100).quantize(Decimal('1')))
+    return str(centavos).rjust(tamanho, '0')
+
+
+def _data(valor):
+    return valor.strftime('%d%m%Y') if valor else '0' * 8
+
+
+def _registro(*campos):
+    registro = ''.join(campos)
+    if len(registro) != TAMANHO_REGISTRO:
+        raise ValueError(f'Registro CNAB com {len(registro)} posições (esperado {TAMANHO_REGISTRO}).')
+    return registro
+
+
+def _conta_e_dv(texto):
+    """
+    Separa '12345-6' em ('12345', '6'); sem hífen, o último dígito é o DV.
+    """
+    texto = str(texto or '').strip()
+    if '-' in texto:
+        numero, dv = texto.rsplit('-', 1)
+        return re.sub(r'\D', '', numero), dv.strip()[:1]
+    digitos = re.sub(r'\D', '', texto)
+    return digitos[:-1], digitos[-1:]
+
+
+def _agencia_e_dv(texto):
+    texto = str(texto or '').strip()
+    if '-' in texto:
+        return _conta_e_dv(texto)
+    return re.sub(r'\D', '', texto), ''
+
+
+def codigo_banco(texto):
+    """
+    Código de compensação (3 dígitos) a partir do campo banco, que pode trazer o nome.
+    """
+    encontrado = re.search(r'\d{3}', str(texto or ''))
+    return encontrado.group(0) if encontrado else '000'
+
+
+def _empresa():
+    return settings.CNAB_EMPRESA
+
+
+def _conta_empresa():
+    empresa = _empresa()
+    agencia, dv_agencia = _agencia_e_dv(empresa['agencia'])
+    conta, dv_conta = _conta_e_dv(empresa['conta'])
+    return (
+        _numero(agencia, 5) + _texto(dv_agencia, 1)
+        + _numero(conta, 12) + _texto(dv_conta, 1) + _texto('', 1)
+    )
+
+
+def _header_arquivo(nsa, gerado_em):
+    empresa = _empresa()
+    return _registro(
+        _numero(empresa['banco'], 3), '0000', '0', ' ' * 9,
+        '2', _numero(empresa['cnpj'], 14), _texto(empresa['convenio'], 20),
+        _conta_empresa(),
+        _texto(empresa['nome'], 30), _texto(empresa['nome_banco'], 30), ' ' * 10,
+        '1', gerado_em.strftime('%d%m%Y'), gerado_em.strftime('%H%M%S'), _numero(nsa, 6),
+        '089', '01600', ' ' * 20, ' ' * 20, ' ' * 29,
+    )
+
+
+def _header_lote(lote, forma):
+    empresa = _empresa()
+    return _registro(
+        _numero(empresa['banco'], 3), _numero(lote, 4), '1', 'C', '20', forma, '045', ' ',
+        '2', _numero(empresa['cnpj'], 14), _texto(empresa['convenio'], 20),
+        _conta_empresa(),
+        _texto(empresa['nome'], 30), ' ' * 40,
+        _texto(empresa.get('logradouro'), 30), _numero(empresa.get('numero'), 5), ' ' * 15,
+        _texto(empresa.get('cidade'), 20), _numero(empresa.get('cep'), 8), _texto(empresa.get('uf'), 2),
+        '01', ' ' * 6, ' ' * 10,
+    )
+
+
+def _favorecido(parcela):
+    contrato = parcela.contrato
+    if contrato.bolsista_id:
+        pessoa = contrato.bolsista
+        return pessoa, pessoa.nome, '1', pessoa.cpf
+    pessoa = contrato.credor
+    if pessoa is None:
+        return None, '', '', ''
+    return pessoa, pessoa.razao_social, '2', pessoa.cnpj
+
+
+def _segmentos(lote, sequencial, parcela, forma, data_pagamento):
+    empresa = _empresa()
+    pessoa, nome, tipo_inscricao, inscricao = _favorecido(parcela)
+    agencia, dv_agencia = _agencia_e_dv(pessoa.agencia)
+    conta, dv_conta = _conta_e_dv(pessoa.conta)
+    banco = _numero(empresa['banco'], 3)
+    
+    segmento_a = _registro(
+        banco, _numero(lote, 4), '3', _numero(sequencial, 5), 'A', '0', '00',
+        '000' if forma == FORMA_CREDITO_CONTA else '018',
+        codigo_banco(pessoa.banco), _numero(agencia, 5), _texto(dv_agencia, 1),
+        _numero(conta, 12), _texto(dv_conta, 1), ' ',
+        _texto(nome, 30), _texto(parcela.pk, 20), _data(data_pagamento),
+        'BRL', '0' * 15, _valor(parcela.valor, 15), ' ' * 20, '0' * 8, '0' * 15,
+        _texto(f'PARCELA {parcela.numero_parcela} CONTRATO {parcela.contrato_id}', 40),
+        '  ', _texto('' if forma == FORMA_CREDITO_CONTA else '00010', 5), '  ', ' ' * 3, '0', ' ' * 10,
+    )
+    segmento_b = _registro(
+        banco, _numero(lote, 4), '3', _numero(sequencial + 1, 5), 'B', ' ' * 3,
+        tipo_inscricao, _numero(inscricao, 14),
+        _texto(pessoa.endereco, 30), '0' * 5, ' ' * 15, ' ' * 15, ' ' * 20, '0' * 8, '  ',
+        _data(data_pagamento), _valor(parcela.valor, 15), '0' * 15, '0' * 15, '0' * 15, '0' * 15,
+        ' ' * 15, '0', '0' * 6, '0' * 8,
+    )
+    return segmento_a, segmento_b
+
+
+def _trailer_lote(lote, registros, total):
+    return _registro(
+        _numero(_empresa()['banco'], 3), _numero(lote, 4), '5', ' ' * 9,
+        _numero(registros, 6), _valor(total, 18), '0' * 18, '0' * 6, ' ' * 165, ' ' * 10,
+    )
+
+
+def _trailer_arquivo(lotes, registros):
+    return _registro(
+        _numero(_empresa()['banco'], 3), '9999', '9', ' ' * 9,
+        _numero(lotes, 6), _numero(registros, 6), '0' * 6, ' ' * 205,
+    )
+
+
+def parcelas_remessa(parcela_ids=None, data_ate=None, reenviar=False):
+    """
+    Parcelas pendentes a incluir na remessa (ids informados ou vencendo até `data_ate`).
+    Parcelas já enviadas em remessa ainda sem retorno ficam de fora, salvo com `reenviar`.
+    """
+    consulta = ParcelaContrato.objects.filter(status='pendente')
+    if parcela_ids is not None:
+        consulta = consulta.filter(pk__in=parcela_ids)
+    if data_ate is not None:
+        consulta = consulta.filter(data_prevista__lte=data_ate)
+    if not reenviar:
+        consulta = consulta.exclude(itens_remessa_cnab__situacao='enviada')
+    return _para_remessa(consulta)
+
+
+def parcelas_da_remessa(remessa):
+    """
+    Parcelas registradas na remessa, prontas para `gerar_registros`.
+    """
+    return _para_remessa(ParcelaContrato.objects.filter(itens_remessa_cnab__remessa=remessa))
+
+
+def _para_remessa(consulta):
+    return (
+        consulta
+        .select_related('contrato__bolsista', 'contrato__credor')
+        .only(
+            'id', 'valor', 'numero_parcela', 'contrato_id',
+            'contrato__bolsista_id', 'contrato__credor_id',
+            'contrato__bolsista__nome', 'contrato__bolsista__cpf', 'contrato__bolsista__endereco',
+            'contrato__bolsista__banco', 'contrato__bolsista__agencia', 'contrato__bolsista__conta',
+            'contrato__credor__razao_social', 'contrato__credor__cnpj', 'contrato__credor__endereco',
+            'contrato__credor__banco', 'contrato__credor__agencia', 'contrato__credor__conta',
+        )
+        .order_by('pk')
+    )
+
+
+def proximo_nsa():
+    """
+    Número sequencial do arquivo, guardado em ConfiguracaoSistema e incrementado a cada remessa.
+    """
+    with transaction.atomic():
+        configuracao, _ = ConfiguracaoSistema.objects.select_for_update().get_or_create(
+            chave=CHAVE_NSA,
+            defaults={'valor': '0', 'descricao': 'Último número sequencial de remessa CNAB 240'},
+        )
+        nsa = int(configuracao.valor or 0) + 1
+        configuracao.valor = str(nsa)
+        configuracao.save(update_fields=['valor', 'data_atualizacao'])
+    return nsa
+
+
+def registrar_remessa(parcelas, data_pagamento, usuario=None, reenviar=False, lote=1000):
+    """
+    Reserva o próximo NSA e registra a remessa com as parcelas do queryset. Com
+    `reenviar`, os envios anteriores ainda sem retorno dessas parcelas são cancelados.
+    Uma parcela registrada ao mesmo tempo por outra remessa fica só na primeira.
+    """
+    with transaction.atomic():
+        remessa = RemessaCnab.objects.create(
+            nsa=proximo_nsa(), data_pagamento=data_pagamento, gerada_por=usuario
+        )
+        ids = list(parcelas.values_list('pk', flat=True))
+        if reenviar:
+            ItemRemessaCnab.objects.filter(parcela_id__in=ids, situacao='enviada').update(situacao='cancelada')
+        ItemRemessaCnab.objects.bulk_create(
+            [ItemRemessaCnab(remessa=remessa, parcela_id=parcela_id) for parcela_id in ids],
+            batch_size=lote,
+            ignore_conflicts=True,
+        )
+        remessa.total_parcelas = remessa.itens.count()
+        remessa.save(update_fields=['total_parcelas'])
+    return remessa
+
+
+def gerar_registros(parcelas, data_pagamento, nsa, gerado_em=None):
+    """
+    Gera as linhas (sem quebra) da remessa. `parcelas` é um queryset; ele é percorrido
+    com iterator() uma vez por forma de lançamento, sem carregar o lote inteiro.
+    """
+    gerado_em = gerado_em or timezone.localtime()
+    banco_empresa = _numero(_empresa()['banco'], 3)
+    
+    yield _header_arquivo(nsa, gerado_em)
+    lotes = 0
+    registros_arquivo = 1
+    
+    for forma in (FORMA_CREDITO_CONTA, FORMA_TED):
+        lote = lotes + 1
+        sequencial = 1
+        total = Decimal('0')
+        aberto = False
+        
+        for parcela in parcelas.iterator(chunk_size=2000):
+            pessoa = _favorecido(parcela)[0]
+            if pessoa is None:
+                continue
+            mesmo_banco = codigo_banco(pessoa.banco) == banco_empresa
+            if mesmo_banco != (forma == FORMA_CREDITO_CONTA):
+                continue
+            
+            if not aberto:
+                yield _header_lote(lote, forma)
+                aberto = True
+            yield from _segmentos(lote, sequencial, parcela, forma, data_pagamento)
+            sequencial += 2
+            total += parcela.valor
+        
+        if aberto:
+            # header + segmentos + trailer
+            registros_lote = sequencial + 1
+            yield _trailer_lote(lote, registros_lote, total)
+            lotes += 1
+            registros_arquivo += registros_lote
+    
+    yield _trailer_arquivo(lotes, registros_arquivo + 1)
+
+
+def escrever_remessa(arquivo, registros, tamanho_buffer=64 * 1024):
+    """
+    Grava os registros em `arquivo` (binário) através de um BufferedWriter e retorna
+    a quantidade de linhas escritas.
+    """
+    saida = arquivo if isinstance(arquivo, io.BufferedIOBase) else io.BufferedWriter(arquivo, tamanho_buffer)
+    linhas = 0
+    for registro in registros:
+        saida.write((registro + FIM_DE_LINHA).encode('ascii'))
+        linhas += 1
+    saida.flush()
+    return linhas
+
+
+def blocos_remessa(registros, linhas_por_bloco=500):
+    """
+    Agrupa os registros em blocos de bytes para respostas em streaming.
+    """
+    buffer = io.BytesIO()
+    linhas = 0
+    for registro in registros:
+        buffer.write((registro + FIM_DE_LINHA).encode('ascii'))
+        linhas += 1
+        if linhas == linhas_por_bloco:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            linhas = 0
+    if linhas:
+        yield buffer.getvalue()
+
+
+def _data_retorno(texto):
+    try:
+        return datetime.strptime(texto, '%d%m%Y').date()
+    except ValueError:
+        return None
+
+
+def processar_retorno(linhas, usuario):
+    """
+    Lê um arquivo de retorno CNAB 240 (iterável de linhas, str ou bytes) e baixa em lote
+    as parcelas com ocorrência '00' (crédito efetivado), na data real do segmento A (ou
+    na agendada, se a real não vier preenchida).
+    
+    Um crédito só é baixado se o valor real (ou o agendado, sem o real) for igual ao da
+    parcela; linhas com data ilegível ou valor divergente entram nas rejeitadas com o
+    `motivo`. Os itens das remessas enviadas passam a 'paga' ou 'rejeitada' (liberando
+    as rejeitadas para nova remessa). Retorna o resumo com pagas, rejeitadas (com o
+    código da ocorrência) e os erros do pagamento em lote.
+    """
+    efetivadas = {}
+    rejeitadas = []
+    
+    for numero_linha, linha in enumerate(linhas, start=1):
+        if isinstance(linha, bytes):
+            linha = linha.decode('latin-1')
+        linha = linha.rstrip('\r\n')
+        if len(linha) < TAMANHO_REGISTRO or linha[7] != '3' or linha[13] != 'A':
+            continue
+        
+        seu_numero = linha[73:93].strip()
+        ocorrencias = linha[230:240].strip()
+        if not seu_numero.isdigit():
+            rejeitadas.append({'linha': numero_linha, 'parcela': seu_numero, 'ocorrencias': ocorrencias})
+            continue
+        
+        if ocorrencias[:2] != OCORRENCIA_PAGO:
+            rejeitadas.append({'linha': numero_linha, 'parcela': int(seu_numero), 'ocorrencias': ocorrencias})
+            continue
+        
+        data_pagamento = _data_retorno(linha[154:162]) or _data_retorno(linha[93:101])
+        if data_pagamento is None:
+            rejeitadas.append({
+                'linha': numero_linha, 'parcela': int(seu_numero), 'ocorrencias': ocorrencias,
+                'motivo': 'Data de pagamento inválida.',
+            })
+            continue
+        
+        valor_real = linha[162:177] if linha[162:177].strip('0 ') else linha[119:134]
+        if not valor_real.isdigit():
+            rejeitadas.append({
+                'linha': numero_linha, 'parcela': int(seu_numero), 'ocorrencias': ocorrencias,
+                'motivo': 'Valor efetivado inválido.',
+            })
+            continue
+        efetivadas[int(seu_numero)] = (numero_linha, ocorrencias, data_pagamento, Decimal(valor_real) / 100)
+    
+    valores = dict(ParcelaContrato.objects.filter(pk__in=efetivadas).values_list('pk', 'valor'))
+    por_data = {}
+    for parcela_id, (numero_linha, ocorrencias, data_pagamento, valor_real) in efetivadas.items():
+        if parcela_id in valores and valores[parcela_id] != valor_real:
+            rejeitadas.append({
+                'linha': numero_linha, 'parcela': parcela_id, 'ocorrencias': ocorrencias,
+                'motivo': f'Valor efetivado ({valor_real}) diferente do valor da parcela ({valores[parcela_id]}).',
+            })
+            continue
+        por_data.setdefault(data_pagamento, []).append(parcela_id)
+    
+    resultados = []
+    for data_pagamento, ids in por_data.items():
+        for inicio in range(0, len(ids), LIMITE_LOTE):
+            resultados += registrar_pagamentos_lote(
+                ids[inicio:inicio + LIMITE_LOTE], usuario,
+                data_pagamento=data_pagamento,
+                atividade_pagamento='Retorno CNAB 240',
+            )
+    
+    pagas = [resultado['parcela'] for resultado in resultados if resultado['resultado'] == 'pago']
+    _baixar_itens_remessa(pagas, rejeitadas)
+    return {
+        'pagas': len(pagas),
+        'rejeitadas': rejeitadas,
+        'erros': [resultado for resultado in resultados if resultado['resultado'] != 'pago'],
+    }
+
+
+def _baixar_itens_remessa(pagas, rejeitadas):
+    enviados = ItemRemessaCnab.objects.filter(situacao='enviada')
+    if pagas:
+        enviados.filter(parcela_id__in=pagas).update(situacao='paga', ocorrencias=OCORRENCIA_PAGO)
+    for rejeitada in rejeitadas:
+        if isinstance(rejeitada['parcela'], int):
+            enviados.filter(parcela_id=rejeitada['parcela']).update(
+                situacao='rejeitada', ocorrencias=rejeitada['ocorrencias'][:10]
+            )
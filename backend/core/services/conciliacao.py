@@ -0,0 +1,260 @@
+"""
+Conciliação de extratos bancários com MovimentoFinanceiro.
+
+Os movimentos ainda não conciliados da janela do extrato são lidos uma vez e indexados
+em buckets de um dicionário pela chave (valor assinado em centavos, dia). Cada
+lançamento do extrato procura o movimento no próprio dia e, em seguida, nos dias
+vizinhos até `janela` dias de distância, consumindo o mais antigo do bucket. O custo
+é O(lançamentos × (2·janela + 1)) em vez da comparação de todos os pares.
+
+Os vínculos ficam em LancamentoExtrato.movimento, gravados com bulk_update.
+"""
+import csv
+import io
+import re
+import unicodedata
+from collections import deque
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from core.models import ExtratoBancario, LancamentoExtrato, MovimentoFinanceiro
+
+# Sinal do valor no extrato para cada tipo de movimento conciliável
+SINAIS = {'entrada': 1, 'saida': -1}
+
+TAMANHO_LOTE = 5000
+
+_FORMATOS_DATA = ('%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%y')
+_COLUNAS_CSV = {
+    'data': ('data', 'data_lancamento', 'dt', 'date'),
+    'valor': ('valor', 'valor_lancamento', 'amount'),
+    'descricao': ('descricao', 'historico', 'memo', 'description'),
+    'documento': ('documento', 'doc', 'numero_documento', 'fitid'),
+}
+_TAG_OFX = re.compile(r'<(\w+)>([^<\r\n]*)')
+_TRANSACAO_OFX = re.compile(r'<STMTTRN>(.*?)(?:</STMTTRN>|(?=<STMTTRN>)|(?=</BANKTRANLIST>))', re.S | re.I)
+
+
+def _centavos(valor):
+    return int((Decimal(valor) * 100).quantize(Decimal('1')))
+
+
+def _decimal(texto):
+    texto = str(texto).strip().replace('R$', '').replace(' ', '')
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    return Decimal(texto).quantize(Decimal('0.01'))
+
+
+def _data(texto):
+    texto = str(texto).strip()
+    for formato in _FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f"data '{texto}' em formato desconhecido")
+
+
+def _sem_acentos(texto):
+    texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'\W+', '_', texto.strip().lower()).strip('_')
+
+
+def ler_ofx(texto):
+    """
+    Lançamentos (data, valor, descricao, documento) das transações <STMTTRN> de um OFX.
+    Aceita o OFX 1.x (SGML, tags sem fechamento) e o 2.x (XML).
+    """
+    for numero, bloco in enumerate(_TRANSACAO_OFX.finditer(texto), start=1):
+        campos = {tag.upper(): valor.strip() for tag, valor in _TAG_OFX.findall(bloco.group(1))}
+        try:
+            yield (
+                date(int(campos['DTPOSTED'][:4]), int(campos['DTPOSTED'][4:6]), int(campos['DTPOSTED'][6:8])),
+                Decimal(campos['TRNAMT'].replace(',', '.')).quantize(Decimal('0.01')),
+                (campos.get('MEMO') or campos.get('NAME') or '')[:255],
+                campos.get('FITID', '')[:100],
+            )
+        except (KeyError, ValueError, InvalidOperation):
+            raise ValueError(f'Transação {numero} do OFX sem data ou valor válidos.')
+
+
+def ler_csv(texto):
+    """
+    Lançamentos de um CSV com cabeçalho (colunas data e valor obrigatórias; descricao e
+    documento opcionais). O separador é detectado; valores aceitam vírgula decimal.
+    """
+    linhas = io.StringIO(texto)
+    amostra = texto[:4096]
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=';,\t')
+    except csv.Error:
+        dialeto = csv.excel
+    leitor = csv.reader(linhas, dialeto)
+    
+    cabecalho = [_sem_acentos(coluna) for coluna in next(leitor, [])]
+    indices = {}
+    for campo, nomes in _COLUNAS_CSV.items():
+        for nome in nomes:
+            if nome in cabecalho:
+                indices[campo] = cabecalho.index(nome)
+                break
+    if 'data' not in indices or 'valor' not in indices:
+        raise ValueError('O CSV deve ter as colunas data e valor.')
+    
+    for numero, linha in enumerate(leitor, start=2):
+        if not any(celula.strip() for celula in linha):
+            continue
+        try:
+            yield (
+                _data(linha[indices['data']]),
+                _decimal(linha[indices['valor']]),
+                linha[indices['descricao']].strip()[:255] if 'descricao' in indices else '',
+                linha[indices['documento']].strip()[:100] if 'documento' in indices else '',
+            )
+        except (IndexError, ValueError, InvalidOperation) as erro:
+            raise ValueError(f'Linha {numero} do CSV inválida: {erro}')
+
+
+def detectar_formato(nome, texto):
+    if nome.lower().endswith('.ofx') or '<OFX>' in texto[:2048].upper():
+        return 'ofx'
+    return 'csv'
+
+
+def _decodificar(conteudo):
+    if isinstance(conteudo, str):
+        return conteudo
+    try:
+        return conteudo.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return conteudo.decode('latin-1')
+
+
+def importar_extrato(conteudo, nome, usuario, banco='', conta=''):
+    """
+    Cria o ExtratoBancario e grava os lançamentos com bulk_create em lotes.
+    Levanta ValueError se o arquivo não puder ser lido.
+    """
+    texto = _decodificar(conteudo)
+    formato = detectar_formato(nome, texto)
+    leitor = ler_ofx(texto) if formato == 'ofx' else ler_csv(texto)
+    
+    with transaction.atomic():
+        extrato = ExtratoBancario.objects.create(
+            arquivo_nome=nome[:255], formato=formato, banco=banco, conta=conta, importado_por=usuario
+        )
+        lote = []
+        for data, valor, descricao, documento in leitor:
+            lote.append(LancamentoExtrato(
+                extrato=extrato, data=data, valor=valor, descricao=descricao, documento=documento
+            ))
+            if len(lote) == TAMANHO_LOTE:
+                LancamentoExtrato.objects.bulk_create(lote)
+                lote = []
+        LancamentoExtrato.objects.bulk_create(lote)
+        
+        resumo = extrato.lancamentos.aggregate(total=Count('id'), inicio=Min('data'), fim=Max('data'))
+        if not resumo['total']:
+            raise ValueError('O extrato não tem lançamentos.')
+        extrato.total_lancamentos = resumo['total']
+        extrato.data_inicio = resumo['inicio']
+        extrato.data_fim = resumo['fim']
+        extrato.save(update_fields=['total_lancamentos', 'data_inicio', 'data_fim'])
+    
+    return extrato
+
+
+def _deslocamentos(janela):
+    yield 0
+    for dias in range(1, janela + 1):
+        yield -dias
+        yield dias
+
+
+def movimentos_pendentes(inicio, fim, setores=None):
+    """
+    Movimentos conciliáveis sem lançamento vinculado entre `inicio` e `fim`, opcionalmente
+    restritos aos `setores` (ids).
+    """
+    consulta = MovimentoFinanceiro.objects.filter(
+        tipo__in=SINAIS,
+        data_movimento__gte=inicio,
+        data_movimento__lte=fim,
+        lancamento_extrato__isnull=True,
+    )
+    if setores is not None:
+        consulta = consulta.filter(setor__in=setores)
+    return consulta
+
+
+def janela_extrato(extrato, janela=None):
+    janela = settings.CONCILIACAO_JANELA_DIAS if janela is None else janela
+    return extrato.data_inicio - timedelta(days=janela), extrato.data_fim + timedelta(days=janela)
+
+
+def conciliar(extrato, janela=None):
+    """
+    Vincula os lançamentos ainda não conciliados do extrato a movimentos de mesmo valor
+    (com o sinal do tipo) com data até `janela` dias de distância. Retorna o resumo com
+    os vínculos criados e as pendências restantes dos dois lados.
+    """
+    janela = settings.CONCILIACAO_JANELA_DIAS if janela is None else janela
+    inicio, fim = janela_extrato(extrato, janela)
+    
+    with transaction.atomic():
+        ExtratoBancario.objects.select_for_update().filter(pk=extrato.pk).first()
+        
+        # O extrato travado só protege contra outra conciliação do mesmo extrato; os
+        # movimentos candidatos também são travados para que uma conciliação simultânea
+        # de outro extrato não vincule o mesmo movimento (OneToOne único). Os já travados
+        # ficam de fora desta execução. `of=('self',)` porque o FOR UPDATE não se aplica
+        # ao lado anulável do LEFT JOIN com o lançamento.
+        buckets = {}
+        movimentos = (
+            movimentos_pendentes(inicio, fim)
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by('data_movimento', 'id')
+            .values_list('id', 'tipo', 'valor', 'data_movimento')
+        )
+        for movimento_id, tipo, valor, data_movimento in movimentos.iterator(chunk_size=TAMANHO_LOTE):
+            chave = (SINAIS[tipo] * _centavos(valor), data_movimento.toordinal())
+            bucket = buckets.get(chave)
+            if bucket is None:
+                bucket = buckets[chave] = deque()
+            bucket.append(movimento_id)
+        
+        vinculos = []
+        lancamentos = (
+            extrato.lancamentos.filter(movimento__isnull=True)
+            .order_by('data', 'id')
+            .values_list('id', 'valor', 'data')
+        )
+        for lancamento_id, valor, data in lancamentos.iterator(chunk_size=TAMANHO_LOTE):
+            centavos, dia = _centavos(valor), data.toordinal()
+            for deslocamento in _deslocamentos(janela):
+                bucket = buckets.get((centavos, dia + deslocamento))
+                if bucket:
+                    vinculos.append(LancamentoExtrato(pk=lancamento_id, movimento_id=bucket.popleft()))
+                    break
+        
+        LancamentoExtrato.objects.bulk_update(vinculos, ['movimento'], batch_size=1000)
+        
+        conciliados = extrato.lancamentos.filter(movimento__isnull=False).count()
+        ExtratoBancario.objects.filter(pk=extrato.pk).update(
+            total_conciliados=conciliados, data_conciliacao=timezone.now()
+        )
+        extrato.total_conciliados = conciliados
+    
+    return {
+        'extrato': extrato.pk,
+        'conciliados_agora': len(vinculos),
+        'conciliados': conciliados,
+        'lancamentos_pendentes': extrato.total_lancamentos - conciliados,
+        'movimentos_pendentes': movimentos_pendentes(inicio, fim).count(),
+    }
@@ -0,0 +1,266 @@
+"""
+Exportação analítica em formato colunar (Parquet ou Arrow IPC) para o BI.
+
+Cada conjunto é lido com `values_list(...).iterator(chunk_size)` (cursor no servidor
+no PostgreSQL); as tuplas de cada lote são transpostas em colunas com zip() e
+convertidas em um RecordBatch do pyarrow, sem montar um dicionário por linha.
+
+A exportação incremental usa uma marca d'água por conjunto, guardada em
+ConfiguracaoSistema: cada execução exporta as linhas com o campo incremental no
+intervalo [marca anterior - sobreposição, corte) e grava o corte como nova marca
+depois que o arquivo foi escrito. O corte é o instante da execução (campos data/hora)
+ou o dia da execução (campos de data). A sobreposição (EXPORTACAO_SOBREPOSICAO_SEGUNDOS,
+só em campos data/hora) recupera linhas de transações que ainda estavam abertas no
+corte anterior e gravaram um horário anterior a ele; as linhas repetidas entre arquivos
+devem ser deduplicadas pelo id no destino. A exportação completa não aplica o corte.
+
+Parcelas e movimentos não têm `atualizado_em` próprio: as parcelas seguem o
+`atualizado_em` do contrato (mudanças de status atualizam total_pago e o carimbo do
+contrato) e os movimentos, a data do movimento.
+"""
+import os
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core.models import ConfiguracaoSistema, Contrato, MovimentoFinanceiro, ParcelaContrato, Rubrica
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = pq = None
+
+FORMATOS = ('parquet', 'arrow')
+TAMANHO_LOTE = 10000
+
+# conjunto -> (consulta, [(campo ORM, coluna, tipo)], campo incremental ou None)
+CONJUNTOS = {
+    'contratos': (
+        lambda: Contrato.objects.all(),
+        [
+            ('id', 'id', 'int'),
+            ('tipo', 'tipo', 'texto'),
+            ('nome_curso_acao', 'nome_curso_acao', 'texto'),
+            ('status_processo', 'status_processo', 'texto'),
+            ('status_contrato', 'status_contrato', 'texto'),
+            ('setor_id', 'setor_id', 'int'),
+            ('programa', 'programa', 'texto'),
+            ('bolsista_id', 'bolsista_id', 'int'),
+            ('credor_id', 'credor_id', 'int'),
+            ('data_inicio', 'data_inicio', 'data'),
+            ('data_fim', 'data_fim', 'data'),
+            ('meta__fonte_recurso_id', 'fonte_recurso_id', 'int'),
+            ('meta_id', 'meta_id', 'int'),
+            ('atividade_id', 'atividade_id', 'int'),
+            ('rubrica_id', 'rubrica_id', 'int'),
+            ('valor_total', 'valor_total', 'decimal'),
+            ('quantidade_parcelas', 'quantidade_parcelas', 'int'),
+            ('total_pago', 'total_pago', 'decimal'),
+            ('criado_em', 'criado_em', 'data_hora'),
+            ('atualizado_em', 'atualizado_em', 'data_hora'),
+        ],
+        'atualizado_em',
+    ),
+    'parcelas': (
+        lambda: ParcelaContrato.objects.all(),
+        [
+            ('id', 'id', 'int'),
+            ('contrato_id', 'contrato_id', 'int'),
+            ('numero_parcela', 'numero_parcela', 'int'),
+            ('valor', 'valor', 'decimal'),
+            ('data_prevista', 'data_prevista', 'data'),
+            ('data_pagamento', 'data_pagamento', 'data'),
+            ('status', 'status', 'texto'),
+            ('contrato__atualizado_em', 'contrato_atualizado_em', 'data_hora'),
+        ],
+        'contrato__atualizado_em',
+    ),
+    'movimentos': (
+        lambda: MovimentoFinanceiro.objects.all(),
+        [
+            ('id', 'id', 'int'),
+            ('tipo', 'tipo', 'texto'),
+            ('fonte_recurso_id', 'fonte_recurso_id', 'int'),
+            ('setor_id', 'setor_id', 'int'),
+            ('rubrica_id', 'rubrica_id', 'int'),
+            ('contrato_id', 'contrato_id', 'int'),
+            ('parcela_id', 'parcela_id', 'int'),
+            ('valor', 'valor', 'decimal'),
+            ('data_movimento', 'data_movimento', 'data'),
+            ('descricao', 'descricao', 'texto'),
+        ],
+        'data_movimento',
+    ),
+    # Árvore orçamentária achatada: uma linha por rubrica com os níveis acima
+    'estrutura': (
+        lambda: Rubrica.objects.all(),
+        [
+            ('atividade__meta__fonte_recurso_id', 'fonte_recurso_id', 'int'),
+            ('atividade__meta__fonte_recurso__nome', 'fonte_recurso_nome', 'texto'),
+            ('atividade__meta__fonte_recurso__valor_total', 'fonte_recurso_valor_total', 'decimal'),
+            ('atividade__meta_id', 'meta_id', 'int'),
+            ('atividade__meta__codigo', 'meta_codigo', 'texto'),
+            ('atividade__meta__valor_previsto', 'meta_valor_previsto', 'decimal'),
+            ('atividade_id', 'atividade_id', 'int'),
+            ('atividade__codigo', 'atividade_codigo', 'texto'),
+            ('atividade__valor_previsto', 'atividade_valor_previsto', 'decimal'),
+            ('id', 'rubrica_id', 'int'),
+            ('nome', 'rubrica_nome', 'texto'),
+            ('valor_previsto', 'rubrica_valor_previsto', 'decimal'),
+            ('ativo', 'rubrica_ativa', 'bool'),
+        ],
+        None,
+    ),
+}
+
+
+def _tipo_arrow(tipo):
+    return {
+        'int': pa.int64(),
+        'texto': pa.string(),
+        'data': pa.date32(),
+        'data_hora': pa.timestamp('us', tz='UTC'),
+        'decimal': pa.decimal128(17, 2),
+        'bool': pa.bool_(),
+    }[tipo]
+
+
+def esquema(conjunto):
+    _, colunas, _ = CONJUNTOS[conjunto]
+    return pa.schema([(coluna, _tipo_arrow(tipo)) for _, coluna, tipo in colunas])
+
+
+def _chave_marca(conjunto):
+    return f'exportacao_{conjunto}'
+
+
+def ler_marca(conjunto):
+    """
+    Marca d'água da última exportação do conjunto (date, datetime ou None).
+    """
+    valor = (
+        ConfiguracaoSistema.objects.filter(chave=_chave_marca(conjunto))
+        .values_list('valor', flat=True).first()
+    )
+    if not valor:
+        return None
+    return parse_datetime(valor) if 'T' in valor else parse_date(valor)
+
+
+def gravar_marca(conjunto, corte):
+    ConfiguracaoSistema.objects.update_or_create(
+        chave=_chave_marca(conjunto),
+        defaults={
+            'valor': corte.isoformat(),
+            'descricao': f'Marca da última exportação analítica de {conjunto}',
+        }
+    )
+
+
+def _corte(conjunto):
+    _, colunas, incremental = CONJUNTOS[conjunto]
+    tipo = next(tipo for campo, _, tipo in colunas if campo == incremental)
+    return timezone.now() if tipo == 'data_hora' else timezone.localdate()
+
+
+def _inicio(marca):
+    # Recua a marca para reler o que transações em andamento no corte gravaram antes dele
+    if isinstance(marca, datetime):
+        return marca - timedelta(seconds=settings.EXPORTACAO_SOBREPOSICAO_SEGUNDOS)
+    return marca
+
+
+def lotes(conjunto, desde=None, ate=None, tamanho=TAMANHO_LOTE):
+    """
+    RecordBatches do conjunto com o campo incremental em [desde, ate).
+    """
+    consulta, colunas, incremental = CONJUNTOS[conjunto]
+    consulta = consulta()
+    if incremental and desde is not None:
+        consulta = consulta.filter(**{f'{incremental}__gte': desde})
+    if incremental and ate is not None:
+        consulta = consulta.filter(**{f'{incremental}__lt': ate})
+    
+    campos = [campo for campo, _, _ in colunas]
+    tipos = [_tipo_arrow(tipo) for _, _, tipo in colunas]
+    nomes = [coluna for _, coluna, _ in colunas]
+    linhas = consulta.order_by('pk').values_list(*campos).iterator(chunk_size=tamanho)
+    
+    while True:
+        lote = list(islice(linhas, tamanho))
+        if not lote:
+            return
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(valores, type=tipo) for valores, tipo in zip(zip(*lote), tipos)],
+            names=nomes,
+        )
+
+
+def _escritor(caminho, formato, schema):
+    if formato == 'parquet':
+        return pq.ParquetWriter(caminho, schema, compression='zstd')
+    return pa.ipc.new_file(caminho, schema)
+
+
+def exportar(conjunto, diretorio, formato='parquet', completo=False, tamanho=TAMANHO_LOTE):
+    """
+    Exporta o conjunto para um arquivo em `diretorio` e retorna
+    {'conjunto', 'arquivo', 'linhas', 'desde', 'ate'}. Sem `completo`, exporta só o que
+    mudou desde a marca anterior (com a sobreposição); nos dois casos avança a marca.
+    """
+    if pa is None:
+        raise RuntimeError('A exportação analítica requer o pacote pyarrow.')
+    if conjunto not in CONJUNTOS:
+        raise ValueError(f"Conjunto '{conjunto}' desconhecido; use um de {', '.join(CONJUNTOS)}.")
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato '{formato}' desconhecido; use parquet ou arrow.")
+    
+    incremental = CONJUNTOS[conjunto][2]
+    desde = ate = corte = None
+    if incremental:
+        corte = _corte(conjunto)
+        if not completo:
+            ate = corte
+            marca = ler_marca(conjunto)
+            desde = _inicio(marca) if marca is not None else None
+    
+    carimbo = timezone.now().strftime('%Y%m%dT%H%M%S')
+    caminho = os.path.join(diretorio, f'{conjunto}_{carimbo}.{formato}')
+    temporario = f'{caminho}.parcial'
+    schema = esquema(conjunto)
+    linhas = 0
+    
+    # Leitura em uma transação: o cursor no servidor precisa dela e vê um retrato consistente
+    try:
+        with transaction.atomic():
+            escritor = _escritor(temporario, formato, schema)
+            try:
+                for lote in lotes(conjunto, desde, ate, tamanho):
+                    if formato == 'parquet':
+                        escritor.write_table(pa.Table.from_batches([lote]))
+                    else:
+                        escritor.write_batch(lote)
+                    linhas += lote.num_rows
+            finally:
+                escritor.close()
+    except Exception:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    os.replace(temporario, caminho)
+    
+    if incremental:
+        gravar_marca(conjunto, corte)
+    
+    return {
+        'conjunto': conjunto,
+        'arquivo': caminho,
+        'linhas': linhas,
+        'desde': desde.isoformat() if isinstance(desde, (date, datetime)) else None,
+        'ate': ate.isoformat() if ate is not None else None,
+    }
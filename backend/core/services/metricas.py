@@ -0,0 +1,50 @@
+"""
+Métricas de processo sobre o uso de conexões com o banco.
+
+Os contadores são por processo (cada worker do gunicorn tem os seus).
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+
+_lock = threading.Lock()
+_contadores = {'requisicoes': 0, 'conexoes_abertas': 0}
+
+
+def _contar_requisicao(sender, **kwargs):
+    with _lock:
+        _contadores['requisicoes'] += 1
+
+
+def _contar_conexao(sender, connection, **kwargs):
+    with _lock:
+        _contadores['conexoes_abertas'] += 1
+
+
+def registrar():
+    request_started.connect(_contar_requisicao, dispatch_uid='metricas_requisicoes')
+    connection_created.connect(_contar_conexao, dispatch_uid='metricas_conexoes')
+
+
+def metricas_conexoes():
+    """
+    Retorna os contadores do processo atual e a taxa de reaproveitamento de conexões
+    (1 - conexões abertas / requisições atendidas).
+    """
+    with _lock:
+        requisicoes = _contadores['requisicoes']
+        conexoes = _contadores['conexoes_abertas']
+    
+    banco = settings.DATABASES['default']
+    
+    return {
+        'pid': os.getpid(),
+        'requisicoes': requisicoes,
+        'conexoes_abertas': conexoes,
+        'taxa_reuso': round(max(0.0, 1 - conexoes / requisicoes), 4) if requisicoes else None,
+        'conn_max_age': banco.get('CONN_MAX_AGE', 0),
+        'pool': 'pool' in banco.get('OPTIONS', {}),
+    }
@@ -0,0 +1,234 @@
+"""
+Consolidação mensal de MovimentoFinanceiro em MovimentoMensal.
+
+Cada linha guarda soma e quantidade dos movimentos de um mês por tipo, fonte, setor e
+rubrica. A tabela é mantida por variação: os sinais de MovimentoFinanceiro (save/delete)
+e os caminhos com bulk_create chamam `registrar`, que aplica `F() + delta` na mesma
+transação da gravação do movimento. `reconstruir` refaz a consolidação a partir dos
+movimentos, em lotes de meses, para carga inicial ou correção de desvios.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Sum
+from django.db.models.functions import TruncMonth
+
+from core.models import MovimentoFinanceiro, MovimentoMensal
+from core.services.cache import invalidar
+from core.services.projecao import somar_meses
+
+DIMENSOES = ('fonte_recurso_id', 'setor_id', 'rubrica_id')
+CAMPOS_CHAVE = ('ano_mes', 'tipo') + DIMENSOES
+# Colunas do movimento lidas para montar a chave e a variação
+CAMPOS_ESTADO = ('data_movimento', 'tipo', 'valor') + DIMENSOES
+
+
+def chave(movimento, dados=None):
+    """
+    (ano_mes, tipo, fonte_recurso_id, setor_id, rubrica_id) do movimento (ou do dicionário
+    `dados` com as colunas de CAMPOS_ESTADO), ou None se ainda não houver data.
+    """
+    dados = movimento.__dict__ if dados is None else dados
+    data = dados.get('data_movimento')
+    if data is None:
+        return None
+    return (data.replace(day=1), dados.get('tipo')) + tuple(dados.get(campo) for campo in DIMENSOES)
+
+
+def _filtro(chave_mensal):
+    filtro = {}
+    for campo, valor in zip(CAMPOS_CHAVE, chave_mensal):
+        if valor is None:
+            filtro[f'{campo[:-3]}__isnull'] = True
+        else:
+            filtro[campo] = valor
+    return filtro
+
+
+def ajustar(variacoes):
+    """
+    Aplica `variacoes` (chave -> (valor, quantidade)) a MovimentoMensal. Sem linha para a
+    chave, ela é criada; linhas que ficam com quantidade zero são removidas. As chaves são
+    processadas em ordem para que transações concorrentes bloqueiem as linhas na mesma ordem.
+    """
+    if any(valor or quantidade for valor, quantidade in variacoes.values()):
+        transaction.on_commit(lambda: invalidar('financeiro'))
+    
+    for chave_mensal in sorted(variacoes, key=lambda c: tuple((v is None, v) for v in c)):
+        valor, quantidade = variacoes[chave_mensal]
+        if not valor and not quantidade:
+            continue
+        
+        with transaction.atomic():
+            filtro = _filtro(chave_mensal)
+            consulta = MovimentoMensal.objects.filter(**filtro)
+            atualizados = consulta.update(
+                valor_total=F('valor_total') + valor,
+                quantidade=F('quantidade') + quantidade,
+            )
+            if not atualizados:
+                _, criado = MovimentoMensal.objects.get_or_create(
+                    **filtro,
+                    defaults={
+                        **dict(zip(CAMPOS_CHAVE, chave_mensal)),
+                        'valor_total': valor,
+                        'quantidade': quantidade,
+                    }
+                )
+                if not criado:
+                    consulta.update(
+                        valor_total=F('valor_total') + valor,
+                        quantidade=F('quantidade') + quantidade,
+                    )
+            consulta.filter(quantidade__lte=0).delete()
+
+
+def registrar(movimentos, sinal=1):
+    """
+    Soma (sinal=1) ou subtrai (sinal=-1) os movimentos informados da consolidação, para
+    gravações que não disparam sinais (bulk_create, QuerySet.update).
+    """
+    variacoes = defaultdict(lambda: (Decimal('0'), 0))
+    for movimento in movimentos:
+        chave_mensal = chave(movimento)
+        if chave_mensal is None:
+            continue
+        valor, quantidade = variacoes[chave_mensal]
+        variacoes[chave_mensal] = (valor + sinal * movimento.valor, quantidade + sinal)
+    ajustar(variacoes)
+
+
+def _adiados(movimento):
+    return movimento.get_deferred_fields() & set(CAMPOS_ESTADO)
+
+
+def capturar_estado(movimento):
+    """
+    Guarda a chave e o valor com que o movimento foi carregado (ou criado), para o
+    cálculo da variação no próximo save().
+    
+    Carregado com .only()/.defer() sem alguma coluna da chave, o estado fica pendente
+    (None) e é lido do banco por `completar_estado` só se o movimento for gravado ou
+    excluído, sem uma consulta extra por instância carregada.
+    """
+    if _adiados(movimento):
+        movimento._mensal_estado = None
+    else:
+        movimento._mensal_estado = (chave(movimento), movimento.__dict__.get('valor'))
+
+
+def completar_estado(movimento):
+    """
+    Lê do banco a chave e o valor anteriores de um movimento com estado pendente
+    (ver `capturar_estado`). Chamado antes do save() e da exclusão.
+    """
+    if movimento.pk is None or getattr(movimento, '_mensal_estado', None) is not None:
+        return
+    dados = MovimentoFinanceiro.objects.filter(pk=movimento.pk).values(*CAMPOS_ESTADO).first()
+    movimento._mensal_estado = (chave(movimento, dados), dados['valor']) if dados else (None, None)
+
+
+def variacao_gravacao(movimento, criado):
+    """
+    Variações (chave -> (valor, quantidade)) causadas por um save() do movimento.
+    """
+    variacoes = defaultdict(lambda: (Decimal('0'), 0))
+    if not criado:
+        chave_anterior, valor_anterior = getattr(movimento, '_mensal_estado', None) or (None, None)
+        if chave_anterior is not None:
+            variacoes[chave_anterior] = (-valor_anterior, -1)
+    
+    # Colunas ainda adiadas não foram gravadas agora; o valor atual delas é o do banco
+    adiados = _adiados(movimento)
+    if adiados:
+        movimento.refresh_from_db(fields=adiados)
+    
+    chave_atual = chave(movimento)
+    if chave_atual is not None:
+        valor, quantidade = variacoes[chave_atual]
+        variacoes[chave_atual] = (valor + Decimal(movimento.valor), quantidade + 1)
+    return variacoes
+
+
+def variacao_exclusao(movimento):
+    """
+    Variações causadas pela exclusão do movimento (pelo estado com que foi carregado).
+    """
+    estado = getattr(movimento, '_mensal_estado', None)
+    chave_anterior, valor_anterior = estado if estado is not None else (chave(movimento), movimento.valor)
+    if chave_anterior is None:
+        return {}
+    return {chave_anterior: (-Decimal(valor_anterior), -1)}
+
+
+def reconstruir(inicio=None, fim=None, meses_por_lote=3):
+    """
+    Refaz MovimentoMensal a partir de MovimentoFinanceiro entre os meses `inicio` e `fim`
+    (inclusive; padrão: todo o período com movimentos). Cada lote de meses é apagado e
+    recalculado com uma consulta agrupada na sua própria transação, com os movimentos do
+    lote bloqueados para que gravações concorrentes esperem o fim do lote.
+    Retorna (meses processados, linhas gravadas).
+    """
+    if inicio is None or fim is None:
+        limites = MovimentoFinanceiro.objects.aggregate(inicio=Min('data_movimento'), fim=Max('data_movimento'))
+        if limites['inicio'] is None:
+            return 0, 0
+        inicio = inicio or limites['inicio']
+        fim = fim or limites['fim']
+    inicio, fim = inicio.replace(day=1), fim.replace(day=1)
+    
+    meses = linhas = 0
+    mes = inicio
+    while mes <= fim:
+        proximo = min(somar_meses(mes, meses_por_lote), somar_meses(fim, 1))
+        with transaction.atomic():
+            movimentos = MovimentoFinanceiro.objects.filter(data_movimento__gte=mes, data_movimento__lt=proximo)
+            list(movimentos.select_for_update().values_list('pk', flat=True))
+            
+            MovimentoMensal.objects.filter(ano_mes__gte=mes, ano_mes__lt=proximo).delete()
+            totais = (
+                movimentos
+                .annotate(mes=TruncMonth('data_movimento'))
+                .values('mes', 'tipo', *DIMENSOES)
+                .annotate(total=Sum('valor'), quantidade=Count('id'))
+                .order_by()
+            )
+            objetos = [
+                MovimentoMensal(
+                    ano_mes=total['mes'].date() if hasattr(total['mes'], 'date') else total['mes'],
+                    tipo=total['tipo'],
+                    valor_total=total['total'],
+                    quantidade=total['quantidade'],
+                    **{campo: total[campo] for campo in DIMENSOES},
+                )
+                for total in totais
+            ]
+            MovimentoMensal.objects.bulk_create(objetos, batch_size=1000)
+        
+        linhas += len(objetos)
+        meses += (proximo.year - mes.year) * 12 + proximo.month - mes.month
+        mes = proximo
+    
+    invalidar('financeiro')
+    return meses, linhas
+
+
+def totais_por_mes(inicio, fim, setores=None, **filtros):
+    """
+    {ano_mes: {tipo: total}} entre os meses `inicio` e `fim` (inclusive), lido da consolidação.
+    `filtros` aceita fonte_recurso, setor e rubrica (ids); `setores` restringe a um conjunto de setores.
+    """
+    consulta = MovimentoMensal.objects.filter(
+        ano_mes__gte=inicio.replace(day=1), ano_mes__lte=fim,
+        **{f'{campo}_id': valor for campo, valor in filtros.items() if valor is not None}
+    )
+    if setores is not None:
+        consulta = consulta.filter(setor_id__in=setores)
+    resultado = defaultdict(dict)
+    for ano_mes, tipo, total in (
+        consulta.values('ano_mes', 'tipo').annotate(total=Sum('valor_total')).order_by()
+        .values_list('ano_mes', 'tipo', 'total')
+    ):
+        resultado[ano_mes][tipo] = total
+    return resultado
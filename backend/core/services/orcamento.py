@@ -0,0 +1,370 @@
+"""
+Consultas agregadas sobre a estrutura orçamentária (Fonte → Meta → Atividade → Rubrica).
+
+A árvore é montada com uma consulta por nível e duas agregações agrupadas por rubrica
+(alocações e contratos); os nós são ligados em Python por índices em dicionário e os
+valores alocado/comprometido/pago sobem das rubricas até as fontes.
+
+`verificar_consistencia` confere as mesmas somas contra os limites de cada nível
+(metas dentro da fonte, atividades dentro da meta, rubricas dentro da atividade e
+alocações dentro da rubrica), deixando o agrupamento e o HAVING para o banco.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import F, Sum
+
+from core.models import FonteRecurso, Meta, Atividade, Rubrica, AlocacaoRecurso, Contrato
+from core.services.acesso import chave_setores
+from core.services.cache import chave, versao
+
+ARVORE_CACHE_TIMEOUT = 60 * 5
+
+VALORES = ('alocado', 'comprometido', 'pago')
+
+NIVEIS = ('fonte', 'meta', 'atividade', 'rubrica')
+
+
+def _no(nivel, linha, previsto, rotulo):
+    return {
+        'id': linha['id'],
+        'nivel': nivel,
+        'codigo': linha.get('codigo'),
+        'nome': rotulo,
+        'ativo': linha['ativo'],
+        'previsto': previsto,
+        'alocado': Decimal('0'),
+        'comprometido': Decimal('0'),
+        'pago': Decimal('0'),
+        'filhos': [],
+    }
+
+
+def _filtros(fonte=None, meta=None, atividade=None, apenas_ativos=False):
+    """
+    Filtros de cada nível para restringir a consulta ao ramo pedido.
+    """
+    fontes, metas, atividades, rubricas = {}, {}, {}, {}
+    
+    if atividade is not None:
+        atividades['id'] = atividade
+        rubricas['atividade_id'] = atividade
+    elif meta is not None:
+        metas['id'] = meta
+        atividades['meta_id'] = meta
+        rubricas['atividade__meta_id'] = meta
+    elif fonte is not None:
+        fontes['id'] = fonte
+        metas['fonte_recurso_id'] = fonte
+        atividades['meta__fonte_recurso_id'] = fonte
+        rubricas['atividade__meta__fonte_recurso_id'] = fonte
+    
+    if apenas_ativos:
+        for filtro in (fontes, metas, atividades, rubricas):
+            filtro['ativo'] = True
+    
+    return fontes, metas, atividades, rubricas
+
+
+def montar_arvore(fonte=None, meta=None, atividade=None, apenas_ativos=False, setores=None):
+    """
+    Retorna a lista de nós raiz da árvore orçamentária.
+    
+    Sem filtro, as raízes são as fontes; com `fonte`, `meta` ou `atividade`, a raiz é
+    o nó informado e só o seu ramo é carregado. Cada nó traz `previsto` (valor_total
+    da fonte ou valor_previsto dos demais níveis) e `alocado`, `comprometido` e `pago`
+    somados a partir das rubricas; com `setores` (ids), só alocações e contratos desses
+    setores entram nas somas.
+    """
+    filtro_fontes, filtro_metas, filtro_atividades, filtro_rubricas = _filtros(
+        fonte, meta, atividade, apenas_ativos
+    )
+    
+    if atividade is not None:
+        raiz = 'atividade'
+    elif meta is not None:
+        raiz = 'meta'
+    else:
+        raiz = 'fonte'
+    profundidade = NIVEIS.index(raiz)
+    
+    fontes = {}
+    if profundidade == 0:
+        for linha in FonteRecurso.objects.filter(**filtro_fontes).order_by('nome').values(
+            'id', 'nome', 'valor_total', 'ativo'
+        ):
+            fontes[linha['id']] = _no('fonte', linha, linha['valor_total'], linha['nome'])
+    
+    metas = {}
+    if profundidade <= 1:
+        for linha in Meta.objects.filter(**filtro_metas).order_by('codigo').values(
+            'id', 'fonte_recurso_id', 'codigo', 'descricao', 'valor_previsto', 'ativo'
+        ):
+            no = _no('meta', linha, linha['valor_previsto'], linha['descricao'])
+            pai = fontes.get(linha['fonte_recurso_id'])
+            if pai is not None:
+                pai['filhos'].append(no)
+            elif profundidade == 0:
+                # Pai excluído pelo filtro de ativos: o ramo inteiro fica de fora
+                continue
+            metas[linha['id']] = no
+    
+    atividades = {}
+    for linha in Atividade.objects.filter(**filtro_atividades).order_by('codigo').values(
+        'id', 'meta_id', 'codigo', 'descricao', 'valor_previsto', 'ativo'
+    ):
+        no = _no('atividade', linha, linha['valor_previsto'], linha['descricao'])
+        pai = metas.get(linha['meta_id'])
+        if pai is not None:
+            pai['filhos'].append(no)
+        elif profundidade <= 1:
+            continue
+        atividades[linha['id']] = no
+    
+    rubricas = {}
+    for linha in Rubrica.objects.filter(**filtro_rubricas).order_by('nome').values(
+        'id', 'atividade_id', 'nome', 'valor_previsto', 'ativo'
+    ):
+        no = _no('rubrica', linha, linha['valor_previsto'], linha['nome'])
+        del no['filhos']
+        pai = atividades.get(linha['atividade_id'])
+        if pai is None:
+            continue
+        pai['filhos'].append(no)
+        rubricas[linha['id']] = no
+    
+    if rubricas:
+        _agregar_rubricas(rubricas, filtro_rubricas, setores)
+    
+    raizes = {'fonte': fontes, 'meta': metas, 'atividade': atividades}[raiz]
+    for no in raizes.values():
+        _somar_filhos(no)
+    
+    return list(raizes.values())
+
+
+def _agregar_rubricas(rubricas, filtro_rubricas, setores=None):
+    """
+    Preenche alocado, comprometido e pago das rubricas com duas consultas agrupadas.
+    """
+    filtro = {f'rubrica__{campo}': valor for campo, valor in filtro_rubricas.items()}
+    if setores is not None:
+        filtro['setor__in'] = setores
+    
+    alocado = (
+        AlocacaoRecurso.objects.filter(**filtro)
+        .values('rubrica_id')
+        .annotate(total=Sum('valor_alocado'))
+        .values_list('rubrica_id', 'total')
+    )
+    for rubrica_id, total in alocado:
+        if rubrica_id in rubricas:
+            rubricas[rubrica_id]['alocado'] = total or Decimal('0')
+    
+    contratos = (
+        Contrato.objects.filter(**filtro)
+        .values('rubrica_id')
+        .annotate(comprometido=Sum('valor_total'), pago=Sum('total_pago'))
+        .values_list('rubrica_id', 'comprometido', 'pago')
+    )
+    for rubrica_id, comprometido, pago in contratos:
+        if rubrica_id in rubricas:
+            rubricas[rubrica_id]['comprometido'] = comprometido or Decimal('0')
+            rubricas[rubrica_id]['pago'] = pago or Decimal('0')
+
+
+def _somar_filhos(no):
+    """
+    Soma os valores dos filhos no nó (pós-ordem) e os retorna.
+    """
+    filhos = no.get('filhos')
+    if filhos:
+        for campo in VALORES:
+            no[campo] = Decimal('0')
+        for filho in filhos:
+            _somar_filhos(filho)
+            for campo in VALORES:
+                no[campo] += filho[campo]
+    return no
+
+
+def arvore_em_cache(fonte=None, meta=None, atividade=None, apenas_ativos=False, setores=None):
+    """
+    `montar_arvore` com cache; a chave acompanha as versões de 'estrutura' e 'contratos'
+    e o escopo de `setores`.
+    """
+    chave_cache = chave(
+        'estrutura', 'arvore', versao('contratos'), chave_setores(setores),
+        fonte, meta, atividade, int(bool(apenas_ativos))
+    )
+    arvore = cache.get(chave_cache)
+    if arvore is None:
+        arvore = montar_arvore(fonte, meta, atividade, apenas_ativos, setores)
+        cache.set(chave_cache, arvore, ARVORE_CACHE_TIMEOUT)
+    return arvore
+
+
+# Verificação de consistência: cada regra é uma consulta agrupada que devolve só os
+# nós em que a soma dos filhos ultrapassa o limite do pai (HAVING no banco).
+
+def _violacao(regra, nivel, linha, caminho, limite):
+    total = linha['total']
+    return {
+        'regra': regra,
+        'nivel': nivel,
+        'id': linha['id'],
+        'caminho': caminho,
+        'limite': limite,
+        'total': total,
+        'excesso': total - limite,
+    }
+
+
+def _metas_excedem_fonte(**filtro):
+    consulta = (
+        FonteRecurso.objects.filter(**filtro)
+        .annotate(total=Sum('metas__valor_previsto'))
+        .filter(total__gt=F('valor_total'))
+        .values('id', 'nome', 'valor_total', 'total')
+    )
+    return [
+        _violacao('metas_excedem_fonte', 'fonte', linha, [linha['nome']], linha['valor_total'])
+        for linha in consulta
+    ]
+
+
+def _atividades_excedem_meta(**filtro):
+    consulta = (
+        Meta.objects.filter(**filtro)
+        .annotate(total=Sum('atividades__valor_previsto'))
+        .filter(total__gt=F('valor_previsto'))
+        .values('id', 'codigo', 'valor_previsto', 'total', 'fonte_recurso__nome')
+    )
+    return [
+        _violacao(
+            'atividades_excedem_meta', 'meta', linha,
+            [linha['fonte_recurso__nome'], linha['codigo']], linha['valor_previsto']
+        )
+        for linha in consulta
+    ]
+
+
+def _rubricas_excedem_atividade(**filtro):
+    consulta = (
+        Atividade.objects.filter(**filtro)
+        .annotate(total=Sum('rubricas__valor_previsto'))
+        .filter(total__gt=F('valor_previsto'))
+        .values('id', 'codigo', 'valor_previsto', 'total', 'meta__codigo', 'meta__fonte_recurso__nome')
+    )
+    return [
+        _violacao(
+            'rubricas_excedem_atividade', 'atividade', linha,
+            [linha['meta__fonte_recurso__nome'], linha['meta__codigo'], linha['codigo']],
+            linha['valor_previsto']
+        )
+        for linha in consulta
+    ]
+
+
+def _alocacoes_excedem_rubrica(**filtro):
+    consulta = (
+        Rubrica.objects.filter(**filtro)
+        .annotate(total=Sum('alocacoes__valor_alocado'))
+        .filter(total__gt=F('valor_previsto'))
+        .values(
+            'id', 'nome', 'valor_previsto', 'total', 'atividade__codigo',
+            'atividade__meta__codigo', 'atividade__meta__fonte_recurso__nome'
+        )
+    )
+    return [
+        _violacao(
+            'alocacoes_excedem_rubrica', 'rubrica', linha,
+            [linha['atividade__meta__fonte_recurso__nome'], linha['atividade__meta__codigo'],
+             linha['atividade__codigo'], linha['nome']],
+            linha['valor_previsto']
+        )
+        for linha in consulta
+    ]
+
+
+def _alocacoes_fora_da_fonte(**filtro):
+    """
+    Alocações cuja fonte_recurso difere da fonte a que a rubrica pertence.
+    """
+    consulta = (
+        AlocacaoRecurso.objects.filter(**filtro)
+        .exclude(fonte_recurso_id=F('rubrica__atividade__meta__fonte_recurso_id'))
+        .values(
+            'id', 'fonte_recurso__nome', 'rubrica__nome', 'rubrica__atividade__codigo',
+            'rubrica__atividade__meta__codigo', 'rubrica__atividade__meta__fonte_recurso__nome'
+        )
+    )
+    return [
+        {
+            'regra': 'alocacao_fora_da_fonte',
+            'nivel': 'alocacao',
+            'id': linha['id'],
+            'caminho': [linha['rubrica__atividade__meta__fonte_recurso__nome'],
+                        linha['rubrica__atividade__meta__codigo'],
+                        linha['rubrica__atividade__codigo'], linha['rubrica__nome']],
+            'fonte_alocacao': linha['fonte_recurso__nome'],
+        }
+        for linha in consulta
+    ]
+
+
+def verificar_consistencia(fonte=None, meta=None, atividade=None):
+    """
+    Verifica a árvore inteira (ou o ramo informado) e retorna a lista de violações:
+    metas acima da fonte, atividades acima da meta, rubricas acima da atividade,
+    alocações acima da rubrica e alocações lançadas em fonte diferente da rubrica.
+    
+    São no máximo cinco consultas agrupadas, independentemente do tamanho da árvore.
+    """
+    filtro_fontes, filtro_metas, filtro_atividades, filtro_rubricas = _filtros(fonte, meta, atividade)
+    
+    violacoes = []
+    if meta is None and atividade is None:
+        violacoes += _metas_excedem_fonte(**filtro_fontes)
+    if atividade is None:
+        violacoes += _atividades_excedem_meta(**filtro_metas)
+    violacoes += _rubricas_excedem_atividade(**filtro_atividades)
+    violacoes += _alocacoes_excedem_rubrica(**filtro_rubricas)
+    violacoes += _alocacoes_fora_da_fonte(
+        **{f'rubrica__{campo}': valor for campo, valor in filtro_rubricas.items()}
+    )
+    return violacoes
+
+
+def verificar_no(instancia):
+    """
+    Verificação incremental após gravar um nó: só as regras em que ele entra, como
+    filho (limite do pai) e como pai (soma dos próprios filhos).
+    """
+    if isinstance(instancia, FonteRecurso):
+        return _metas_excedem_fonte(pk=instancia.pk)
+    if isinstance(instancia, Meta):
+        return (_metas_excedem_fonte(pk=instancia.fonte_recurso_id)
+                + _atividades_excedem_meta(pk=instancia.pk))
+    if isinstance(instancia, Atividade):
+        return (_atividades_excedem_meta(pk=instancia.meta_id)
+                + _rubricas_excedem_atividade(pk=instancia.pk))
+    if isinstance(instancia, Rubrica):
+        return (_rubricas_excedem_atividade(pk=instancia.atividade_id)
+                + _alocacoes_excedem_rubrica(pk=instancia.pk))
+    if isinstance(instancia, AlocacaoRecurso):
+        return (_alocacoes_excedem_rubrica(pk=instancia.rubrica_id)
+                + _alocacoes_fora_da_fonte(pk=instancia.pk))
+    return []
+
+
+def descrever_violacao(violacao):
+    """
+    Texto de uma linha para logs e para o comando de verificação.
+    """
+    caminho = ' / '.join(str(parte) for parte in violacao['caminho'])
+    if violacao['regra'] == 'alocacao_fora_da_fonte':
+        return (f"{caminho}: alocação {violacao['id']} lançada na fonte "
+                f"'{violacao['fonte_alocacao']}'")
+    return (f"{caminho}: {violacao['regra']} (total {violacao['total']} > limite "
+            f"{violacao['limite']}, excesso {violacao['excesso']})")
@@ -0,0 +1,188 @@
+"""
+Pagamento de parcelas em lote.
+
+Em vez de um save() por parcela, um recálculo de total_pago e um contrato.save() por
+pagamento, o lote marca as parcelas com um único UPDATE, ajusta total_pago dos
+contratos afetados com um UPDATE agrupado e grava os movimentos com bulk_create,
+tudo na mesma transação.
+
+total_pago é mantido por variação (`F('total_pago') + delta`) na mesma transação
+da mudança de status da parcela; o comando reconciliar_total_pago corrige desvios.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import Contrato, MovimentoFinanceiro, ParcelaContrato
+from core.services import auditoria, movimento_mensal
+from core.services.cache import invalidar
+
+LIMITE_LOTE = 5000
+
+
+def _erro(parcela_id, mensagem):
+    return {'parcela': parcela_id, 'resultado': 'erro', 'detail': mensagem}
+
+
+def registrar_pagamentos_lote(parcela_ids, usuario, data_pagamento=None,
+                              atividade_pagamento=None, observacao=None, setores=None):
+    """
+    Marca como pagas as parcelas informadas e retorna um resultado por parcela, na
+    ordem recebida. Parcelas inexistentes ou já pagas são reportadas como erro e não
+    impedem o pagamento das demais. `atividade_pagamento` e `observacao` só são
+    gravados quando informados. Com `setores` (ids), parcelas de contratos de outros
+    setores são tratadas como inexistentes.
+    """
+    data_pagamento = data_pagamento or timezone.localdate()
+    ids = list(dict.fromkeys(parcela_ids))
+    resultados = {}
+    
+    consulta = ParcelaContrato.objects.filter(pk__in=ids)
+    if setores is not None:
+        consulta = consulta.filter(contrato__setor__in=setores)
+    
+    with transaction.atomic():
+        parcelas = {
+            parcela.pk: parcela
+            for parcela in consulta
+            .select_for_update(of=('self', 'contrato'))
+            .select_related('contrato__meta')
+            .order_by('pk')
+        }
+        
+        pagaveis = []
+        for parcela_id in ids:
+            parcela = parcelas.get(parcela_id)
+            if parcela is None:
+                resultados[parcela_id] = _erro(parcela_id, 'Parcela não encontrada.')
+            elif parcela.status == 'pago':
+                resultados[parcela_id] = _erro(parcela_id, 'Esta parcela já foi paga.')
+            else:
+                pagaveis.append(parcela)
+        
+        if pagaveis:
+            _pagar(pagaveis, usuario, data_pagamento, atividade_pagamento, observacao)
+            for parcela in pagaveis:
+                resultados[parcela.pk] = {
+                    'parcela': parcela.pk,
+                    'resultado': 'pago',
+                    'contrato': parcela.contrato_id,
+                    'valor': parcela.valor,
+                }
+    
+    return [resultados[parcela_id] for parcela_id in ids]
+
+
+def _pagar(parcelas, usuario, data_pagamento, atividade_pagamento, observacao):
+    campos = {'status': 'pago', 'data_pagamento': data_pagamento}
+    if atividade_pagamento is not None:
+        campos['atividade_pagamento'] = atividade_pagamento
+    if observacao is not None:
+        campos['observacao'] = observacao
+    
+    ParcelaContrato.objects.filter(pk__in=[parcela.pk for parcela in parcelas]).update(**campos)
+    auditoria.registrar_alteracoes(ParcelaContrato, [
+        (
+            parcela.pk,
+            {campo: getattr(parcela, campo) for campo in campos},
+            campos,
+        )
+        for parcela in parcelas
+    ])
+    
+    contratos = {parcela.contrato_id: parcela.contrato for parcela in parcelas}
+    deltas = defaultdict(Decimal)
+    for parcela in parcelas:
+        deltas[parcela.contrato_id] += parcela.valor
+    ajustar_total_pago_auditado(contratos, deltas)
+    
+    movimentos = MovimentoFinanceiro.objects.bulk_create([
+        MovimentoFinanceiro(
+            tipo='saida',
+            fonte_recurso_id=parcela.contrato.meta.fonte_recurso_id,
+            setor_id=parcela.contrato.setor_id,
+            rubrica_id=parcela.contrato.rubrica_id,
+            contrato_id=parcela.contrato_id,
+            parcela=parcela,
+            valor=parcela.valor,
+            data_movimento=data_pagamento,
+            descricao=f"Pagamento da parcela {parcela.numero_parcela} do contrato {parcela.contrato.nome_curso_acao}",
+            usuario=usuario,
+        )
+        for parcela in parcelas
+    ], batch_size=500)
+    movimento_mensal.registrar(movimentos)
+
+
+def contribuicao(parcela):
+    """
+    Quanto a parcela soma em total_pago do contrato.
+    """
+    return parcela.valor if parcela.status == 'pago' else Decimal('0')
+
+
+def ajustar_total_pago(deltas):
+    """
+    Aplica variações a total_pago com um único UPDATE (`F('total_pago') + delta`), sem
+    reagregar as parcelas. `deltas` mapeia contrato_id -> Decimal. Deve rodar na mesma
+    transação da mudança de status das parcelas.
+    """
+    deltas = {contrato_id: delta for contrato_id, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+    
+    campo = DecimalField(max_digits=15, decimal_places=2)
+    if len(deltas) == 1:
+        variacao = Value(next(iter(deltas.values())), output_field=campo)
+    else:
+        variacao = Case(
+            *[When(pk=contrato_id, then=Value(delta, output_field=campo)) for contrato_id, delta in deltas.items()],
+            default=Value(Decimal('0'), output_field=campo),
+            output_field=campo,
+        )
+    
+    atualizados = Contrato.objects.filter(pk__in=list(deltas)).update(
+        total_pago=F('total_pago') + variacao,
+        atualizado_em=timezone.now(),
+    )
+    transaction.on_commit(lambda: invalidar('contratos'))
+    return atualizados
+
+
+def ajustar_total_pago_auditado(contratos, deltas):
+    """
+    `ajustar_total_pago` registrando a alteração na auditoria. `contratos` mapeia
+    id -> instância carregada com a linha bloqueada (select_for_update), de modo que
+    total_pago + delta é o valor gravado.
+    """
+    ajustar_total_pago(deltas)
+    auditoria.registrar_alteracoes(Contrato, [
+        (
+            contrato_id,
+            {'total_pago': contratos[contrato_id].total_pago},
+            {'total_pago': contratos[contrato_id].total_pago + delta},
+        )
+        for contrato_id, delta in deltas.items()
+        if delta
+    ])
+
+
+def total_pago_calculado():
+    """
+    Expressão com a soma das parcelas pagas do contrato, para anotar ou atualizar Contrato.
+    """
+    pagos = (
+        ParcelaContrato.objects.filter(contrato=OuterRef('pk'), status='pago')
+        .order_by()
+        .values('contrato')
+        .annotate(total=Sum('valor'))
+        .values('total')
+    )
+    return Coalesce(
+        Subquery(pagos), Value(Decimal('0')),
+        output_field=DecimalField(max_digits=15, decimal_places=2)
+    )
@@ -0,0 +1,214 @@
+"""
+Projeção de fluxo de caixa a partir do cronograma de parcelas dos contratos.
+
+Para cada (setor, fonte, rubrica, mês) do horizonte, o previsto é a soma das parcelas
+com `data_prevista` no mês e o realizado é a soma das saídas de MovimentoFinanceiro no
+mês. Os dois lados são calculados com uma consulta agrupada cada e gravados em
+ProjecaoOrcamentaria por upsert (`bulk_create(update_conflicts=True)`), junto com o
+pendente (parte do previsto em parcelas não pagas).
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from core.models import ParcelaContrato, MovimentoFinanceiro, ProjecaoOrcamentaria
+
+ZERO = Decimal('0')
+
+
+def somar_meses(data, meses):
+    """
+    Primeiro dia do mês `meses` depois (ou antes, se negativo) do mês de `data`.
+    """
+    indice = data.year * 12 + data.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def janela(inicio=None, meses=None):
+    """
+    Normaliza o horizonte: (primeiro dia do mês inicial, primeiro dia após o último mês).
+    """
+    meses = meses or settings.PROJECAO_HORIZONTE_MESES
+    meses = max(1, min(meses, settings.PROJECAO_HORIZONTE_MAXIMO))
+    inicio = (inicio or timezone.localdate()).replace(day=1)
+    return inicio, somar_meses(inicio, meses)
+
+
+def _mes(valor):
+    # TruncMonth devolve datetime em alguns bancos mesmo para DateField
+    return valor.date() if hasattr(valor, 'date') else valor
+
+
+def calcular_projecoes(inicio=None, meses=None, setor=None):
+    """
+    Retorna {(setor_id, fonte_id, rubrica_id, mes): {'previsto', 'pendente', 'realizado'}}
+    para o horizonte. `pendente` é a parte do previsto em parcelas ainda não pagas.
+    """
+    inicio, fim = janela(inicio, meses)
+    resultado = {}
+    
+    def linha(chave):
+        if chave not in resultado:
+            resultado[chave] = {'previsto': ZERO, 'pendente': ZERO, 'realizado': ZERO}
+        return resultado[chave]
+    
+    parcelas = (
+        ParcelaContrato.objects
+        .filter(data_prevista__gte=inicio, data_prevista__lt=fim)
+        .exclude(contrato__status_contrato='cancelado')
+    )
+    if setor is not None:
+        parcelas = parcelas.filter(contrato__setor_id=setor)
+    parcelas = (
+        parcelas
+        .annotate(mes=TruncMonth('data_prevista'))
+        .values('contrato__setor_id', 'contrato__meta__fonte_recurso_id', 'contrato__rubrica_id', 'mes')
+        .annotate(previsto=Sum('valor'), pendente=Sum('valor', filter=Q(status='pendente')))
+        .order_by()
+        .values_list(
+            'contrato__setor_id', 'contrato__meta__fonte_recurso_id', 'contrato__rubrica_id',
+            'mes', 'previsto', 'pendente'
+        )
+    )
+    for setor_id, fonte_id, rubrica_id, mes, previsto, pendente in parcelas:
+        item = linha((setor_id, fonte_id, rubrica_id, _mes(mes)))
+        item['previsto'] = previsto or ZERO
+        item['pendente'] = pendente or ZERO
+    
+    movimentos = MovimentoFinanceiro.objects.filter(
+        tipo='saida',
+        data_movimento__gte=inicio,
+        data_movimento__lt=fim,
+        setor__isnull=False,
+        fonte_recurso__isnull=False,
+        rubrica__isnull=False,
+    )
+    if setor is not None:
+        movimentos = movimentos.filter(setor_id=setor)
+    movimentos = (
+        movimentos
+        .annotate(mes=TruncMonth('data_movimento'))
+        .values('setor_id', 'fonte_recurso_id', 'rubrica_id', 'mes')
+        .annotate(realizado=Sum('valor'))
+        .order_by()
+        .values_list('setor_id', 'fonte_recurso_id', 'rubrica_id', 'mes', 'realizado')
+    )
+    for setor_id, fonte_id, rubrica_id, mes, realizado in movimentos:
+        linha((setor_id, fonte_id, rubrica_id, _mes(mes)))['realizado'] = realizado or ZERO
+    
+    return resultado
+
+
+def atualizar_projecoes(usuario, inicio=None, meses=None, setor=None, lote=1000):
+    """
+    Grava as projeções calculadas em ProjecaoOrcamentaria (insere ou atualiza previsto,
+    pendente e realizado pela chave setor/fonte/rubrica/mês). Linhas da janela recalculada
+    que ficaram sem parcelas e sem movimentos são zeradas; fora da janela (ou de `setor`,
+    se informado) nada é tocado. Retorna a quantidade de linhas gravadas.
+    """
+    inicio, fim = janela(inicio, meses)
+    projecoes = calcular_projecoes(inicio, meses, setor)
+    objetos = [
+        ProjecaoOrcamentaria(
+            setor_id=setor_id,
+            fonte_recurso_id=fonte_id,
+            rubrica_id=rubrica_id,
+            mes_referencia=mes,
+            valor_previsto=valores['previsto'],
+            valor_pendente=valores['pendente'],
+            valor_realizado=valores['realizado'],
+            criado_por=usuario,
+        )
+        for (setor_id, fonte_id, rubrica_id, mes), valores in projecoes.items()
+    ]
+    
+    recalculadas = ProjecaoOrcamentaria.objects.filter(mes_referencia__gte=inicio, mes_referencia__lt=fim)
+    if setor is not None:
+        recalculadas = recalculadas.filter(setor_id=setor)
+    
+    with transaction.atomic():
+        # Zera a janela antes do upsert: as linhas ainda com valores são regravadas em seguida
+        recalculadas.update(
+            valor_previsto=ZERO, valor_pendente=ZERO, valor_realizado=ZERO, data_atualizacao=timezone.now()
+        )
+        ProjecaoOrcamentaria.objects.bulk_create(
+            objetos,
+            batch_size=lote,
+            update_conflicts=True,
+            unique_fields=['setor', 'fonte_recurso', 'rubrica', 'mes_referencia'],
+            update_fields=['valor_previsto', 'valor_pendente', 'valor_realizado', 'data_atualizacao'],
+        )
+    return len(objetos)
+
+
+def relatorio_variacao(inicio=None, meses=None, setores=None, **filtros):
+    """
+    Compara previsto e realizado gravados em ProjecaoOrcamentaria no horizonte.
+    `filtros` aceita setor, fonte_recurso e rubrica (ids); `setores` restringe a um
+    conjunto de setores (escopo do usuário).
+    
+    Retorna as linhas com pendente, variação absoluta e percentual e os totais por mês.
+    """
+    inicio, fim = janela(inicio, meses)
+    consulta = ProjecaoOrcamentaria.objects.filter(
+        mes_referencia__gte=inicio, mes_referencia__lt=fim,
+        **{f'{campo}_id': valor for campo, valor in filtros.items() if valor is not None}
+    )
+    if setores is not None:
+        consulta = consulta.filter(setor__in=setores)
+    consulta = consulta.order_by('mes_referencia', 'setor__nome', 'rubrica__nome').values(
+        'id', 'mes_referencia', 'setor_id', 'setor__nome', 'fonte_recurso_id',
+        'fonte_recurso__nome', 'rubrica_id', 'rubrica__nome', 'valor_previsto', 'valor_pendente',
+        'valor_realizado'
+    )
+    
+    linhas = []
+    meses_totais = {}
+    for projecao in consulta:
+        previsto, realizado = projecao['valor_previsto'], projecao['valor_realizado']
+        linhas.append({
+            'id': projecao['id'],
+            'mes_referencia': projecao['mes_referencia'],
+            'setor': projecao['setor_id'],
+            'setor_nome': projecao['setor__nome'],
+            'fonte_recurso': projecao['fonte_recurso_id'],
+            'fonte_recurso_nome': projecao['fonte_recurso__nome'],
+            'rubrica': projecao['rubrica_id'],
+            'rubrica_nome': projecao['rubrica__nome'],
+            'valor_previsto': previsto,
+            'valor_pendente': projecao['valor_pendente'],
+            'valor_realizado': realizado,
+            'variacao': realizado - previsto,
+            'variacao_percentual': _percentual(realizado - previsto, previsto),
+        })
+        total = meses_totais.setdefault(
+            projecao['mes_referencia'], {'previsto': ZERO, 'pendente': ZERO, 'realizado': ZERO}
+        )
+        total['previsto'] += previsto
+        total['pendente'] += projecao['valor_pendente']
+        total['realizado'] += realizado
+    
+    totais = [
+        {
+            'mes_referencia': mes,
+            'valor_previsto': total['previsto'],
+            'valor_pendente': total['pendente'],
+            'valor_realizado': total['realizado'],
+            'variacao': total['realizado'] - total['previsto'],
+            'variacao_percentual': _percentual(total['realizado'] - total['previsto'], total['previsto']),
+        }
+        for mes, total in meses_totais.items()
+    ]
+    
+    return {'inicio': inicio, 'fim': somar_meses(fim, -1), 'linhas': linhas, 'totais_por_mes': totais}
+
+
+def _percentual(variacao, base):
+    if not base:
+        return None
+    return round(float(variacao / base * 100), 2)
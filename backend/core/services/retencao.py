@@ -0,0 +1,99 @@
+"""
+Políticas de retenção para tabelas que só recebem inserções
+(notificações, auditoria, histórico de processos).
+"""
+import gzip
+import json
+import logging
+import os
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger('core')
+
+ACOES_VALIDAS = ('excluir', 'arquivar')
+
+
+def obter_politicas():
+    """
+    Retorna as políticas configuradas em RETENCAO_POLITICAS.
+    """
+    return getattr(settings, 'RETENCAO_POLITICAS', {})
+
+
+def queryset_expirado(politica, referencia=None):
+    """
+    Monta o queryset de registros que já passaram do prazo de retenção da política.
+    """
+    modelo = apps.get_model(politica['modelo'])
+    limite = (referencia or timezone.now()) - timedelta(days=politica['dias'])
+    
+    filtros = {f"{politica['campo_data']}__lt": limite}
+    filtros.update(politica.get('filtro', {}))
+    
+    return modelo.objects.filter(**filtros)
+
+
+def _abrir_arquivo(nome):
+    diretorio = getattr(settings, 'RETENCAO_DIRETORIO_ARQUIVO', os.path.join(settings.BASE_DIR, 'arquivo'))
+    os.makedirs(diretorio, exist_ok=True)
+    
+    caminho = os.path.join(diretorio, f"{nome}-{timezone.now().strftime('%Y%m%d%H%M%S')}.jsonl.gz")
+    return caminho, gzip.open(caminho, 'wt', encoding='utf-8')
+
+
+def aplicar_politica(nome, politica, lote=1000, simular=False, referencia=None):
+    """
+    Aplica uma política de retenção em lotes de `lote` registros.
+    
+    Cada lote é processado em sua própria transação, de modo que a limpeza de
+    tabelas grandes não segura locks por muito tempo. Com a ação 'arquivar',
+    os registros são gravados em JSON Lines compactado antes de serem excluídos.
+    Retorna a quantidade de registros afetados (ou que seriam afetados, ao simular).
+    """
+    acao = politica.get('acao', 'excluir')
+    if acao not in ACOES_VALIDAS:
+        raise ValueError(f"Ação de retenção inválida para '{nome}': {acao}")
+    
+    queryset = queryset_expirado(politica, referencia).order_by('pk')
+    
+    if simular:
+        return queryset.count()
+    
+    modelo = queryset.model
+    total = 0
+    caminho, arquivo = None, None
+    
+    try:
+        while True:
+            with transaction.atomic():
+                ids = list(queryset.values_list('pk', flat=True)[:lote])
+                if not ids:
+                    break
+                
+                if acao == 'arquivar':
+                    if arquivo is None:
+                        caminho, arquivo = _abrir_arquivo(nome)
+                    for registro in modelo.objects.filter(pk__in=ids).values().iterator():
+                        arquivo.write(json.dumps(registro, cls=DjangoJSONEncoder))
+                        arquivo.write('\n')
+                
+                modelo.objects.filter(pk__in=ids).delete()
+            
+            total += len(ids)
+    finally:
+        if arquivo is not None:
+            arquivo.close()
+    
+    if total:
+        logger.info(
+            "Retenção '%s': %s registros processados (%s)%s",
+            nome, total, acao, f" em {caminho}" if caminho else ''
+        )
+    
+    return total
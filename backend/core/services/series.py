@@ -0,0 +1,202 @@
+"""
+Séries temporais de indicadores financeiros para gráficos.
+
+Cada métrica é uma consulta agrupada por período (Trunc* no banco) e, opcionalmente,
+por uma dimensão (setor, fonte, rubrica ou tipo). O resultado é denso: todos os
+períodos do intervalo aparecem, com zero onde não houve valor, na mesma ordem em
+todas as séries. Entradas, saídas e saldo com granularidade mensal ou maior são lidos
+da consolidação MovimentoMensal em vez do razão de movimentos.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, When
+from django.db.models.functions import TruncDay, TruncMonth, TruncQuarter, TruncWeek, TruncYear
+
+from core.models import (
+    Contrato, FonteRecurso, MovimentoFinanceiro, MovimentoMensal, ParcelaContrato, Rubrica, Setor
+)
+from core.services.cache import chave, versao
+from core.services.projecao import somar_meses
+
+ZERO = Decimal('0')
+
+GRANULARIDADES = {
+    'dia': TruncDay,
+    'semana': TruncWeek,
+    'mes': TruncMonth,
+    'trimestre': TruncQuarter,
+    'ano': TruncYear,
+}
+AGRUPAMENTOS = ('setor', 'fonte', 'rubrica', 'tipo')
+
+# Modelo e campo de nome de cada dimensão (tipo usa o próprio valor como nome)
+_NOMES = {
+    'setor': (Setor, 'nome'),
+    'fonte': (FonteRecurso, 'nome'),
+    'rubrica': (Rubrica, 'nome'),
+}
+
+
+def inicio_periodo(data, granularidade):
+    """
+    Primeiro dia do período de `granularidade` que contém `data`.
+    """
+    if granularidade == 'dia':
+        return data
+    if granularidade == 'semana':
+        return data - timedelta(days=data.weekday())
+    if granularidade == 'mes':
+        return data.replace(day=1)
+    if granularidade == 'trimestre':
+        return data.replace(month=(data.month - 1) // 3 * 3 + 1, day=1)
+    return data.replace(month=1, day=1)
+
+
+def proximo_periodo(data, granularidade):
+    if granularidade == 'dia':
+        return data + timedelta(days=1)
+    if granularidade == 'semana':
+        return data + timedelta(days=7)
+    return somar_meses(data, {'mes': 1, 'trimestre': 3, 'ano': 12}[granularidade])
+
+
+def periodos(inicio, fim, granularidade):
+    """
+    Inícios de período de `inicio` até `fim` (inclusive). Levanta ValueError se o intervalo
+    tiver mais pontos que SERIES_MAX_PONTOS.
+    """
+    limite = settings.SERIES_MAX_PONTOS
+    atual = inicio_periodo(inicio, granularidade)
+    resultado = []
+    while atual <= fim:
+        resultado.append(atual)
+        if len(resultado) > limite:
+            raise ValueError(f'O intervalo gera mais de {limite} pontos; use uma granularidade maior.')
+        atual = proximo_periodo(atual, granularidade)
+    return resultado
+
+
+def _data(valor):
+    # Trunc* devolve datetime em alguns bancos mesmo para DateField
+    return valor.date() if hasattr(valor, 'date') else valor
+
+
+def _origem(metrica, granularidade):
+    """
+    (queryset, campo de data, expressão agregada, campos das dimensões) da métrica.
+    """
+    campo_valor = DecimalField(max_digits=17, decimal_places=2)
+    
+    if metrica in ('contratado', 'contratos'):
+        consulta = Contrato.objects.exclude(status_contrato='cancelado')
+        agregado = Count('id') if metrica == 'contratos' else Sum('valor_total')
+        dimensoes = {'setor': 'setor_id', 'fonte': 'meta__fonte_recurso_id', 'rubrica': 'rubrica_id', 'tipo': 'tipo'}
+        return consulta, 'data_inicio', agregado, dimensoes
+    
+    if metrica == 'pago':
+        consulta = ParcelaContrato.objects.filter(status='pago', data_pagamento__isnull=False)
+        dimensoes = {
+            'setor': 'contrato__setor_id', 'fonte': 'contrato__meta__fonte_recurso_id',
+            'rubrica': 'contrato__rubrica_id', 'tipo': 'contrato__tipo',
+        }
+        return consulta, 'data_pagamento', Sum('valor'), dimensoes
+    
+    # Entradas, saídas e saldo: consolidação mensal quando a granularidade permite
+    mensal = granularidade in ('mes', 'trimestre', 'ano')
+    if mensal:
+        consulta, campo_data, valor = MovimentoMensal.objects.all(), 'ano_mes', 'valor_total'
+    else:
+        consulta, campo_data, valor = MovimentoFinanceiro.objects.all(), 'data_movimento', 'valor'
+    dimensoes = {'setor': 'setor_id', 'fonte': 'fonte_recurso_id', 'rubrica': 'rubrica_id', 'tipo': 'tipo'}
+    
+    if metrica == 'entradas':
+        return consulta.filter(tipo='entrada'), campo_data, Sum(valor), dimensoes
+    if metrica == 'saidas':
+        return consulta.filter(tipo='saida'), campo_data, Sum(valor), dimensoes
+    
+    consulta = consulta.filter(Q(tipo='entrada') | Q(tipo='saida'))
+    assinado = Case(
+        When(tipo='entrada', then=F(valor)),
+        default=-F(valor),
+        output_field=campo_valor,
+    )
+    return consulta, campo_data, Sum(assinado), dimensoes
+
+
+def _nomes(agrupamento, ids):
+    if agrupamento == 'tipo':
+        return {valor: valor for valor in ids}
+    modelo, campo = _NOMES[agrupamento]
+    return dict(modelo.objects.filter(pk__in=[i for i in ids if i is not None]).values_list('pk', campo))
+
+
+def calcular_serie(metrica, granularidade, inicio, fim, agrupamento=None, setores=None):
+    """
+    Série densa da métrica entre `inicio` e `fim`, expandidos para períodos completos.
+    Retorna {'periodos': [...], 'total': [...], 'series': [{'id', 'nome', 'valores'}, ...]}
+    com os valores alinhados aos períodos. `setores` (ids) restringe os dados a esses setores.
+    """
+    pontos = periodos(inicio, fim, granularidade)
+    inicio, fim = pontos[0], proximo_periodo(pontos[-1], granularidade)
+    posicao = {periodo: indice for indice, periodo in enumerate(pontos)}
+    zero = 0 if metrica == 'contratos' else ZERO
+    
+    consulta, campo_data, agregado, dimensoes = _origem(metrica, granularidade)
+    if setores is not None:
+        consulta = consulta.filter(**{f"{dimensoes['setor']}__in": setores})
+    campos = ['periodo'] + ([dimensoes[agrupamento]] if agrupamento else [])
+    linhas = (
+        consulta
+        .filter(**{f'{campo_data}__gte': inicio, f'{campo_data}__lt': fim})
+        .annotate(periodo=GRANULARIDADES[granularidade](campo_data))
+        .values(*campos)
+        .annotate(total=agregado)
+        .order_by()
+        .values_list(*campos, 'total')
+    )
+    
+    total = [zero] * len(pontos)
+    series = {}
+    for linha in linhas:
+        indice = posicao.get(_data(linha[0]))
+        if indice is None:
+            continue
+        valor = linha[-1] or zero
+        total[indice] += valor
+        if agrupamento:
+            valores = series.setdefault(linha[1], [zero] * len(pontos))
+            valores[indice] += valor
+    
+    resultado = {'periodos': pontos, 'total': total}
+    if agrupamento:
+        nomes = _nomes(agrupamento, list(series))
+        resultado['series'] = sorted(
+            (
+                {'id': grupo, 'nome': nomes.get(grupo) or 'Não informado', 'valores': valores}
+                for grupo, valores in series.items()
+            ),
+            key=lambda serie: str(serie['nome'])
+        )
+    return resultado
+
+
+def serie_em_cache(metrica, granularidade, inicio, fim, agrupamento=None, acesso=None):
+    """
+    `calcular_serie` com cache pelos parâmetros normalizados e pelo escopo de `acesso`
+    (ContextoAcesso; None = todos os setores); a chave acompanha as versões de
+    'financeiro' (movimentos) e 'contratos' (contratos e parcelas).
+    """
+    setores = acesso.setores if acesso is not None else None
+    chave_cache = chave(
+        'financeiro', 'serie', versao('contratos'), acesso.chave if acesso is not None else 'todos',
+        metrica, granularidade, inicio_periodo(inicio, granularidade).isoformat(),
+        inicio_periodo(fim, granularidade).isoformat(), agrupamento or '-'
+    )
+    serie = cache.get(chave_cache)
+    if serie is None:
+        serie = calcular_serie(metrica, granularidade, inicio, fim, agrupamento, setores)
+        cache.set(chave_cache, serie, settings.SERIES_CACHE_TIMEOUT)
+    return serie
@@ -0,0 +1,209 @@
+"""
+Simulação de cenários orçamentários sem gravar no banco.
+
+O razão (alocado e comprometido por setor/rubrica) é carregado com duas consultas
+agrupadas, restritas aos setores e rubricas citados nas operações, e guardado em
+arrays de centavos (inteiros) indexados por (setor, rubrica). As operações hipotéticas
+são aplicadas em memória e o resultado traz os saldos finais e as posições que
+ficaram negativas, com o passo em que isso aconteceu.
+"""
+from array import array
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import Sum
+
+from core.models import AlocacaoRecurso, Contrato
+
+# tipo de operação -> campos obrigatórios (além de 'valor')
+OPERACOES = {
+    'transferencia': ('setor_origem', 'setor_destino', 'rubrica'),
+    'alocacao': ('setor', 'rubrica'),
+    'contrato': ('setor', 'rubrica'),
+}
+
+# Maior valor aceito por operação, em centavos: o mesmo teto dos campos DecimalField(15, 2)
+VALOR_MAXIMO_CENTAVOS = 10 ** 15 - 1
+
+
+def _centavos(valor):
+    return int(Decimal(valor).quantize(Decimal('0.01')) * 100)
+
+
+def _reais(centavos):
+    return (Decimal(centavos) / 100).quantize(Decimal('0.01'))
+
+
+class RazaoOrcamentario:
+    """
+    Saldos por (setor, rubrica) em centavos: alocado[i] e comprometido[i] para a
+    posição i = indice[(setor_id, rubrica_id)].
+    """
+    
+    def __init__(self):
+        self.indice = {}
+        self.chaves = []
+        self.alocado = array('q')
+        self.comprometido = array('q')
+    
+    @classmethod
+    def carregar(cls, setores=None, rubricas=None):
+        razao = cls()
+        filtro = {}
+        if setores is not None:
+            filtro['setor_id__in'] = setores
+        if rubricas is not None:
+            filtro['rubrica_id__in'] = rubricas
+        
+        alocacoes = (
+            AlocacaoRecurso.objects.filter(**filtro)
+            .values('setor_id', 'rubrica_id')
+            .annotate(total=Sum('valor_alocado'))
+            .order_by()
+            .values_list('setor_id', 'rubrica_id', 'total')
+        )
+        for setor_id, rubrica_id, total in alocacoes:
+            razao.alocado[razao.posicao(setor_id, rubrica_id)] += _centavos(total or 0)
+        
+        # Mesmo critério de Contrato.clean(): todo contrato do setor/rubrica compromete saldo
+        contratos = (
+            Contrato.objects.filter(**filtro)
+            .values('setor_id', 'rubrica_id')
+            .annotate(total=Sum('valor_total'))
+            .order_by()
+            .values_list('setor_id', 'rubrica_id', 'total')
+        )
+        for setor_id, rubrica_id, total in contratos:
+            razao.comprometido[razao.posicao(setor_id, rubrica_id)] += _centavos(total or 0)
+        
+        return razao
+    
+    def posicao(self, setor_id, rubrica_id):
+        chave = (setor_id, rubrica_id)
+        posicao = self.indice.get(chave)
+        if posicao is None:
+            posicao = self.indice[chave] = len(self.chaves)
+            self.chaves.append(chave)
+            self.alocado.append(0)
+            self.comprometido.append(0)
+        return posicao
+    
+    def saldo(self, posicao):
+        return self.alocado[posicao] - self.comprometido[posicao]
+    
+    def posicoes(self, operacao):
+        """
+        Posições afetadas pela operação (criadas com saldo zero se ainda não existirem).
+        """
+        if operacao['tipo'] == 'transferencia':
+            return (
+                self.posicao(operacao['setor_origem'], operacao['rubrica']),
+                self.posicao(operacao['setor_destino'], operacao['rubrica']),
+            )
+        return (self.posicao(operacao['setor'], operacao['rubrica']),)
+    
+    def aplicar(self, operacao, posicoes):
+        tipo, valor = operacao['tipo'], operacao['valor']
+        if tipo == 'transferencia':
+            origem, destino = posicoes
+            self.alocado[origem] -= valor
+            self.alocado[destino] += valor
+        elif tipo == 'alocacao':
+            self.alocado[posicoes[0]] += valor
+        else:
+            self.comprometido[posicoes[0]] += valor
+
+
+def normalizar_operacoes(operacoes):
+    """
+    Valida as operações recebidas e converte valores para centavos (limitados a
+    VALOR_MAXIMO_CENTAVOS). Levanta ValueError com o índice da primeira operação inválida.
+    """
+    limite = settings.SIMULACAO_MAX_OPERACOES
+    if len(operacoes) > limite:
+        raise ValueError(f'No máximo {limite} operações por simulação.')
+    
+    normalizadas = []
+    for passo, operacao in enumerate(operacoes):
+        if not isinstance(operacao, dict):
+            raise ValueError(f'Operação {passo}: formato inválido.')
+        tipo = operacao.get('tipo')
+        if tipo not in OPERACOES:
+            raise ValueError(f"Operação {passo}: tipo deve ser um de {', '.join(OPERACOES)}.")
+        
+        normalizada = {'tipo': tipo}
+        for campo in OPERACOES[tipo]:
+            try:
+                normalizada[campo] = int(operacao[campo])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Operação {passo}: '{campo}' deve ser um id inteiro.")
+        try:
+            normalizada['valor'] = _centavos(str(operacao['valor']))
+        except (KeyError, InvalidOperation, ValueError):
+            raise ValueError(f"Operação {passo}: 'valor' deve ser numérico.")
+        if abs(normalizada['valor']) > VALOR_MAXIMO_CENTAVOS:
+            raise ValueError(f"Operação {passo}: 'valor' excede o máximo de {_reais(VALOR_MAXIMO_CENTAVOS)}.")
+        if tipo == 'transferencia' and normalizada['valor'] <= 0:
+            raise ValueError(f"Operação {passo}: transferências devem ter valor positivo.")
+        
+        normalizadas.append(normalizada)
+    return normalizadas
+
+
+def simular(operacoes):
+    """
+    Aplica as operações hipotéticas sobre o razão atual e retorna os saldos das
+    posições tocadas e as violações (saldo negativo ao final), sem gravar nada.
+    Operações inválidas ou somas que estourem os arrays levantam ValueError.
+    """
+    operacoes = normalizar_operacoes(operacoes)
+    
+    setores, rubricas = set(), set()
+    for operacao in operacoes:
+        rubricas.add(operacao['rubrica'])
+        for campo in ('setor', 'setor_origem', 'setor_destino'):
+            if campo in operacao:
+                setores.add(operacao[campo])
+    
+    razao = RazaoOrcamentario.carregar(setores, rubricas)
+    saldo_inicial = {}
+    primeiro_negativo = {}
+    
+    for passo, operacao in enumerate(operacoes):
+        posicoes = razao.posicoes(operacao)
+        for posicao in posicoes:
+            if posicao not in saldo_inicial:
+                saldo_inicial[posicao] = razao.saldo(posicao)
+        try:
+            razao.aplicar(operacao, posicoes)
+        except OverflowError:
+            # Somas acumuladas além do que cabe nos arrays de 64 bits
+            raise ValueError(f'Operação {passo}: o saldo acumulado excede o limite da simulação.')
+        for posicao in posicoes:
+            if razao.saldo(posicao) < 0:
+                primeiro_negativo.setdefault(posicao, passo)
+    
+    saldos = []
+    violacoes = []
+    for posicao in sorted(saldo_inicial, key=razao.chaves.__getitem__):
+        setor_id, rubrica_id = razao.chaves[posicao]
+        saldo = razao.saldo(posicao)
+        saldos.append({
+            'setor': setor_id,
+            'rubrica': rubrica_id,
+            'alocado': _reais(razao.alocado[posicao]),
+            'comprometido': _reais(razao.comprometido[posicao]),
+            'saldo_inicial': _reais(saldo_inicial[posicao]),
+            'saldo': _reais(saldo),
+        })
+        if saldo < 0:
+            violacoes.append({
+                'setor': setor_id,
+                'rubrica': rubrica_id,
+                'saldo': _reais(saldo),
+                'passo': primeiro_negativo[posicao],
+                'ja_negativo': saldo_inicial[posicao] < 0,
+            })
+    
+    return {'operacoes': len(operacoes), 'saldos': saldos, 'violacoes': violacoes}
+
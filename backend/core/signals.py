@@ -0,0 +1,137 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from core.models import (
+    Notificacao, ContadorNotificacoes, Contrato, Usuario, Perfil,
+    Setor, FonteRecurso, Meta, Atividade, Rubrica, AlocacaoRecurso, MovimentoFinanceiro,
+    FiltroSalvo
+)
+from core.services import auditoria, metricas, movimento_mensal, orcamento
+from core.services.cache import invalidar
+from core.authentication import invalidar_usuario
+
+logger = logging.getLogger('core')
+
+
+@receiver(post_save, sender=Notificacao)
+def incrementar_contador_notificacoes(sender, instance, created, **kwargs):
+    """
+    Incrementa o contador de não lidas quando uma notificação nova é criada.
+    """
+    if created and not instance.lida:
+        ContadorNotificacoes.ajustar(instance.usuario_id, 1)
+
+
+@receiver(post_delete, sender=Notificacao)
+def decrementar_contador_notificacoes(sender, instance, **kwargs):
+    """
+    Decrementa o contador quando uma notificação não lida é excluída.
+    """
+    if not instance.lida:
+        ContadorNotificacoes.ajustar(instance.usuario_id, -1)
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def invalidar_cache_autenticacao_usuario(sender, instance, **kwargs):
+    """
+    Descarta o retrato do usuário em cache na autenticação (cadastro, ativação, senha).
+    """
+    invalidar_usuario(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Perfil)
+def invalidar_cache_autenticacao_perfil(sender, instance, **kwargs):
+    """
+    Descarta o retrato em cache do usuário do perfil (nível de acesso e setor).
+    """
+    invalidar_usuario(instance.usuario_id)
+
+
+@receiver([post_save, post_delete], sender=Contrato)
+def invalidar_cache_contratos(sender, **kwargs):
+    """
+    Invalida resultados em cache que dependem dos contratos (ex.: filtros salvos).
+    """
+    invalidar('contratos')
+
+
+@receiver([post_save, post_delete], sender=Setor)
+@receiver([post_save, post_delete], sender=FonteRecurso)
+@receiver([post_save, post_delete], sender=Meta)
+@receiver([post_save, post_delete], sender=Atividade)
+@receiver([post_save, post_delete], sender=Rubrica)
+@receiver([post_save, post_delete], sender=AlocacaoRecurso)
+def invalidar_cache_estrutura(sender, **kwargs):
+    """
+    Invalida dados derivados da estrutura orçamentária (ex.: filtros salvos compilados, árvore orçamentária).
+    """
+    # Os filtros salvos guardam ids resolvidos a partir dos nomes da estrutura; são
+    # recompilados antes de trocar a versão para que nenhuma leitura guarde ids antigos
+    if sender is not AlocacaoRecurso:
+        FiltroSalvo.recompilar_estrutura()
+    invalidar('estrutura')
+
+
+@receiver(post_save, sender=FonteRecurso)
+@receiver(post_save, sender=Meta)
+@receiver(post_save, sender=Atividade)
+@receiver(post_save, sender=Rubrica)
+@receiver(post_save, sender=AlocacaoRecurso)
+def verificar_consistencia_orcamento(sender, instance, raw=False, **kwargs):
+    """
+    Confere as somas do ramo gravado contra os limites do nível acima e registra
+    as violações no log (a gravação não é bloqueada).
+    """
+    if raw:
+        return
+    for violacao in orcamento.verificar_no(instance):
+        logger.warning('Orçamento inconsistente: %s', orcamento.descrever_violacao(violacao))
+
+
+@receiver(post_init, sender=MovimentoFinanceiro)
+def capturar_movimento_mensal(sender, instance, **kwargs):
+    movimento_mensal.capturar_estado(instance)
+
+
+@receiver(pre_save, sender=MovimentoFinanceiro)
+@receiver(pre_delete, sender=MovimentoFinanceiro)
+def completar_movimento_mensal(sender, instance, raw=False, **kwargs):
+    """
+    Lê o estado anterior de movimentos carregados com .only()/.defer() antes da gravação.
+    """
+    if raw:
+        return
+    movimento_mensal.completar_estado(instance)
+
+
+@receiver(post_save, sender=MovimentoFinanceiro)
+def atualizar_movimento_mensal(sender, instance, created, raw=False, **kwargs):
+    """
+    Aplica à consolidação mensal a variação causada pela gravação do movimento.
+    """
+    if raw:
+        return
+    # Model.save() não abre transação para modelos sem herança: sem o bloco, uma falha
+    # no meio do ajuste deixaria parte das linhas mensais alteradas em autocommit
+    with transaction.atomic():
+        movimento_mensal.ajustar(movimento_mensal.variacao_gravacao(instance, created))
+    movimento_mensal.capturar_estado(instance)
+
+
+@receiver(post_delete, sender=MovimentoFinanceiro)
+def remover_movimento_mensal(sender, instance, **kwargs):
+    """
+    Retira o movimento excluído da consolidação mensal.
+    """
+    with transaction.atomic():
+        movimento_mensal.ajustar(movimento_mensal.variacao_exclusao(instance))
+
+
+# Trilha de auditoria dos modelos configurados em AUDITORIA_MODELOS
+auditoria.registrar_modelos()
+
+
+# Contadores de reaproveitamento de conexões com o banco
+metricas.registrar()
@@ -0,0 +1,33 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from core.models import Usuario
+
+# Parâmetros padrão de gerar_dados_carga; cada módulo de teste pode sobrescrever
+# parte deles declarando o próprio DADOS_CARGA
+DADOS_CARGA = dict(
+    setores=2, fontes=1, metas=2, atividades=2, rubricas=2,
+    bolsistas=10, credores=5, contratos=20, max_parcelas=4, semente=11,
+)
+
+@pytest.fixture
+def dados_carga(request, db):
+    """
+    Popula o banco com gerar_dados_carga e retorna o usuário 'carga'. Os parâmetros são
+    os padrões acima, sobrescritos pelo DADOS_CARGA do módulo e, com parametrização
+    indireta, pelo dicionário de `request.param`.
+    """
+    parametros = {
+        **DADOS_CARGA,
+        **getattr(request.module, 'DADOS_CARGA', {}),
+        **getattr(request, 'param', {}),
+    }
+    call_command('gerar_dados_carga', forcar=True, stdout=StringIO(), **parametros)
+    return Usuario.objects.get(username='carga')
+
+@pytest.fixture
+def cliente(dados_carga):
+    cliente = APIClient()
+    cliente.force_authenticate(user=dados_carga)
+    return cliente
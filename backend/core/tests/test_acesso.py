@@ -0,0 +1,108 @@
+import pytest
+from datetime import date
+from django.db.models import Sum
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import Contrato, MovimentoFinanceiro, Perfil, Setor, Usuario
+from core.services.acesso import ContextoAcesso
+
+DADOS_CARGA = dict(
+    setores=3, fontes=2, metas=2, atividades=2, rubricas=2,
+    bolsistas=10, credores=5, contratos=30, max_parcelas=4, semente=23,
+)
+
+@pytest.fixture
+def dados(dados_carga):
+    setor = Setor.objects.filter(contratos__isnull=False).order_by('pk').first()
+    gestor = Usuario.objects.create_user(username='gestor', password='senha123')
+    Perfil.objects.create(
+        usuario=gestor, nome_completo='Gestor', cargo='Gestor', setor=setor, nivel_acesso='gestor'
+    )
+    return setor, gestor
+
+def cliente_de(usuario):
+    cliente = APIClient()
+    cliente.force_authenticate(user=usuario)
+    return cliente
+
+@pytest.mark.django_db
+class TestContextoAcesso:
+    def test_niveis(self, dados):
+        setor, gestor = dados
+        assert ContextoAcesso.do_usuario(gestor).setores == {setor.pk}
+        assert ContextoAcesso.do_usuario(Usuario.objects.get(username='carga')).irrestrito
+
+        sem_perfil = Usuario.objects.create_user(username='avulso', password='senha123')
+        assert ContextoAcesso.do_usuario(sem_perfil).chave == 'nenhum'
+
+    def test_gestor_ve_apenas_o_proprio_setor(self, dados):
+        setor, gestor = dados
+        cliente = cliente_de(gestor)
+
+        response = cliente.get(reverse('contrato-list'))
+        assert response.data['count'] == Contrato.objects.filter(setor=setor).count()
+
+        response = cliente.get(reverse('movimentofinanceiro-list'))
+        assert response.data['count'] == MovimentoFinanceiro.objects.filter(setor=setor).count()
+
+        outro = Contrato.objects.exclude(setor=setor).first()
+        assert cliente.get(reverse('contrato-detail', args=[outro.pk])).status_code == 404
+
+        response = cliente.get(reverse('setor-list'))
+        assert [item['id'] for item in response.data['results']] == [setor.pk]
+
+    def test_gravacao_fora_do_escopo(self, dados):
+        setor, gestor = dados
+        cliente = cliente_de(gestor)
+        outro = Setor.objects.exclude(pk=setor.pk).first()
+
+        contrato = Contrato.objects.filter(setor=setor).first()
+        response = cliente.patch(reverse('contrato-detail', args=[contrato.pk]), {'setor': outro.pk}, format='json')
+        assert response.status_code == 403
+        contrato.refresh_from_db()
+        assert contrato.setor_id == setor.pk
+
+        movimento = MovimentoFinanceiro.objects.filter(setor=setor).first()
+        response = cliente.patch(
+            reverse('movimentofinanceiro-detail', args=[movimento.pk]), {'setor': outro.pk}, format='json'
+        )
+        assert response.status_code == 403
+
+        response = cliente.patch(
+            reverse('movimentofinanceiro-detail', args=[movimento.pk]), {'descricao': 'Ajuste'}, format='json'
+        )
+        assert response.status_code == 200
+
+    def test_arvore_por_escopo(self, dados):
+        setor, gestor = dados
+        arvore = cliente_de(gestor).get(reverse('estrutura_arvore')).data
+        esperado = Contrato.objects.filter(setor=setor).aggregate(t=Sum('valor_total'))['t']
+        assert sum(no['comprometido'] for no in arvore) == esperado
+
+    def test_admin_ve_todos(self, dados):
+        cliente = cliente_de(Usuario.objects.get(username='carga'))
+        response = cliente.get(reverse('contrato-list'))
+        assert response.data['count'] == Contrato.objects.count()
+
+    def test_dashboard_por_escopo(self, dados):
+        setor, gestor = dados
+        admin = cliente_de(Usuario.objects.get(username='carga'))
+        cliente = cliente_de(gestor)
+
+        response = cliente.get(reverse('dashboard_resumo'))
+        assert response.data['total_contratos'] == Contrato.objects.filter(setor=setor).count()
+
+        # O cache das séries não pode vazar o resultado de um escopo para outro
+        parametros = {'metrica': 'contratos', 'granularidade': 'ano', 'inicio': '2000-01-01', 'fim': '2100-12-31'}
+        total = sum(admin.get(reverse('dashboard_series'), parametros).data['total'])
+        parcial = sum(cliente.get(reverse('dashboard_series'), parametros).data['total'])
+        assert total == Contrato.objects.exclude(status_contrato='cancelado').count()
+        assert parcial == Contrato.objects.filter(setor=setor).exclude(status_contrato='cancelado').count()
+
+        response = cliente.get(reverse('dashboard_financeiro'))
+        hoje = date.today()
+        mes = response.data['fluxo_caixa_mensal'][hoje.strftime('%Y-%m')]
+        esperado = MovimentoFinanceiro.objects.filter(
+            setor=setor, tipo='saida', data_movimento__year=hoje.year, data_movimento__month=hoje.month
+        ).aggregate(t=Sum('valor'))['t'] or 0
+        assert mes['saidas'] == esperado
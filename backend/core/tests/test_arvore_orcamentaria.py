@@ -0,0 +1,58 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import FonteRecurso, Meta, AlocacaoRecurso, Contrato
+from core.services.orcamento import montar_arvore
+
+DADOS_CARGA = dict(
+    setores=2, fontes=2, metas=2, atividades=2, rubricas=3,
+    bolsistas=10, credores=5, contratos=25, max_parcelas=3, semente=5,
+)
+
+@pytest.mark.django_db
+class TestArvoreOrcamentaria:
+    def test_consultas_por_nivel(self, dados_carga):
+        with CaptureQueriesContext(connection) as consultas:
+            arvore = montar_arvore()
+
+        # quatro níveis + alocações + contratos agrupados por rubrica
+        assert len(consultas.captured_queries) == 6
+        assert len(arvore) == FonteRecurso.objects.count()
+
+    def test_valores_consolidados(self, dados_carga):
+        arvore = montar_arvore()
+
+        assert sum(no['alocado'] for no in arvore) == AlocacaoRecurso.objects.aggregate(t=Sum('valor_alocado'))['t']
+        assert sum(no['comprometido'] for no in arvore) == Contrato.objects.aggregate(t=Sum('valor_total'))['t']
+        assert sum(no['pago'] for no in arvore) == Contrato.objects.aggregate(t=Sum('total_pago'))['t']
+
+        fonte = arvore[0]
+        assert fonte['previsto'] == FonteRecurso.objects.get(pk=fonte['id']).valor_total
+        for meta in fonte['filhos']:
+            assert meta['comprometido'] == sum(atividade['comprometido'] for atividade in meta['filhos'])
+
+    def test_filtro_por_ramo(self, dados_carga):
+        meta = Meta.objects.first()
+        arvore = montar_arvore(meta=meta.pk)
+
+        assert [no['id'] for no in arvore] == [meta.pk]
+        assert arvore[0]['nivel'] == 'meta'
+        assert len(arvore[0]['filhos']) == meta.atividades.count()
+
+        pago = Contrato.objects.filter(rubrica__atividade__meta=meta).aggregate(t=Sum('total_pago'))['t']
+        assert arvore[0]['pago'] == (pago or Decimal('0'))
+
+    def test_endpoint(self, dados_carga):
+        cliente = APIClient()
+        cliente.force_authenticate(user=dados_carga)
+
+        response = cliente.get(reverse('estrutura_arvore'))
+        assert response.status_code == 200
+        assert {'id', 'nivel', 'previsto', 'alocado', 'comprometido', 'pago', 'filhos'} <= set(response.data[0])
+
+        response = cliente.get(reverse('estrutura_arvore'), {'fonte': 'x'})
+        assert response.status_code == 400
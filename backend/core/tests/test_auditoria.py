@@ -0,0 +1,103 @@
+import pytest
+from decimal import Decimal
+from django.db import transaction
+from django.test import RequestFactory
+from core.models import FonteRecurso, Meta, Atividade, Rubrica, AlocacaoRecurso, RegistroAuditoria, Setor, Usuario
+from core.services.auditoria import contexto_auditoria
+
+@pytest.fixture
+def usuario(transactional_db):
+    return Usuario.objects.create_user(username='auditor', email='auditor@ccbj.org', password='senha123')
+
+@pytest.fixture
+def alocacao(usuario):
+    fonte = FonteRecurso.objects.create(nome='Fonte', valor_total=Decimal('10000.00'), data_inicio='2025-01-01')
+    meta = Meta.objects.create(fonte_recurso=fonte, codigo='M1', descricao='Meta', valor_previsto=Decimal('10000.00'))
+    atividade = Atividade.objects.create(
+        meta=meta, codigo='A1', descricao='Atividade', valor_previsto=Decimal('10000.00')
+    )
+    rubrica = Rubrica.objects.create(atividade=atividade, nome='Rubrica', valor_previsto=Decimal('10000.00'))
+    setor = Setor.objects.create(nome='Setor', responsavel=usuario)
+    # Criada fora de qualquer buffer: não gera registro
+    return AlocacaoRecurso.objects.create(
+        fonte_recurso=fonte, setor=setor, rubrica=rubrica, valor_alocado=Decimal('1000.00')
+    )
+
+def _registros():
+    return list(RegistroAuditoria.objects.order_by('id'))
+
+# Transações reais: os registros só entram no buffer no on_commit
+@pytest.mark.django_db(transaction=True)
+class TestAuditoria:
+    def test_criacao_alteracao_e_exclusao(self, usuario, alocacao):
+        assert _registros() == []
+        with contexto_auditoria(usuario):
+            alocacao.valor_alocado = Decimal('1500.00')
+            alocacao.save()
+            alocacao.save()  # sem mudanças: nenhum registro
+            copia = AlocacaoRecurso.objects.create(
+                fonte_recurso=alocacao.fonte_recurso, setor=alocacao.setor, rubrica=alocacao.rubrica,
+                valor_alocado=Decimal('10.00')
+            )
+            copia_id = copia.pk
+            copia.delete()
+
+        alteracao, criacao, exclusao = _registros()
+        assert (alteracao.acao, alteracao.registro_id) == ('alterar', alocacao.pk)
+        assert alteracao.dados_antigos == {'valor_alocado': '1000.00'}
+        assert alteracao.dados_novos == {'valor_alocado': '1500.00'}
+        assert (criacao.acao, criacao.registro_id, criacao.dados_antigos) == ('criar', copia_id, None)
+        assert criacao.dados_novos['valor_alocado'] == '10.00'
+        assert (exclusao.acao, exclusao.registro_id, exclusao.dados_novos) == ('excluir', copia_id, None)
+        assert {registro.usuario_id for registro in _registros()} == {usuario.pk}
+        assert {registro.tabela_afetada for registro in _registros()} == {AlocacaoRecurso._meta.db_table}
+
+    def test_grava_so_ao_fechar_o_buffer(self, usuario, alocacao):
+        with contexto_auditoria(usuario) as buffer:
+            alocacao.valor_alocado = Decimal('1200.00')
+            alocacao.save()
+            assert len(buffer.registros) == 1
+            assert _registros() == []
+        assert len(_registros()) == 1
+
+    def test_rollback_descarta(self, usuario, alocacao):
+        with contexto_auditoria(usuario):
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    alocacao.valor_alocado = Decimal('1300.00')
+                    alocacao.save()
+                    raise RuntimeError
+            with transaction.atomic():
+                alocacao.valor_alocado = Decimal('1400.00')
+                alocacao.save()
+
+        registro, = _registros()
+        assert registro.dados_novos == {'valor_alocado': '1400.00'}
+
+    def test_usuario_e_ip_da_requisicao(self, usuario, alocacao):
+        request = RequestFactory().post('/', HTTP_X_FORWARDED_FOR='10.0.0.7, 10.0.0.1')
+        request.user = usuario
+        with contexto_auditoria(request=request):
+            alocacao.valor_alocado = Decimal('1100.00')
+            alocacao.save()
+
+        registro, = _registros()
+        assert (registro.usuario_id, registro.ip_origem) == (usuario.pk, '10.0.0.7')
+
+    def test_sem_usuario_descarta(self, alocacao, settings, caplog):
+        settings.AUDITORIA_USUARIO_SISTEMA = None
+        with contexto_auditoria():
+            alocacao.valor_alocado = Decimal('900.00')
+            alocacao.save()
+        assert _registros() == []
+        assert 'descartados' in caplog.text
+
+    def test_sem_usuario_usa_usuario_de_sistema(self, alocacao, settings):
+        sistema = Usuario.objects.create_user(username='sistema', email='sistema@ccbj.org', password='x')
+        settings.AUDITORIA_USUARIO_SISTEMA = 'sistema'
+        with contexto_auditoria():
+            alocacao.valor_alocado = Decimal('800.00')
+            alocacao.save()
+
+        registro, = _registros()
+        assert registro.usuario_id == sistema.pk
@@ -0,0 +1,60 @@
+import pytest
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from core.authentication import JWTAuthenticationComCache
+from core.models import Perfil, Setor, Usuario
+from core.services.acesso import ContextoAcesso
+
+@pytest.fixture
+def cache_local(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+@pytest.fixture
+def gestor(db):
+    usuario = Usuario.objects.create_user(username='gestor', email='gestor@ccbj.org', password='senha123')
+    setor = Setor.objects.create(nome='Setor A', responsavel=usuario)
+    Perfil.objects.create(
+        usuario=usuario, nome_completo='Gestor', cargo='Gestor', setor=setor, nivel_acesso='gestor'
+    )
+    return usuario
+
+@pytest.mark.django_db
+class TestAutenticacaoComCache:
+    def test_usuario_em_cache(self, cache_local, gestor, django_assert_num_queries):
+        autenticacao = JWTAuthenticationComCache()
+        token = AccessToken.for_user(gestor)
+        autenticacao.get_user(token)
+
+        with django_assert_num_queries(0):
+            usuario = autenticacao.get_user(token)
+            acesso = ContextoAcesso.do_usuario(usuario)
+        assert usuario.pk == gestor.pk
+        assert acesso.setores == {gestor.perfil.setor_id}
+
+        # Campos fora do retrato são carregados sob demanda
+        assert usuario.username == 'gestor'
+
+    def test_invalidacao_por_perfil_e_senha(self, cache_local, gestor, django_assert_num_queries):
+        autenticacao = JWTAuthenticationComCache()
+        token = AccessToken.for_user(gestor)
+        autenticacao.get_user(token)
+
+        perfil = gestor.perfil
+        perfil.nivel_acesso = 'admin'
+        perfil.save()
+        assert ContextoAcesso.do_usuario(autenticacao.get_user(token)).irrestrito
+
+        gestor.set_password('nova-senha')
+        gestor.save()
+        with django_assert_num_queries(1):
+            autenticacao.get_user(token)
+
+    def test_usuario_inativo(self, cache_local, gestor):
+        autenticacao = JWTAuthenticationComCache()
+        token = AccessToken.for_user(gestor)
+        autenticacao.get_user(token)
+
+        gestor.is_active = False
+        gestor.save()
+        with pytest.raises(AuthenticationFailed):
+            autenticacao.get_user(token)
@@ -0,0 +1,45 @@
+import pytest
+from django.db import connection
+from core.models import Bolsista
+from core.services.busca import buscar, configurar_indices
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'sqlite', reason='testes do índice FTS5 do SQLite')
+
+def _bolsistas(nomes, inicio=0):
+    return Bolsista.objects.bulk_create([
+        Bolsista(
+            nome=nome, cpf=f'{inicio + i:011d}', endereco='Rua A, 1',
+            banco='001', agencia='0001', conta='000001-0',
+        )
+        for i, nome in enumerate(nomes)
+    ])
+
+@pytest.mark.django_db
+class TestBuscaSqlite:
+    def test_sem_limite_de_resultados(self):
+        _bolsistas([f'Maria Bolsista {i}' for i in range(1200)])
+        assert buscar(Bolsista.objects.all(), 'maria').count() == 1200
+        assert buscar(Bolsista.objects.all(), 'maria', ordenar=False).count() == 1200
+
+    def test_ordena_por_relevancia(self):
+        menos, mais = _bolsistas(['Maria Lima Souza', 'Maria Maria Lima'])
+        _bolsistas(['João Lima Souza'], inicio=10)
+        resultado = list(buscar(Bolsista.objects.all(), 'maria'))
+        assert [bolsista.pk for bolsista in resultado] == [mais.pk, menos.pk]
+        assert resultado[0].relevancia > resultado[1].relevancia
+
+    def test_documento_com_pontuacao(self):
+        bolsista, = _bolsistas(['José Alves'], inicio=12345678901)
+        bolsista.cpf = '123.456.789-01'
+        bolsista.save()
+        assert list(buscar(Bolsista.objects.all(), '123.456.789-01')) == [bolsista]
+
+    def test_estrutura_nova_indexa_linhas_existentes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE busca_bolsista')
+            for sufixo in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER {Bolsista._meta.db_table}_busca_{sufixo}')
+        _bolsistas(['Ana Freitas', 'Bruno Gomes'])
+
+        configurar_indices(connection.alias)
+        assert [bolsista.nome for bolsista in buscar(Bolsista.objects.all(), 'freitas')] == ['Ana Freitas']
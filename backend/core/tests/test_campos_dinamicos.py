@@ -0,0 +1,61 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from core.models import Contrato, FonteRecurso
+
+DADOS_CARGA = dict(
+    setores=2, fontes=2, metas=2, atividades=2, rubricas=2,
+    bolsistas=10, credores=5, contratos=20, max_parcelas=3, semente=11,
+)
+
+@pytest.mark.django_db
+class TestCamposDinamicos:
+    def test_fields_limita_colunas(self, cliente):
+        response = cliente.get(reverse('contrato-list'), {'fields': 'id,valor_total,status_processo'})
+        assert response.status_code == 200
+        assert set(response.data['results'][0]) == {'id', 'valor_total', 'status_processo'}
+
+    def test_fields_ignora_nomes_desconhecidos(self, cliente):
+        response = cliente.get(reverse('contrato-list'), {'fields': 'id,inexistente'})
+        assert response.status_code == 200
+        assert set(response.data['results'][0]) == {'id'}
+
+    def test_fields_em_gravacao_recorta_so_a_resposta(self, cliente):
+        contrato = Contrato.objects.first()
+        url = reverse('contrato-detail', args=[contrato.pk]) + '?fields=id'
+        response = cliente.patch(url, {'nome_curso_acao': 'Curso renomeado'}, format='json')
+        assert response.status_code == 200
+        assert set(response.data) == {'id'}
+
+        contrato.refresh_from_db()
+        assert contrato.nome_curso_acao == 'Curso renomeado'
+
+    def test_expand_inclui_relacoes(self, cliente):
+        response = cliente.get(reverse('contrato-list'), {'fields': 'id', 'expand': 'parcelas'})
+        assert response.status_code == 200
+
+        linha = response.data['results'][0]
+        assert set(linha) == {'id', 'parcelas'}
+        contrato = Contrato.objects.get(pk=linha['id'])
+        assert len(linha['parcelas']) == contrato.parcelas.count()
+
+    def test_detalhe_mantem_expansoes_padrao(self, cliente):
+        contrato = Contrato.objects.first()
+        response = cliente.get(reverse('contrato-detail', args=[contrato.pk]))
+        assert response.status_code == 200
+        assert {'parcelas', 'historicos', 'bolsista_detalhes', 'credor_detalhes'} <= set(response.data)
+
+        response = cliente.get(reverse('contrato-detail', args=[contrato.pk]), {'expand': ''})
+        assert 'parcelas' not in response.data
+
+    def test_expand_aninhado_nao_multiplica_consultas(self, cliente):
+        url = reverse('fonterecurso-list')
+        with CaptureQueriesContext(connection) as consultas:
+            response = cliente.get(url, {'expand': 'metas'})
+        assert response.status_code == 200
+        # contagem, página e o prefetch das metas
+        assert len(consultas.captured_queries) <= 3
+
+        fonte = FonteRecurso.objects.get(pk=response.data['results'][0]['id'])
+        assert len(response.data['results'][0]['metas']) == fonte.metas.count()
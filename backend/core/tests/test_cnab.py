@@ -0,0 +1,160 @@
+import pytest
+from datetime import date
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import ConfiguracaoSistema, ItemRemessaCnab, ParcelaContrato, RemessaCnab, Usuario
+from core.services import cnab
+
+DADOS_CARGA = dict(
+    setores=2, fontes=1, metas=2, atividades=2, rubricas=2,
+    bolsistas=10, credores=5, contratos=20, max_parcelas=4, semente=11,
+)
+
+def _remessa(cliente, parcelas, **extra):
+    response = cliente.post(reverse('parcelacontrato-remessa-cnab'), {
+        'parcelas': parcelas,
+        'data_pagamento': '2025-06-10',
+        **extra,
+    }, format='json')
+    assert response.status_code == 200
+    return b''.join(response.streaming_content).decode('ascii').split('\r\n')[:-1]
+
+def _retorno(linhas, ocorrencias, datas=None, valores=None):
+    datas, valores = datas or {}, valores or {}
+    retorno = []
+    for linha in linhas:
+        if linha[13] == 'A':
+            parcela = int(linha[73:93])
+            linha = (
+                linha[:154] + datas.get(parcela, '12062025') + valores.get(parcela, linha[162:177])
+                + linha[177:230] + ocorrencias.get(parcela, '00').ljust(10)
+            )
+        retorno.append(linha)
+    return ('\r\n'.join(retorno) + '\r\n').encode('ascii')
+
+def _enviar_retorno(cliente, conteudo):
+    response = cliente.post(
+        reverse('parcelacontrato-retorno-cnab'),
+        {'arquivo': SimpleUploadedFile('retorno.ret', conteudo)},
+        format='multipart',
+    )
+    assert response.status_code == 200
+    return response.data
+
+@pytest.mark.django_db
+class TestRemessaCnab:
+    def test_layout_e_totais(self, cliente):
+        pendentes = list(ParcelaContrato.objects.filter(status='pendente').values_list('pk', flat=True)[:12])
+        linhas = _remessa(cliente, pendentes)
+
+        assert all(len(linha) == 240 for linha in linhas)
+        assert linhas[0][7] == '0' and linhas[-1][7] == '9'
+        assert int(linhas[-1][23:29]) == len(linhas)
+
+        segmentos_a = [linha for linha in linhas if linha[13] == 'A']
+        assert sorted(int(linha[73:93]) for linha in segmentos_a) == sorted(pendentes)
+        assert sum(1 for linha in linhas if linha[13] == 'B') == len(pendentes)
+
+        for trailer in (linha for linha in linhas if linha[7] == '5'):
+            lote = trailer[3:7]
+            do_lote = [linha for linha in linhas if linha[3:7] == lote]
+            assert int(trailer[17:23]) == len(do_lote)
+            assert int(trailer[23:41]) == sum(int(linha[119:134]) for linha in do_lote if linha[13] == 'A')
+
+    def test_incrementa_nsa(self, cliente):
+        primeira, segunda = ParcelaContrato.objects.filter(status='pendente').values_list('pk', flat=True)[:2]
+        primeiro = _remessa(cliente, [primeira])
+        segundo = _remessa(cliente, [segunda])
+        assert int(segundo[0][157:163]) == int(primeiro[0][157:163]) + 1
+        assert ConfiguracaoSistema.objects.get(chave=cnab.CHAVE_NSA).valor == str(int(segundo[0][157:163]))
+
+    def test_registra_remessa_e_exclui_enviadas(self, cliente):
+        pendentes = list(ParcelaContrato.objects.filter(status='pendente').values_list('pk', flat=True)[:3])
+        linhas = _remessa(cliente, pendentes[:2])
+        remessa = RemessaCnab.objects.get(nsa=int(linhas[0][157:163]))
+        assert remessa.total_parcelas == 2
+        assert set(remessa.itens.values_list('parcela_id', flat=True)) == set(pendentes[:2])
+
+        # Só a parcela ainda não enviada entra na remessa seguinte
+        linhas = _remessa(cliente, pendentes)
+        assert [int(linha[73:93]) for linha in linhas if linha[13] == 'A'] == [pendentes[2]]
+
+        response = cliente.post(reverse('parcelacontrato-remessa-cnab'), {'parcelas': pendentes[:2]}, format='json')
+        assert response.status_code == 400
+
+    def test_reenviar(self, cliente):
+        pendente = ParcelaContrato.objects.filter(status='pendente').values_list('pk', flat=True).first()
+        _remessa(cliente, [pendente])
+        linhas = _remessa(cliente, [pendente], reenviar=True)
+        assert [int(linha[73:93]) for linha in linhas if linha[13] == 'A'] == [pendente]
+        assert list(
+            ItemRemessaCnab.objects.filter(parcela_id=pendente).order_by('remessa__nsa').values_list('situacao', flat=True)
+        ) == ['cancelada', 'enviada']
+
+    def test_sem_parcelas(self, cliente):
+        response = cliente.post(reverse('parcelacontrato-remessa-cnab'), {'parcelas': [999999]}, format='json')
+        assert response.status_code == 400
+
+    def test_apenas_administradores(self, cliente):
+        comum = Usuario.objects.create_user(username='comum', password='x')
+        outro = APIClient()
+        outro.force_authenticate(user=comum)
+        response = outro.post(reverse('parcelacontrato-remessa-cnab'), {'data_ate': '2030-01-01'}, format='json')
+        assert response.status_code == 403
+
+@pytest.mark.django_db
+class TestRetornoCnab:
+    def test_baixa_parcelas_pagas(self, cliente):
+        pendentes = list(ParcelaContrato.objects.filter(status='pendente').values_list('pk', flat=True)[:6])
+        rejeitada = pendentes[0]
+        dados = _enviar_retorno(cliente, _retorno(_remessa(cliente, pendentes), {rejeitada: 'BD'}))
+        assert dados['pagas'] == len(pendentes) - 1
+        assert [item['parcela'] for item in dados['rejeitadas']] == [rejeitada]
+
+        pagas = ParcelaContrato.objects.filter(pk__in=pendentes, status='pago')
+        assert set(pagas.values_list('pk', flat=True)) == set(pendentes) - {rejeitada}
+        assert set(pagas.values_list('data_pagamento', flat=True)) == {date(2025, 6, 12)}
+
+        itens = dict(ItemRemessaCnab.objects.filter(parcela_id__in=pendentes).values_list('parcela_id', 'situacao'))
+        assert itens.pop(rejeitada) == 'rejeitada'
+        assert set(itens.values()) == {'paga'}
+        # A rejeitada volta a poder ser enviada
+        assert [int(linha[73:93]) for linha in _remessa(cliente, pendentes) if linha[13] == 'A'] == [rejeitada]
+
+    def test_data_invalida_e_rejeitada(self, cliente):
+        pendentes = list(ParcelaContrato.objects.filter(status='pendente').values_list('pk', flat=True)[:2])
+        linhas = _remessa(cliente, pendentes)
+        # Data real ilegível e data agendada também inválida
+        linhas = [
+            linha[:93] + '31132025' + linha[101:] if linha[13] == 'A' and int(linha[73:93]) == pendentes[0] else linha
+            for linha in linhas
+        ]
+        dados = _enviar_retorno(cliente, _retorno(linhas, {}, datas={pendentes[0]: '99XX2025'}))
+        assert dados['pagas'] == 1
+        assert dados['rejeitadas'][0]['parcela'] == pendentes[0]
+        assert 'Data' in dados['rejeitadas'][0]['motivo']
+        assert ParcelaContrato.objects.get(pk=pendentes[0]).status == 'pendente'
+
+    def test_valor_real_divergente_e_rejeitado(self, cliente):
+        pendentes = list(ParcelaContrato.objects.filter(status='pendente').values_list('pk', flat=True)[:2])
+        divergente, correta = pendentes
+        valor_correto = ParcelaContrato.objects.get(pk=correta).valor
+        conteudo = _retorno(_remessa(cliente, pendentes), {}, valores={
+            divergente: '1'.rjust(15, '0'),
+            correta: str(int(valor_correto * 100)).rjust(15, '0'),
+        })
+        dados = _enviar_retorno(cliente, conteudo)
+        assert dados['pagas'] == 1
+        assert [item['parcela'] for item in dados['rejeitadas']] == [divergente]
+        assert ParcelaContrato.objects.get(pk=divergente).status == 'pendente'
+        assert ParcelaContrato.objects.get(pk=correta).status == 'pago'
+
+    def test_comando_gera_arquivo(self, cliente, tmp_path):
+        saida = tmp_path / 'remessa.rem'
+        call_command('gerar_remessa_cnab', saida=str(saida), ate='2100-01-01', stdout=StringIO())
+        linhas = saida.read_bytes().split(b'\r\n')[:-1]
+        assert all(len(linha) == 240 for linha in linhas)
+        assert sum(1 for linha in linhas if linha[13:14] == b'A') == ParcelaContrato.objects.filter(status='pendente').count()
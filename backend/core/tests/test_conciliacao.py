@@ -0,0 +1,131 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import ExtratoBancario, LancamentoExtrato, MovimentoFinanceiro, Perfil, Usuario
+from core.services import conciliacao
+
+DADOS_CARGA = dict(
+    setores=2, fontes=1, metas=2, atividades=2, rubricas=2,
+    bolsistas=10, credores=5, contratos=20, max_parcelas=4, semente=13,
+)
+
+def _csv(linhas):
+    conteudo = 'Data;Histórico;Valor;Documento\n' + ''.join(
+        f"{data:%d/%m/%Y};{descricao};{str(valor).replace('.', ',')};{documento}\n"
+        for data, descricao, valor, documento in linhas
+    )
+    return SimpleUploadedFile('extrato.csv', conteudo.encode('latin-1'))
+
+@pytest.mark.django_db
+class TestConciliacao:
+    def test_importa_e_concilia(self, cliente):
+        movimentos = list(MovimentoFinanceiro.objects.filter(tipo__in=['entrada', 'saida']).order_by('id')[:10])
+        linhas = [
+            (
+                movimento.data_movimento + timedelta(days=indice % 3),
+                f'Lançamento {indice}',
+                movimento.valor if movimento.tipo == 'entrada' else -movimento.valor,
+                indice,
+            )
+            for indice, movimento in enumerate(movimentos)
+        ]
+        linhas.append((movimentos[0].data_movimento, 'Tarifa', Decimal('-7.31'), 'x'))
+
+        response = cliente.post(reverse('extratobancario-importar'), {'arquivo': _csv(linhas)}, format='multipart')
+        assert response.status_code == 201
+        assert response.data['extrato']['total_lancamentos'] == len(linhas)
+        assert response.data['conciliacao']['conciliados'] == len(movimentos)
+        assert response.data['conciliacao']['lancamentos_pendentes'] == 1
+
+        extrato = ExtratoBancario.objects.get(pk=response.data['extrato']['id'])
+        vinculados = extrato.lancamentos.filter(movimento__isnull=False).select_related('movimento')
+        for lancamento in vinculados:
+            assert abs(lancamento.valor) == lancamento.movimento.valor
+            assert abs((lancamento.data - lancamento.movimento.data_movimento).days) <= 3
+
+        pendencias = cliente.get(reverse('extratobancario-pendencias', args=[extrato.pk]))
+        assert pendencias.status_code == 200
+        itens = pendencias.data['results'] if isinstance(pendencias.data, dict) else pendencias.data
+        assert [item['descricao'] for item in itens] == ['Tarifa']
+
+    def test_nao_concila_sinal_ou_data_fora_da_janela(self, cliente):
+        movimento = MovimentoFinanceiro.objects.filter(tipo='saida').first()
+        extrato = conciliacao.importar_extrato(
+            _csv([
+                (movimento.data_movimento, 'Sinal trocado', movimento.valor, ''),
+                (movimento.data_movimento + timedelta(days=10), 'Fora da janela', -movimento.valor, ''),
+            ]).read(),
+            'extrato.csv', Usuario.objects.get(username='carga'),
+        )
+        resultado = conciliacao.conciliar(extrato, janela=2)
+        assert resultado['conciliados'] == 0
+        assert not LancamentoExtrato.objects.filter(movimento=movimento).exists()
+
+    def test_movimento_nao_e_reutilizado(self, cliente):
+        movimento = MovimentoFinanceiro.objects.filter(tipo='saida').first()
+        usuario = Usuario.objects.get(username='carga')
+        linha = [(movimento.data_movimento, 'Pagamento', -movimento.valor, '')]
+        repetidos = MovimentoFinanceiro.objects.filter(
+            tipo='saida', valor=movimento.valor,
+            data_movimento__range=(movimento.data_movimento - timedelta(days=3), movimento.data_movimento + timedelta(days=3)),
+        ).count()
+
+        for _ in range(repetidos + 1):
+            conciliacao.conciliar(conciliacao.importar_extrato(_csv(linha).read(), 'extrato.csv', usuario))
+        assert LancamentoExtrato.objects.filter(movimento__isnull=False).count() == repetidos
+
+    def test_arquivo_invalido(self, cliente):
+        arquivo = SimpleUploadedFile('extrato.csv', b'coluna;outra\n1;2\n')
+        response = cliente.post(reverse('extratobancario-importar'), {'arquivo': arquivo}, format='multipart')
+        assert response.status_code == 400
+        assert not ExtratoBancario.objects.exists()
+
+    def test_ofx(self, cliente):
+        movimento = MovimentoFinanceiro.objects.filter(tipo='saida').first()
+        ofx = (
+            'OFXHEADER:100\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+            f'<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>{movimento.data_movimento:%Y%m%d}120000[-3:BRT]\n'
+            f'<TRNAMT>-{movimento.valor}\n<FITID>1\n<MEMO>PAGAMENTO\n'
+            '</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n'
+        )
+        extrato = conciliacao.importar_extrato(ofx.encode(), 'extrato.ofx', Usuario.objects.get(username='carga'))
+        assert extrato.formato == 'ofx'
+        assert conciliacao.conciliar(extrato)['conciliados'] == 1
+
+    def test_escopo_do_extrato(self, cliente):
+        movimento = MovimentoFinanceiro.objects.filter(tipo='saida', setor__isnull=False).first()
+        usuario = Usuario.objects.get(username='carga')
+        conciliado = conciliacao.importar_extrato(
+            _csv([
+                (movimento.data_movimento, 'Pagamento', -movimento.valor, ''),
+                (movimento.data_movimento, 'Tarifa', Decimal('-7.31'), ''),
+            ]).read(),
+            'conciliado.csv', usuario,
+        )
+        conciliacao.conciliar(conciliado)
+        conciliacao.importar_extrato(
+            _csv([(movimento.data_movimento, 'Tarifa', Decimal('-7.31'), '')]).read(), 'avulso.csv', usuario
+        )
+
+        setor = conciliado.lancamentos.get(movimento__isnull=False).movimento.setor
+        gestor = Usuario.objects.create_user(username='gestor', password='senha123')
+        Perfil.objects.create(
+            usuario=gestor, nome_completo='Gestor', cargo='Gestor', setor=setor, nivel_acesso='gestor'
+        )
+        restrito = APIClient()
+        restrito.force_authenticate(user=gestor)
+
+        response = restrito.get(reverse('extratobancario-list'))
+        itens = response.data['results'] if isinstance(response.data, dict) else response.data
+        assert [item['id'] for item in itens] == [conciliado.pk]
+
+        pendencias = restrito.get(reverse('extratobancario-pendencias', args=[conciliado.pk]))
+        itens = pendencias.data['results'] if isinstance(pendencias.data, dict) else pendencias.data
+        assert itens == []
+
+        pendencias = cliente.get(reverse('extratobancario-pendencias', args=[conciliado.pk]))
+        itens = pendencias.data['results'] if isinstance(pendencias.data, dict) else pendencias.data
+        assert [item['descricao'] for item in itens] == ['Tarifa']
@@ -0,0 +1,82 @@
+import pytest
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from core.models import FonteRecurso, Meta, Atividade, Rubrica, AlocacaoRecurso, Setor
+from core.services.orcamento import verificar_consistencia, verificar_no
+
+@pytest.fixture
+def arvore(db):
+    fonte = FonteRecurso.objects.create(
+        nome='Fonte', valor_total=Decimal('1000.00'), data_inicio='2025-01-01'
+    )
+    meta = Meta.objects.create(
+        fonte_recurso=fonte, codigo='M1', descricao='Meta', valor_previsto=Decimal('600.00')
+    )
+    atividade = Atividade.objects.create(
+        meta=meta, codigo='A1', descricao='Atividade', valor_previsto=Decimal('400.00')
+    )
+    rubrica = Rubrica.objects.create(
+        atividade=atividade, nome='Rubrica', valor_previsto=Decimal('300.00')
+    )
+    return fonte, meta, atividade, rubrica
+
+@pytest.mark.django_db
+class TestConsistenciaOrcamento:
+    def test_arvore_consistente(self, arvore):
+        assert verificar_consistencia() == []
+
+    def test_metas_excedem_fonte(self, arvore):
+        fonte, meta, _, _ = arvore
+        Meta.objects.create(
+            fonte_recurso=fonte, codigo='M2', descricao='Outra', valor_previsto=Decimal('500.00')
+        )
+
+        violacoes = verificar_consistencia()
+        assert len(violacoes) == 1
+        assert violacoes[0]['regra'] == 'metas_excedem_fonte'
+        assert violacoes[0]['caminho'] == ['Fonte']
+        assert violacoes[0]['excesso'] == Decimal('100.00')
+
+    def test_alocacoes_excedem_rubrica(self, arvore, admin_user):
+        fonte, _, _, rubrica = arvore
+        setor = Setor.objects.create(nome='Setor', responsavel=admin_user)
+        AlocacaoRecurso.objects.create(
+            fonte_recurso=fonte, setor=setor, rubrica=rubrica, valor_alocado=Decimal('350.00')
+        )
+
+        violacoes = verificar_consistencia()
+        assert [v['regra'] for v in violacoes] == ['alocacoes_excedem_rubrica']
+        assert violacoes[0]['caminho'] == ['Fonte', 'M1', 'A1', 'Rubrica']
+
+    def test_filtro_por_ramo_ignora_nivel_acima(self, arvore):
+        fonte, meta, atividade, _ = arvore
+        Meta.objects.filter(pk=meta.pk).update(valor_previsto=Decimal('1500.00'))
+
+        assert len(verificar_consistencia(fonte=fonte.pk)) == 1
+        assert verificar_consistencia(atividade=atividade.pk) == []
+
+    def test_verificacao_incremental(self, arvore):
+        _, _, atividade, rubrica = arvore
+        rubrica.valor_previsto = Decimal('450.00')
+
+        violacoes = verificar_no(rubrica)
+        assert violacoes == []
+
+        rubrica.save()
+        violacoes = verificar_no(rubrica)
+        assert [(v['regra'], v['id']) for v in violacoes] == [('rubricas_excedem_atividade', atividade.pk)]
+
+    def test_comando_falhar(self, arvore):
+        _, meta, _, _ = arvore
+        Atividade.objects.create(
+            meta=meta, codigo='A2', descricao='Outra', valor_previsto=Decimal('300.00')
+        )
+
+        saida = StringIO()
+        call_command('verificar_consistencia_orcamento', stdout=saida)
+        assert 'atividades_excedem_meta' in saida.getvalue()
+
+        with pytest.raises(CommandError):
+            call_command('verificar_consistencia_orcamento', falhar=True, stdout=StringIO())
@@ -0,0 +1,62 @@
+import pytest
+from core.models import Contrato, FiltroSalvo, Setor
+
+@pytest.fixture
+def cache_local(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+@pytest.fixture
+def filtro(dados_carga):
+    return FiltroSalvo.objects.create(
+        usuario=dados_carga, nome='Setor 001', setor='Setor 001',
+        status_contrato='em_execucao, suspenso', ordenacao='id',
+    )
+
+def _ids_setor(nome):
+    return list(Contrato.objects.filter(setor__nome__icontains=nome).order_by('id').values_list('id', flat=True))
+
+@pytest.mark.django_db
+class TestFiltrosSalvos:
+    def test_compilar(self, filtro):
+        setor = Setor.objects.get(nome='Setor 001')
+        predicados = FiltroSalvo.objects.get(pk=filtro.pk).filtro_compilado['predicados']
+        assert predicados == {
+            'setor_id__in': [setor.pk],
+            'status_contrato__in': ['em_execucao', 'suspenso'],
+        }
+
+    def test_aplicar_filtro(self, filtro):
+        esperado = list(
+            Contrato.objects.filter(setor__nome='Setor 001', status_contrato__in=['em_execucao', 'suspenso'])
+            .order_by('id').values_list('id', flat=True)
+        )
+        assert [c.pk for c in filtro.aplicar_filtro(Contrato.objects.all())] == esperado
+
+    def test_leitura_nao_grava(self, filtro, django_assert_num_queries):
+        # Sem cache (DummyCache) cada leitura só consulta os ids
+        with django_assert_num_queries(1):
+            filtro.ids_resultado()
+        with django_assert_num_queries(1):
+            filtro.ids_resultado()
+
+    def test_ids_em_cache_e_invalidados_pelo_contrato(self, cache_local, dados_carga, django_assert_num_queries):
+        filtro = FiltroSalvo.objects.create(usuario=dados_carga, nome='Setor 001', setor='Setor 001')
+        ids = filtro.ids_resultado()
+        assert sorted(ids) == _ids_setor('Setor 001')
+        with django_assert_num_queries(0):
+            assert filtro.ids_resultado() == ids
+
+        contrato = Contrato.objects.exclude(setor__nome='Setor 001').first()
+        contrato.setor = Setor.objects.get(nome='Setor 001')
+        contrato.save()
+        assert contrato.pk in filtro.ids_resultado()
+
+    def test_recompila_ao_alterar_estrutura(self, filtro):
+        setor = Setor.objects.get(nome='Setor 002')
+        setor.nome = 'Setor 001 B'
+        setor.save()
+
+        filtro.refresh_from_db()
+        assert sorted(filtro.filtro_compilado['predicados']['setor_id__in']) == sorted(
+            Setor.objects.filter(nome__startswith='Setor 001').values_list('id', flat=True)
+        )
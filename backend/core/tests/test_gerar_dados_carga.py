@@ -0,0 +1,41 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from core.models import Contrato, Usuario
+
+PARAMETROS = dict(
+    setores=1, fontes=1, metas=1, atividades=1, rubricas=1,
+    bolsistas=2, credores=1, contratos=3, max_parcelas=2, semente=5,
+)
+
+@pytest.mark.django_db
+class TestGerarDadosCarga:
+    def test_recusa_sem_debug(self, settings):
+        settings.DEBUG = False
+        with pytest.raises(CommandError):
+            call_command('gerar_dados_carga', stdout=StringIO(), **PARAMETROS)
+        assert not Usuario.objects.filter(username='carga').exists()
+        assert Contrato.objects.count() == 0
+
+    def test_senha_gerada_e_usuario_sem_superusuario(self, settings):
+        settings.DEBUG = True
+        saida = StringIO()
+        call_command('gerar_dados_carga', stdout=saida, **PARAMETROS)
+
+        usuario = Usuario.objects.get(username='carga')
+        assert usuario.is_staff and not usuario.is_superuser
+        senha = saida.getvalue().split('Senha gerada para carga: ')[1].strip()
+        assert senha != 'carga123'
+        assert usuario.check_password(senha)
+
+    def test_senha_e_superusuario_explicitos(self):
+        saida = StringIO()
+        call_command(
+            'gerar_dados_carga', senha='segredo-local', superusuario=True, forcar=True,
+            stdout=saida, **PARAMETROS
+        )
+        usuario = Usuario.objects.get(username='carga')
+        assert usuario.is_superuser
+        assert usuario.check_password('segredo-local')
+        assert 'Senha gerada' not in saida.getvalue()
@@ -0,0 +1,101 @@
+import pytest
+from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.urls import reverse
+from core.models import MovimentoFinanceiro, MovimentoMensal, ParcelaContrato
+
+DADOS_CARGA = dict(
+    setores=2, fontes=1, metas=2, atividades=2, rubricas=2,
+    bolsistas=10, credores=5, contratos=20, max_parcelas=4, semente=17,
+)
+
+def _mes(valor):
+    return valor.date() if hasattr(valor, 'date') else valor
+
+def _esperado():
+    return {
+        (_mes(linha['mes']), linha['tipo'], linha['fonte_recurso_id'], linha['setor_id'], linha['rubrica_id']):
+            (linha['total'], linha['quantidade'])
+        for linha in MovimentoFinanceiro.objects.annotate(mes=TruncMonth('data_movimento'))
+        .values('mes', 'tipo', 'fonte_recurso_id', 'setor_id', 'rubrica_id')
+        .annotate(total=Sum('valor'), quantidade=Count('id')).order_by()
+    }
+
+def _consolidado():
+    return {
+        (linha.ano_mes, linha.tipo, linha.fonte_recurso_id, linha.setor_id, linha.rubrica_id):
+            (linha.valor_total, linha.quantidade)
+        for linha in MovimentoMensal.objects.all()
+    }
+
+@pytest.mark.django_db
+class TestMovimentoMensal:
+    def test_carga_consolidada(self, cliente):
+        assert MovimentoMensal.objects.exists()
+        assert _consolidado() == _esperado()
+
+    def test_criar_alterar_excluir(self, cliente):
+        base = MovimentoFinanceiro.objects.filter(tipo='saida').first()
+        response = cliente.post(reverse('movimentofinanceiro-list'), {
+            'tipo': 'saida', 'fonte_recurso': base.fonte_recurso_id, 'setor': base.setor_id,
+            'rubrica': base.rubrica_id, 'valor': '123.45', 'data_movimento': '2019-03-10',
+            'descricao': 'Ajuste',
+        }, format='json')
+        assert response.status_code == 201
+        assert _consolidado() == _esperado()
+
+        url = reverse('movimentofinanceiro-detail', args=[response.data['id']])
+        assert cliente.patch(url, {'valor': '200.00', 'data_movimento': '2019-04-01'}, format='json').status_code == 200
+        assert _consolidado() == _esperado()
+        assert not MovimentoMensal.objects.filter(ano_mes=date(2019, 3, 1)).exists()
+
+        assert cliente.delete(url).status_code == 204
+        assert _consolidado() == _esperado()
+
+    def test_instancias_com_campos_adiados(self, cliente):
+        base = MovimentoFinanceiro.objects.filter(tipo='saida').first()
+
+        movimento = MovimentoFinanceiro.objects.only('id', 'descricao').get(pk=base.pk)
+        movimento.descricao = 'Somente a descrição'
+        movimento.save()
+        assert _consolidado() == _esperado()
+
+        movimento = MovimentoFinanceiro.objects.defer('valor', 'setor').get(pk=base.pk)
+        movimento.data_movimento = date(2019, 5, 20)
+        movimento.save()
+        assert _consolidado() == _esperado()
+
+        MovimentoFinanceiro.objects.defer('valor', 'data_movimento').get(pk=base.pk).delete()
+        assert _consolidado() == _esperado()
+
+    def test_pagamentos_mantem_consolidacao(self, cliente):
+        pendentes = list(ParcelaContrato.objects.filter(status='pendente').values_list('pk', flat=True)[:5])
+        cliente.post(reverse('parcelacontrato-pagar-lote'), {'parcelas': pendentes}, format='json')
+        cliente.post(reverse('parcelacontrato-cancelar-pagamento', args=[pendentes[0]]))
+        assert _consolidado() == _esperado()
+
+    def test_reconstruir(self, cliente):
+        esperado = _esperado()
+        MovimentoMensal.objects.all().delete()
+        MovimentoMensal.objects.create(ano_mes=date(2000, 1, 1), tipo='saida', valor_total=1, quantidade=1)
+
+        call_command('reconstruir_movimento_mensal', meses_por_lote=2, stdout=StringIO())
+        assert {k: v for k, v in _consolidado().items() if k[0] != date(2000, 1, 1)} == esperado
+
+        call_command('reconstruir_movimento_mensal', inicio='2000-01-01', fim='2000-01-31', stdout=StringIO())
+        assert _consolidado() == esperado
+
+    def test_dashboard_usa_consolidacao(self, cliente):
+        response = cliente.get(reverse('dashboard_financeiro'))
+        assert response.status_code == 200
+        fluxo = response.data['fluxo_caixa_mensal']
+        assert len(fluxo) == 12
+        mes = max(fluxo)
+        ano, numero = map(int, mes.split('-'))
+        saidas = MovimentoFinanceiro.objects.filter(
+            tipo='saida', data_movimento__year=ano, data_movimento__month=numero
+        ).aggregate(t=Sum('valor'))['t'] or 0
+        assert fluxo[mes]['saidas'] == saidas
@@ -0,0 +1,107 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import ContadorNotificacoes, Notificacao, Usuario
+
+@pytest.fixture
+def usuario(db):
+    return Usuario.objects.create_user(username='leitor', email='leitor@ccbj.org', password='senha123')
+
+@pytest.fixture
+def cliente(usuario):
+    cliente = APIClient()
+    cliente.force_authenticate(user=usuario)
+    return cliente
+
+def _notificar(usuario, quantidade, lida=False):
+    return [
+        Notificacao.objects.create(usuario=usuario, tipo='informacao', titulo=f'Aviso {i}', mensagem='-', lida=lida)
+        for i in range(quantidade)
+    ]
+
+def _contador(usuario):
+    return ContadorNotificacoes.objects.get(usuario=usuario).nao_lidas
+
+@pytest.mark.django_db
+class TestContadorNotificacoes:
+    def test_sinais_de_criacao_e_exclusao(self, usuario):
+        notificacoes = _notificar(usuario, 3)
+        _notificar(usuario, 2, lida=True)
+        assert _contador(usuario) == 3
+
+        notificacoes[0].delete()
+        assert _contador(usuario) == 2
+
+    def test_inicializa_com_as_nao_lidas_existentes(self, usuario):
+        # Notificações anteriores ao contador (ex.: bulk_create, sem sinais)
+        Notificacao.objects.bulk_create([
+            Notificacao(usuario=usuario, tipo='alerta', titulo=f'Antiga {i}', mensagem='-') for i in range(4)
+        ])
+        assert not ContadorNotificacoes.objects.filter(usuario=usuario).exists()
+
+        _notificar(usuario, 1)
+        assert _contador(usuario) == 5
+
+    def test_decremento_sem_contador_usa_o_count(self, usuario):
+        Notificacao.objects.bulk_create([
+            Notificacao(usuario=usuario, tipo='alerta', titulo=f'Antiga {i}', mensagem='-') for i in range(3)
+        ])
+        Notificacao.objects.filter(pk=Notificacao.objects.first().pk).update(lida=True)
+
+        ContadorNotificacoes.ajustar(usuario.pk, -1)
+        assert _contador(usuario) == 2
+
+    def test_nao_fica_negativo(self, usuario):
+        _notificar(usuario, 1)
+        ContadorNotificacoes.ajustar(usuario.pk, -5)
+        assert _contador(usuario) == 0
+
+@pytest.mark.django_db
+class TestContagemNotificacoes:
+    def test_contagem_acompanha_as_acoes(self, cliente, usuario):
+        notificacoes = _notificar(usuario, 3)
+        url = reverse('notificacao-contagem')
+        assert cliente.get(url).data == {'nao_lidas': 3}
+
+        response = cliente.post(reverse('notificacao-marcar-como-lida', args=[notificacoes[0].pk]))
+        assert response.status_code == 200
+        assert cliente.get(url).data == {'nao_lidas': 2}
+
+        response = cliente.post(reverse('notificacao-marcar-como-lida', args=[notificacoes[0].pk]))
+        assert response.status_code == 400
+        assert cliente.get(url).data == {'nao_lidas': 2}
+
+        response = cliente.patch(
+            reverse('notificacao-detail', args=[notificacoes[0].pk]), {'lida': False}, format='json'
+        )
+        assert response.status_code == 200
+        assert cliente.get(url).data == {'nao_lidas': 3}
+
+        assert cliente.post(reverse('notificacao-marcar-todas-como-lidas')).status_code == 200
+        assert cliente.get(url).data == {'nao_lidas': 0}
+
+    def test_contagem_sem_contador(self, cliente, usuario):
+        Notificacao.objects.bulk_create([
+            Notificacao(usuario=usuario, tipo='alerta', titulo=f'Antiga {i}', mensagem='-') for i in range(2)
+        ])
+        assert cliente.get(reverse('notificacao-contagem')).data == {'nao_lidas': 2}
+        assert _contador(usuario) == 2
+
+    def test_patch_de_usuario_move_a_contagem(self, cliente, usuario):
+        outro = Usuario.objects.create_user(username='outro', email='outro@ccbj.org', password='senha123')
+        notificacao, restante = _notificar(usuario, 2)
+        _notificar(outro, 1)
+
+        response = cliente.patch(
+            reverse('notificacao-detail', args=[notificacao.pk]), {'usuario': outro.pk}, format='json'
+        )
+        assert response.status_code == 200
+        assert _contador(usuario) == 1
+        assert _contador(outro) == 2
+
+        # Reenviar o mesmo estado não altera o contador
+        response = cliente.patch(
+            reverse('notificacao-detail', args=[restante.pk]), {'lida': False}, format='json'
+        )
+        assert response.status_code == 200
+        assert _contador(usuario) == 1
@@ -0,0 +1,36 @@
+import pytest
+from django.db.models import Sum
+from django.urls import reverse
+from core.models import Contrato, MovimentoFinanceiro, ParcelaContrato
+
+DADOS_CARGA = dict(
+    setores=2, fontes=1, metas=2, atividades=2, rubricas=2,
+    bolsistas=10, credores=5, contratos=20, max_parcelas=4, semente=9,
+)
+
+@pytest.mark.django_db
+class TestPagamentoLote:
+    def test_paga_e_recalcula_total(self, cliente):
+        pendentes = list(ParcelaContrato.objects.filter(status='pendente').values_list('pk', flat=True)[:15])
+        paga = ParcelaContrato.objects.filter(status='pago').values_list('pk', flat=True).first()
+        movimentos = MovimentoFinanceiro.objects.count()
+
+        response = cliente.post(reverse('parcelacontrato-pagar-lote'), {
+            'parcelas': pendentes + [paga, 999999],
+            'data_pagamento': '2025-06-10',
+        }, format='json')
+        assert response.status_code == 200
+        assert response.data['pagas'] == len(pendentes)
+        assert response.data['erros'] == 2
+        assert [r['parcela'] for r in response.data['resultados']] == pendentes + [paga, 999999]
+
+        assert ParcelaContrato.objects.filter(pk__in=pendentes, status='pago').count() == len(pendentes)
+        assert MovimentoFinanceiro.objects.count() == movimentos + len(pendentes)
+
+        for contrato in Contrato.objects.filter(parcelas__pk__in=pendentes).distinct():
+            esperado = contrato.parcelas.filter(status='pago').aggregate(t=Sum('valor'))['t']
+            assert contrato.total_pago == esperado
+
+    def test_lote_vazio_invalido(self, cliente):
+        response = cliente.post(reverse('parcelacontrato-pagar-lote'), {'parcelas': []}, format='json')
+        assert response.status_code == 400
@@ -0,0 +1,97 @@
+import pytest
+from decimal import Decimal
+from django.db.models import Min, Sum
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import ParcelaContrato, MovimentoFinanceiro, ProjecaoOrcamentaria
+from core.services.projecao import atualizar_projecoes, calcular_projecoes, janela, somar_meses
+
+DADOS_CARGA = dict(
+    setores=3, fontes=1, metas=2, atividades=2, rubricas=2,
+    bolsistas=15, credores=10, contratos=30, max_parcelas=6, semente=3,
+)
+
+@pytest.fixture
+def inicio(dados_carga):
+    return ParcelaContrato.objects.aggregate(inicio=Min('data_prevista'))['inicio'].replace(day=1)
+
+@pytest.mark.django_db
+class TestProjecao:
+    def test_somar_meses(self):
+        from datetime import date
+        assert somar_meses(date(2025, 11, 15), 3) == date(2026, 2, 1)
+        assert somar_meses(date(2025, 1, 31), -1) == date(2024, 12, 1)
+
+    def test_previsto_e_realizado(self, dados_carga, inicio):
+        projecoes = calcular_projecoes(inicio, 60)
+        _, fim = janela(inicio, 60)
+
+        parcelas = ParcelaContrato.objects.filter(
+            data_prevista__gte=inicio, data_prevista__lt=fim
+        ).exclude(contrato__status_contrato='cancelado')
+        assert sum(v['previsto'] for v in projecoes.values()) == parcelas.aggregate(t=Sum('valor'))['t']
+        assert sum(v['pendente'] for v in projecoes.values()) == (
+            parcelas.filter(status='pendente').aggregate(t=Sum('valor'))['t'] or Decimal('0')
+        )
+
+        saidas = MovimentoFinanceiro.objects.filter(
+            tipo='saida', data_movimento__gte=inicio, data_movimento__lt=fim
+        ).aggregate(t=Sum('valor'))['t'] or Decimal('0')
+        assert sum(v['realizado'] for v in projecoes.values()) == saidas
+
+    def test_upsert_idempotente(self, dados_carga, inicio):
+        gravadas = atualizar_projecoes(dados_carga, inicio, 60)
+        assert ProjecaoOrcamentaria.objects.count() == gravadas
+
+        projecao = ProjecaoOrcamentaria.objects.first()
+        ProjecaoOrcamentaria.objects.filter(pk=projecao.pk).update(valor_previsto=0, valor_realizado=0)
+
+        assert atualizar_projecoes(dados_carga, inicio, 60) == gravadas
+        assert ProjecaoOrcamentaria.objects.count() == gravadas
+        projecao.refresh_from_db()
+        assert projecao.valor_previsto or projecao.valor_realizado
+
+    def test_relatorio_variacao(self, dados_carga, inicio):
+        atualizar_projecoes(dados_carga, inicio, 60)
+        cliente = APIClient()
+        cliente.force_authenticate(user=dados_carga)
+
+        response = cliente.get(reverse('projecaoorcamentaria-variacao'), {'inicio': inicio, 'meses': 60})
+        assert response.status_code == 200
+        assert len(response.data['linhas']) == ProjecaoOrcamentaria.objects.count()
+        linha = response.data['linhas'][0]
+        assert linha['variacao'] == linha['valor_realizado'] - linha['valor_previsto']
+        assert sum(l['valor_pendente'] for l in response.data['linhas']) == sum(
+            t['valor_pendente'] for t in response.data['totais_por_mes']
+        )
+
+        response = cliente.get(reverse('projecaoorcamentaria-variacao'), {'meses': 0})
+        assert response.status_code == 400
+
+    def test_pendente_gravado(self, dados_carga, inicio):
+        atualizar_projecoes(dados_carga, inicio, 60)
+        projecoes = calcular_projecoes(inicio, 60)
+        for projecao in ProjecaoOrcamentaria.objects.all():
+            chave = (projecao.setor_id, projecao.fonte_recurso_id, projecao.rubrica_id, projecao.mes_referencia)
+            assert projecao.valor_pendente == projecoes[chave]['pendente']
+
+    def test_linhas_sem_origem_sao_zeradas(self, dados_carga, inicio):
+        atualizar_projecoes(dados_carga, inicio, 60)
+        projecao = ProjecaoOrcamentaria.objects.filter(valor_previsto__gt=0).first()
+
+        # Remove tudo o que alimentava a linha: parcelas e saídas do mesmo setor/fonte/rubrica/mês
+        _, fim_mes = janela(projecao.mes_referencia, 1)
+        ParcelaContrato.objects.filter(
+            contrato__setor_id=projecao.setor_id, contrato__rubrica_id=projecao.rubrica_id,
+            contrato__meta__fonte_recurso_id=projecao.fonte_recurso_id,
+            data_prevista__gte=projecao.mes_referencia, data_prevista__lt=fim_mes,
+        ).delete()
+        MovimentoFinanceiro.objects.filter(
+            tipo='saida', setor_id=projecao.setor_id, rubrica_id=projecao.rubrica_id,
+            fonte_recurso_id=projecao.fonte_recurso_id,
+            data_movimento__gte=projecao.mes_referencia, data_movimento__lt=fim_mes,
+        ).delete()
+
+        atualizar_projecoes(dados_carga, inicio, 60)
+        projecao.refresh_from_db()
+        assert (projecao.valor_previsto, projecao.valor_pendente, projecao.valor_realizado) == (0, 0, 0)
@@ -0,0 +1,57 @@
+import json
+import pytest
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+@pytest.fixture
+def payload():
+    return {
+        'relatorio_id': 1,
+        'dados': {
+            'contratos': [
+                {
+                    'id': 10,
+                    'nome_curso_acao': 'Oficina de Dança',
+                    'valor_total': Decimal('1500.50'),
+                    'data_inicio': date(2025, 3, 1),
+                    'criado_em': datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+                    'setor__nome': None,
+                }
+            ],
+            'valor_total': Decimal('1500.50'),
+        },
+        'por_setor': {None: Decimal('0'), 3: Decimal('10.10')},
+        'titulo': _('contrato'),
+    }
+
+class TestORJSONRenderer:
+    def test_mesma_saida_do_renderer_padrao(self, payload):
+        padrao = json.loads(JSONRenderer().render(payload))
+        rapido = json.loads(ORJSONRenderer().render(payload))
+        assert rapido == padrao
+
+    def test_datetime_utc_com_z(self, payload):
+        conteudo = ORJSONRenderer().render(payload)
+        assert b'"2025-03-01T12:30:15.123456Z"' in conteudo
+
+    def test_dados_vazios(self):
+        assert ORJSONRenderer().render(None) == b''
+
+    def test_indentacao_explicita_usa_renderer_padrao(self, payload):
+        conteudo = ORJSONRenderer().render(payload, 'application/json; indent=4')
+        assert conteudo == JSONRenderer().render(payload, 'application/json; indent=4')
+
+class TestORJSONParser:
+    def test_parse(self):
+        dados = ORJSONParser().parse(BytesIO('{"nome": "João", "valor": 10.5}'.encode()))
+        assert dados == {'nome': 'João', 'valor': 10.5}
+
+    def test_json_invalido(self):
+        with pytest.raises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"nome": '))
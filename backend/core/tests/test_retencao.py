@@ -0,0 +1,68 @@
+import gzip
+import json
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from core.models import Notificacao, Usuario
+from core.services.retencao import aplicar_politica
+
+POLITICA = {'modelo': 'core.Notificacao', 'campo_data': 'data_criacao', 'dias': 30, 'filtro': {'lida': True}}
+
+@pytest.fixture
+def notificacoes(db):
+    usuario = Usuario.objects.create_user(username='retencao', email='retencao@ccbj.org', password='senha123')
+    antigas = [
+        Notificacao.objects.create(usuario=usuario, tipo='informacao', titulo=f'Antiga {i}', mensagem='-', lida=True)
+        for i in range(5)
+    ]
+    nao_lida = Notificacao.objects.create(usuario=usuario, tipo='alerta', titulo='Antiga não lida', mensagem='-')
+    recente = Notificacao.objects.create(usuario=usuario, tipo='informacao', titulo='Recente', mensagem='-', lida=True)
+
+    Notificacao.objects.filter(pk__in=[n.pk for n in antigas] + [nao_lida.pk]).update(
+        data_criacao=timezone.now() - timedelta(days=60)
+    )
+    return {'antigas': antigas, 'nao_lida': nao_lida, 'recente': recente}
+
+@pytest.mark.django_db
+class TestRetencao:
+    def test_simular_nao_exclui(self, notificacoes):
+        assert aplicar_politica('notificacoes', POLITICA, simular=True) == 5
+        assert Notificacao.objects.count() == 7
+
+    def test_excluir_em_lotes(self, notificacoes):
+        assert aplicar_politica('notificacoes', {**POLITICA, 'acao': 'excluir'}, lote=2) == 5
+        restantes = set(Notificacao.objects.values_list('pk', flat=True))
+        assert restantes == {notificacoes['nao_lida'].pk, notificacoes['recente'].pk}
+
+    def test_arquivar_grava_e_exclui(self, notificacoes, settings, tmp_path):
+        settings.RETENCAO_DIRETORIO_ARQUIVO = str(tmp_path)
+        assert aplicar_politica('notificacoes', {**POLITICA, 'acao': 'arquivar'}, lote=3) == 5
+
+        arquivos = list(tmp_path.glob('notificacoes-*.jsonl.gz'))
+        assert len(arquivos) == 1
+        with gzip.open(arquivos[0], 'rt', encoding='utf-8') as arquivo:
+            registros = [json.loads(linha) for linha in arquivo]
+        assert sorted(r['id'] for r in registros) == sorted(n.pk for n in notificacoes['antigas'])
+        assert Notificacao.objects.count() == 2
+
+    def test_nada_a_arquivar_nao_cria_arquivo(self, db, settings, tmp_path):
+        settings.RETENCAO_DIRETORIO_ARQUIVO = str(tmp_path)
+        assert aplicar_politica('notificacoes', {**POLITICA, 'acao': 'arquivar'}) == 0
+        assert list(tmp_path.iterdir()) == []
+
+    def test_referencia_desloca_o_prazo(self, notificacoes):
+        referencia = timezone.now() - timedelta(days=45)
+        assert aplicar_politica('notificacoes', POLITICA, simular=True, referencia=referencia) == 0
+
+    def test_acao_invalida(self, notificacoes):
+        with pytest.raises(ValueError):
+            aplicar_politica('notificacoes', {**POLITICA, 'acao': 'truncar'})
+
+@pytest.mark.django_db
+class TestGerenciarParticoes:
+    def test_fora_do_postgresql_so_avisa(self):
+        saida = StringIO()
+        call_command('gerenciar_particoes', converter=True, stdout=saida)
+        assert 'apenas no PostgreSQL' in saida.getvalue()
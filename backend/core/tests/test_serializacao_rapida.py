@@ -0,0 +1,57 @@
+import json
+import pytest
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from core.models import Contrato, ParcelaContrato, MovimentoFinanceiro
+from core.serializers.contratos_serializers import (
+    ContratoSerializer, ContratoDetalhadoSerializer, ParcelaContratoSerializer,
+    MovimentoFinanceiroSerializer
+)
+from core.serializers.leitura import plano_leitura
+
+DADOS_CARGA = dict(
+    setores=3, fontes=1, metas=2, atividades=2, rubricas=2,
+    bolsistas=15, credores=10, contratos=30, max_parcelas=4, semente=7,
+)
+
+def _json(dados):
+    return json.loads(JSONRenderer().render(dados))
+
+@pytest.mark.django_db
+class TestSerializacaoRapida:
+    @pytest.mark.parametrize('serializer_class, modelo', [
+        (ContratoSerializer, Contrato),
+        (ParcelaContratoSerializer, ParcelaContrato),
+        (MovimentoFinanceiroSerializer, MovimentoFinanceiro),
+    ])
+    def test_mesma_saida_do_serializer(self, dados_carga, serializer_class, modelo):
+        queryset = modelo.objects.order_by('pk')
+        plano = plano_leitura(serializer_class)
+        assert plano is not None
+
+        esperado = _json(serializer_class(queryset, many=True).data)
+        rapido = _json(plano.serializar(plano.aplicar(queryset)))
+        assert rapido == esperado
+
+    def test_fk_nula_mantem_chave_com_none(self, dados_carga):
+        contrato = Contrato.objects.filter(credor__isnull=True).first()
+        plano = plano_leitura(ContratoSerializer)
+
+        linha = plano.serializar(plano.aplicar(Contrato.objects.filter(pk=contrato.pk)))[0]
+        assert linha['credor'] is None
+        assert linha['bolsista'] == contrato.bolsista_id
+
+    def test_serializer_aninhado_usa_caminho_padrao(self):
+        assert plano_leitura(ContratoDetalhadoSerializer) is None
+
+    def test_listagem_paginada(self, dados_carga):
+        cliente = APIClient()
+        cliente.force_authenticate(user=dados_carga)
+
+        response = cliente.get(reverse('contrato-list'), {'ordering': 'id'})
+        assert response.status_code == 200
+        assert response.data['count'] == Contrato.objects.count()
+
+        primeiro = Contrato.objects.order_by('id').first()
+        assert response.data['results'][0] == _json(ContratoSerializer(primeiro).data)
@@ -0,0 +1,66 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.db.models import Sum
+from django.urls import reverse
+from core.models import Contrato, MovimentoFinanceiro, ParcelaContrato
+from core.services.series import calcular_serie, periodos
+
+DADOS_CARGA = dict(
+    setores=3, fontes=2, metas=2, atividades=2, rubricas=2,
+    bolsistas=10, credores=5, contratos=30, max_parcelas=6, semente=19,
+)
+
+@pytest.mark.django_db
+class TestSeries:
+    def test_periodos(self, db):
+        assert periodos(date(2025, 2, 14), date(2025, 8, 1), 'trimestre') == [
+            date(2025, 1, 1), date(2025, 4, 1), date(2025, 7, 1)
+        ]
+        assert periodos(date(2025, 6, 4), date(2025, 6, 16), 'semana') == [
+            date(2025, 6, 2), date(2025, 6, 9), date(2025, 6, 16)
+        ]
+
+    def test_saidas_mensais_por_setor(self, cliente):
+        fim = date.today()
+        inicio = date(fim.year - 1, 1, 1)
+        serie = calcular_serie('saidas', 'mes', inicio, fim, 'setor')
+
+        assert len(serie['total']) == len(serie['periodos'])
+        assert all(len(item['valores']) == len(serie['periodos']) for item in serie['series'])
+        esperado = MovimentoFinanceiro.objects.filter(
+            tipo='saida', data_movimento__gte=inicio, data_movimento__lte=fim
+        ).aggregate(t=Sum('valor'))['t'] or Decimal('0')
+        assert sum(serie['total']) == esperado
+        assert sum(sum(item['valores']) for item in serie['series']) == esperado
+
+    def test_granularidade_diaria_igual_a_mensal(self, cliente):
+        fim = date.today()
+        inicio = date(fim.year, fim.month, 1)
+        for metrica in ('entradas', 'saidas', 'saldo'):
+            diaria = calcular_serie(metrica, 'dia', inicio, fim)
+            mensal = calcular_serie(metrica, 'mes', inicio, fim)
+            assert sum(diaria['total']) == mensal['total'][0]
+
+    def test_pago_e_contratado(self, cliente):
+        serie = calcular_serie('pago', 'ano', date(2000, 1, 1), date(2100, 12, 31), 'tipo')
+        assert sum(serie['total']) == ParcelaContrato.objects.filter(status='pago').aggregate(t=Sum('valor'))['t']
+
+        serie = calcular_serie('contratos', 'ano', date(2000, 1, 1), date(2100, 12, 31))
+        assert sum(serie['total']) == Contrato.objects.exclude(status_contrato='cancelado').count()
+
+    def test_endpoint(self, cliente):
+        response = cliente.get(reverse('dashboard_series'), {
+            'metrica': 'saldo', 'granularidade': 'trimestre',
+            'inicio': '2024-02-10', 'fim': '2024-12-31', 'agrupamento': 'fonte',
+        })
+        assert response.status_code == 200
+        assert [str(p) for p in response.data['periodos']] == ['2024-01-01', '2024-04-01', '2024-07-01', '2024-10-01']
+
+    def test_parametros_invalidos(self, cliente):
+        url = reverse('dashboard_series')
+        assert cliente.get(url, {'metrica': 'lucro'}).status_code == 400
+        assert cliente.get(url, {'metrica': 'pago', 'inicio': '2025-02-01', 'fim': '2025-01-01'}).status_code == 400
+        assert cliente.get(url, {
+            'metrica': 'pago', 'granularidade': 'dia', 'inicio': '2000-01-01', 'fim': '2025-01-01'
+        }).status_code == 400
@@ -0,0 +1,91 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import FonteRecurso, Meta, Atividade, Rubrica, AlocacaoRecurso, Setor
+from core.services.simulacao import simular
+
+@pytest.fixture
+def cenario(db, admin_user):
+    fonte = FonteRecurso.objects.create(
+        nome='Fonte', valor_total=Decimal('10000.00'), data_inicio='2025-01-01'
+    )
+    meta = Meta.objects.create(
+        fonte_recurso=fonte, codigo='M1', descricao='Meta', valor_previsto=Decimal('10000.00')
+    )
+    atividade = Atividade.objects.create(
+        meta=meta, codigo='A1', descricao='Atividade', valor_previsto=Decimal('10000.00')
+    )
+    rubrica = Rubrica.objects.create(
+        atividade=atividade, nome='Rubrica', valor_previsto=Decimal('10000.00')
+    )
+    setor_a = Setor.objects.create(nome='A', responsavel=admin_user)
+    setor_b = Setor.objects.create(nome='B', responsavel=admin_user)
+    AlocacaoRecurso.objects.create(
+        fonte_recurso=fonte, setor=setor_a, rubrica=rubrica, valor_alocado=Decimal('1000.00')
+    )
+    return setor_a, setor_b, rubrica
+
+@pytest.mark.django_db
+class TestSimulacao:
+    def test_transferencia_e_contrato(self, cenario):
+        setor_a, setor_b, rubrica = cenario
+        operacoes = [
+            {'tipo': 'transferencia', 'setor_origem': setor_a.pk, 'setor_destino': setor_b.pk,
+             'rubrica': rubrica.pk, 'valor': '600.00'},
+            {'tipo': 'contrato', 'setor': setor_a.pk, 'rubrica': rubrica.pk, 'valor': '500.00'},
+            {'tipo': 'contrato', 'setor': setor_b.pk, 'rubrica': rubrica.pk, 'valor': '600.00'},
+        ]
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = simular(operacoes)
+        assert len(consultas.captured_queries) == 2
+
+        saldos = {item['setor']: item for item in resultado['saldos']}
+        assert saldos[setor_a.pk]['saldo_inicial'] == Decimal('1000.00')
+        assert saldos[setor_a.pk]['saldo'] == Decimal('-100.00')
+        assert saldos[setor_b.pk]['saldo'] == Decimal('0.00')
+
+        assert resultado['violacoes'] == [{
+            'setor': setor_a.pk, 'rubrica': rubrica.pk, 'saldo': Decimal('-100.00'),
+            'passo': 1, 'ja_negativo': False,
+        }]
+        assert AlocacaoRecurso.objects.get(setor=setor_a).valor_alocado == Decimal('1000.00')
+
+    def test_operacao_invalida(self, cenario):
+        with pytest.raises(ValueError, match='Operação 0'):
+            simular([{'tipo': 'contrato', 'setor': 1, 'valor': '10'}])
+
+    def test_valores_fora_do_limite(self, cenario):
+        setor_a, _, rubrica = cenario
+        operacao = {'tipo': 'alocacao', 'setor': setor_a.pk, 'rubrica': rubrica.pk}
+        for valor in ('1e20', 'NaN', 'Infinity', '-10000000000000.00'):
+            with pytest.raises(ValueError, match='Operação 0'):
+                simular([{**operacao, 'valor': valor}])
+
+        # Cada valor cabe no limite, mas a soma estoura o array de 64 bits
+        maximo = {**operacao, 'valor': '9999999999999.99'}
+        with pytest.raises(ValueError, match='limite da simulação'):
+            simular([maximo] * 10000)
+
+    def test_endpoint(self, cenario, admin_user):
+        setor_a, _, rubrica = cenario
+        cliente = APIClient()
+        cliente.force_authenticate(user=admin_user)
+
+        response = cliente.post(reverse('estrutura_simulacao'), {'operacoes': [
+            {'tipo': 'contrato', 'setor': setor_a.pk, 'rubrica': rubrica.pk, 'valor': '100.00'}
+        ] * 2000}, format='json')
+        assert response.status_code == 200
+        assert response.data['operacoes'] == 2000
+        assert response.data['violacoes'][0]['passo'] == 10
+
+        response = cliente.post(reverse('estrutura_simulacao'), {'operacoes': {}}, format='json')
+        assert response.status_code == 400
+
+        response = cliente.post(reverse('estrutura_simulacao'), {'operacoes': [
+            {'tipo': 'contrato', 'setor': setor_a.pk, 'rubrica': rubrica.pk, 'valor': '1e20'}
+        ]}, format='json')
+        assert response.status_code == 400
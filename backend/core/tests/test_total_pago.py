@@ -0,0 +1,54 @@
+import pytest
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.db.models import Sum
+from django.urls import reverse
+from core.models import Contrato, ParcelaContrato
+
+DADOS_CARGA = dict(
+    setores=2, fontes=1, metas=1, atividades=2, rubricas=2,
+    bolsistas=8, credores=4, contratos=12, max_parcelas=4, semente=21,
+)
+
+def _soma_pagas(contrato):
+    return contrato.parcelas.filter(status='pago').aggregate(t=Sum('valor'))['t'] or Decimal('0')
+
+@pytest.mark.django_db
+class TestTotalPago:
+    def test_pagamento_e_estorno_por_variacao(self, cliente):
+        parcela = ParcelaContrato.objects.filter(status='pendente').first()
+        antes = Contrato.objects.get(pk=parcela.contrato_id).total_pago
+
+        response = cliente.post(reverse('parcelacontrato-registrar-pagamento', args=[parcela.pk]), {}, format='json')
+        assert response.status_code == 200
+        contrato = Contrato.objects.get(pk=parcela.contrato_id)
+        assert contrato.total_pago == antes + parcela.valor == _soma_pagas(contrato)
+
+        response = cliente.post(reverse('parcelacontrato-cancelar-pagamento', args=[parcela.pk]), {}, format='json')
+        assert response.status_code == 200
+        assert Contrato.objects.get(pk=parcela.contrato_id).total_pago == antes
+
+    def test_alteracao_de_valor_de_parcela_paga(self, cliente):
+        parcela = ParcelaContrato.objects.filter(status='pago').first()
+        antes = Contrato.objects.get(pk=parcela.contrato_id).total_pago
+
+        response = cliente.patch(
+            reverse('parcelacontrato-detail', args=[parcela.pk]),
+            {'valor': str(parcela.valor + Decimal('10.00'))}, format='json'
+        )
+        assert response.status_code == 200
+        assert Contrato.objects.get(pk=parcela.contrato_id).total_pago == antes + Decimal('10.00')
+
+    def test_reconciliacao(self, cliente):
+        contratos = list(Contrato.objects.values_list('pk', flat=True)[:3])
+        Contrato.objects.filter(pk__in=contratos).update(total_pago=Decimal('1.23'))
+
+        saida = StringIO()
+        call_command('reconciliar_total_pago', stdout=saida)
+        assert '3 contratos' in saida.getvalue()
+        assert Contrato.objects.filter(pk=contratos[0], total_pago=Decimal('1.23')).exists()
+
+        call_command('reconciliar_total_pago', corrigir=True, stdout=StringIO())
+        for contrato in Contrato.objects.filter(pk__in=contratos):
+            assert contrato.total_pago == _soma_pagas(contrato)
@@ -11,6 +11,7 @@ from .views import (
     credores_views,
     contratos_views,
     sistema_views,
+    conciliacao_views,
 )
 
 # Configuração dos routers
@@ -40,9 +41,13 @@ router.register(r'parcelas-contratos', contratos_views.ParcelaContratoViewSet)
 router.register(r'historicos-processos', contratos_views.HistoricoProcessoViewSet)
 router.register(r'movimentos-financeiros', contratos_views.MovimentoFinanceiroViewSet)
 
+# Conciliação bancária
+router.register(r'extratos-bancarios', conciliacao_views.ExtratoBancarioViewSet)
+router.register(r'lancamentos-extrato', conciliacao_views.LancamentoExtratoViewSet)
+
 # Sistema
 router.register(r'configuracoes', sistema_views.ConfiguracaoSistemaViewSet)
-router.register(r'notificacoes', sistema_views.NotificacaoViewSet)
+router.register(r'notificacoes', sistema_views.NotificacaoViewSet, basename='notificacao')
 router.register(r'relatorios', sistema_views.RelatorioGeradoViewSet)
 router.register(r'projecoes-orcamentarias', sistema_views.ProjecaoOrcamentariaViewSet)
 
@@ -61,12 +66,23 @@ urlpatterns = [
     path('dashboard/resumo/', sistema_views.DashboardResumoView.as_view(), name='dashboard_resumo'),
     path('dashboard/contratos/', sistema_views.DashboardContratosView.as_view(), name='dashboard_contratos'),
     path('dashboard/financeiro/', sistema_views.DashboardFinanceiroView.as_view(), name='dashboard_financeiro'),
+    path('dashboard/series/', sistema_views.DashboardSeriesView.as_view(), name='dashboard_series'),
     
     # Relatórios
     path('relatorios/contratos/', sistema_views.RelatorioContratosView.as_view(), name='relatorio_contratos'),
     path('relatorios/financeiro/', sistema_views.RelatorioFinanceiroView.as_view(), name='relatorio_financeiro'),
     path('relatorios/bolsistas/', sistema_views.RelatorioBolsistasView.as_view(), name='relatorio_bolsistas'),
     
+    # Estrutura orçamentária
+    path('estrutura/arvore/', estrutura_views.ArvoreOrcamentariaView.as_view(), name='estrutura_arvore'),
+    path('estrutura/consistencia/', estrutura_views.ConsistenciaOrcamentariaView.as_view(), 
+         name='estrutura_consistencia'),
+    path('estrutura/simulacao/', estrutura_views.SimulacaoOrcamentariaView.as_view(), 
+         name='estrutura_simulacao'),
+    
+    # Métricas do sistema
+    path('sistema/metricas/conexoes/', sistema_views.MetricasConexoesView.as_view(), name='metricas_conexoes'),
+    
     # Verificações
     path('verificacoes/disponibilidade-orcamentaria/', 
          contratos_views.VerificacaoDisponibilidadeOrcamentariaView.as_view(), 
@@ -3,3 +3,4 @@ from .estrutura_views import *
 from .credores_views import *
 from .contratos_views import *
 from .sistema_views import *
+from .conciliacao_views import *
@@ -0,0 +1,136 @@
+from rest_framework import viewsets, permissions, status, filters
+from rest_framework.response import Response
+from rest_framework.decorators import action
+from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
+from core.models import ExtratoBancario, LancamentoExtrato
+from core.serializers.conciliacao_serializers import (
+    ExtratoBancarioSerializer, LancamentoExtratoSerializer, ImportacaoExtratoSerializer,
+    ConciliacaoParametrosSerializer, MovimentoPendenteSerializer
+)
+from core.services import conciliacao
+from core.services.acesso import contexto_acesso
+from core.views.mixins import EscopoSetorMixin
+
+
+class ExtratoBancarioViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint para importar e conciliar extratos bancários.
+    """
+    queryset = ExtratoBancario.objects.select_related('importado_por')
+    serializer_class = ExtratoBancarioSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['formato', 'banco', 'conta', 'importado_por']
+    search_fields = ['arquivo_nome']
+    ordering_fields = ['data_importacao', 'data_inicio', 'data_fim']
+    ordering = ['-data_importacao']
+    
+    def get_permissions(self):
+        if self.action in ('importar', 'conciliar'):
+            return [permissions.IsAdminUser()]
+        return super().get_permissions()
+    
+    def get_queryset(self):
+        """
+        O extrato não tem setor: com escopo restrito, aparecem apenas os extratos com
+        lançamentos conciliados com movimentos dos setores visíveis.
+        """
+        queryset = super().get_queryset()
+        acesso = contexto_acesso(self.request)
+        if acesso.irrestrito:
+            return queryset
+        return queryset.filter(
+            pk__in=acesso.filtrar(LancamentoExtrato.objects.all(), 'movimento__setor').values('extrato')
+        )
+    
+    @action(detail=False, methods=['post'])
+    def importar(self, request):
+        """
+        Importa um extrato OFX ou CSV e, por padrão, já executa a conciliação automática.
+        """
+        serializer = ImportacaoExtratoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        dados = serializer.validated_data
+        arquivo = dados['arquivo']
+        
+        try:
+            extrato = conciliacao.importar_extrato(
+                arquivo.read(), arquivo.name, request.user,
+                banco=dados.get('banco', ''), conta=dados.get('conta', '')
+            )
+        except ValueError as erro:
+            return Response({"detail": str(erro)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        resposta = {'extrato': self.get_serializer(extrato).data}
+        if dados['conciliar']:
+            resposta['conciliacao'] = conciliacao.conciliar(extrato)
+        return Response(resposta, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'])
+    def conciliar(self, request, pk=None):
+        """
+        Executa a conciliação automática dos lançamentos ainda pendentes do extrato.
+        """
+        parametros = ConciliacaoParametrosSerializer(data=request.data)
+        parametros.is_valid(raise_exception=True)
+        
+        return Response(conciliacao.conciliar(self.get_object(), parametros.validated_data.get('janela')))
+    
+    @action(detail=True, methods=['get'])
+    def pendencias(self, request, pk=None):
+        """
+        Itens sem conciliação: lançamentos do extrato (?lado=extrato, padrão) ou movimentos
+        do período do extrato sem lançamento (?lado=movimentos).
+        """
+        extrato = self.get_object()
+        acesso = contexto_acesso(request)
+        if request.query_params.get('lado') == 'movimentos':
+            consulta = conciliacao.movimentos_pendentes(
+                *conciliacao.janela_extrato(extrato), setores=acesso.setores
+            )
+            consulta = consulta.order_by('data_movimento', 'id')
+            serializer_class = MovimentoPendenteSerializer
+        else:
+            # Mesmo escopo de LancamentoExtratoViewSet: lançamento sem movimento não tem
+            # setor, então só usuários sem restrição de setor veem os pendentes
+            consulta = acesso.filtrar(extrato.lancamentos.filter(movimento__isnull=True), 'movimento__setor')
+            consulta = consulta.order_by('data', 'id')
+            serializer_class = LancamentoExtratoSerializer
+        
+        page = self.paginate_queryset(consulta)
+        if page is not None:
+            return self.get_paginated_response(serializer_class(page, many=True).data)
+        return Response(serializer_class(consulta, many=True).data)
+
+
+class LancamentoExtratoViewSet(EscopoSetorMixin, viewsets.ModelViewSet):
+    """
+    API endpoint para consultar lançamentos de extrato e ajustar a conciliação manualmente.
+    Com escopo restrito, só aparecem lançamentos conciliados com movimentos dos setores visíveis.
+    """
+    queryset = LancamentoExtrato.objects.all()
+    serializer_class = LancamentoExtratoSerializer
+    campos_setor = ('movimento__setor',)
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'patch', 'head', 'options']
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = {'extrato': ['exact'], 'movimento': ['exact', 'isnull'], 'data': ['gte', 'lte']}
+    search_fields = ['descricao', 'documento']
+    ordering_fields = ['data', 'valor']
+    ordering = ['data', 'id']
+    
+    def get_permissions(self):
+        if self.action == 'partial_update':
+            return [permissions.IsAdminUser()]
+        return super().get_permissions()
+    
+    def perform_update(self, serializer):
+        self.verificar_escopo(serializer)
+        with transaction.atomic():
+            lancamento = serializer.save(conciliado_manualmente=True)
+            ExtratoBancario.objects.filter(pk=lancamento.extrato_id).update(
+                total_conciliados=LancamentoExtrato.objects.filter(
+                    extrato_id=lancamento.extrato_id, movimento__isnull=False
+                ).count()
+            )
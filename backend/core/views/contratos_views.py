@@ -2,31 +2,43 @@ from rest_framework import viewsets, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
+from core.filters import BuscaTextualFilter
+from core.views.mixins import ConsultaDinamicaMixin, EscopoSetorMixin, ListagemRapidaMixin
 from core.models import (
     Contrato, ParcelaContrato, HistoricoProcesso, MovimentoFinanceiro
 )
 from core.serializers.contratos_serializers import (
     ContratoSerializer, ParcelaContratoSerializer, HistoricoProcessoSerializer,
     MovimentoFinanceiroSerializer, ContratoDetalhadoSerializer,
-    VerificacaoDisponibilidadeOrcamentariaSerializer
+    VerificacaoDisponibilidadeOrcamentariaSerializer, PagamentoLoteSerializer,
+    RemessaCnabSerializer, RetornoCnabSerializer
+)
+from core.services import cnab
+from core.services.acesso import contexto_acesso
+from core.services.pagamentos import (
+    ajustar_total_pago_auditado, contribuicao, registrar_pagamentos_lote
 )
 from rest_framework.views import APIView
+from django.db import transaction
 from django.db.models import Sum, F, Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from collections import defaultdict
+from decimal import Decimal
 
 
-class ContratoViewSet(viewsets.ModelViewSet):
+class ContratoViewSet(EscopoSetorMixin, ListagemRapidaMixin, ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar contratos.
     """
     queryset = Contrato.objects.all()
     serializer_class = ContratoSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, BuscaTextualFilter]
     filterset_fields = ['tipo', 'status_processo', 'setor', 'programa', 'bolsista', 'credor', 'atividade', 'rubrica', 'meta']
     search_fields = ['nome_curso_acao', 'observacoes_parcela']
-    ordering_fields = ['nome_curso_acao', 'data_inicio', 'data_fim', 'valor_total', 'data_criacao']
-    ordering = ['-data_criacao']
+    ordering_fields = ['nome_curso_acao', 'data_inicio', 'data_fim', 'valor_total', 'criado_em']
+    ordering = ['-criado_em']
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -34,6 +46,7 @@ class ContratoViewSet(viewsets.ModelViewSet):
         return ContratoSerializer
     
     def perform_create(self, serializer):
+        self.verificar_escopo(serializer)
         serializer.save(
             criado_por=self.request.user,
             atualizado_por=self.request.user
@@ -53,6 +66,8 @@ class ContratoViewSet(viewsets.ModelViewSet):
         self._criar_parcelas(contrato)
     
     def perform_update(self, serializer):
+        self.verificar_escopo(serializer)
+        
         # Obter status anterior
         contrato = self.get_object()
         status_anterior = contrato.status_processo
@@ -130,12 +145,13 @@ class ContratoViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ParcelaContratoViewSet(viewsets.ModelViewSet):
+class ParcelaContratoViewSet(EscopoSetorMixin, ListagemRapidaMixin, ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar parcelas de contratos.
     """
     queryset = ParcelaContrato.objects.all()
     serializer_class = ParcelaContratoSerializer
+    campos_setor = ('contrato__setor',)
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['contrato', 'status']
@@ -143,94 +159,199 @@ class ParcelaContratoViewSet(viewsets.ModelViewSet):
     ordering_fields = ['contrato', 'numero_parcela', 'data_prevista', 'data_pagamento', 'valor']
     ordering = ['contrato', 'numero_parcela']
     
+    def get_permissions(self):
+        if self.action in ('remessa_cnab', 'retorno_cnab'):
+            return [permissions.IsAdminUser()]
+        return super().get_permissions()
+    
+    def _parcela_bloqueada(self):
+        """
+        Parcela da URL com a linha (e a do contrato) bloqueada até o fim da transação.
+        """
+        parcela = self.get_object()
+        return (
+            ParcelaContrato.objects
+            .select_for_update(of=('self', 'contrato'))
+            .select_related('contrato__meta')
+            .get(pk=parcela.pk)
+        )
+    
+    def perform_create(self, serializer):
+        self.verificar_escopo(serializer)
+        with transaction.atomic():
+            parcela = serializer.save()
+            contrato = Contrato.objects.select_for_update().get(pk=parcela.contrato_id)
+            ajustar_total_pago_auditado({contrato.pk: contrato}, {contrato.pk: contribuicao(parcela)})
+    
+    def perform_update(self, serializer):
+        self.verificar_escopo(serializer)
+        with transaction.atomic():
+            anterior = ParcelaContrato.objects.select_for_update().get(pk=serializer.instance.pk)
+            parcela = serializer.save()
+            
+            deltas = defaultdict(Decimal)
+            deltas[anterior.contrato_id] -= contribuicao(anterior)
+            deltas[parcela.contrato_id] += contribuicao(parcela)
+            contratos = Contrato.objects.select_for_update().in_bulk(list(deltas))
+            ajustar_total_pago_auditado(contratos, deltas)
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            contrato = Contrato.objects.select_for_update().get(pk=instance.contrato_id)
+            delta = -contribuicao(instance)
+            instance.delete()
+            ajustar_total_pago_auditado({contrato.pk: contrato}, {contrato.pk: delta})
+    
     @action(detail=True, methods=['post'])
     def registrar_pagamento(self, request, pk=None):
         """
         Registra o pagamento de uma parcela.
         """
-        parcela = self.get_object()
-        
-        # Verificar se a parcela já foi paga
-        if parcela.status == 'pago':
-            return Response(
-                {"detail": "Esta parcela já foi paga."},
-                status=status.HTTP_400_BAD_REQUEST
+        with transaction.atomic():
+            parcela = self._parcela_bloqueada()
+            
+            # Verificar se a parcela já foi paga
+            if parcela.status == 'pago':
+                return Response(
+                    {"detail": "Esta parcela já foi paga."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # Obter data de pagamento
+            data_pagamento = request.data.get('data_pagamento', timezone.now().date())
+            atividade_pagamento = request.data.get('atividade_pagamento', '')
+            observacao = request.data.get('observacao', '')
+            
+            # Atualizar parcela
+            parcela.status = 'pago'
+            parcela.data_pagamento = data_pagamento
+            parcela.atividade_pagamento = atividade_pagamento
+            parcela.observacao = observacao
+            parcela.save()
+            
+            # Atualizar total pago no contrato pela variação, sem reagregar as parcelas
+            contrato = parcela.contrato
+            ajustar_total_pago_auditado({contrato.pk: contrato}, {contrato.pk: parcela.valor})
+            
+            # Registrar movimento financeiro
+            MovimentoFinanceiro.objects.create(
+                tipo='saida',
+                fonte_recurso=contrato.meta.fonte_recurso,
+                setor=contrato.setor,
+                rubrica=contrato.rubrica,
+                contrato=contrato,
+                parcela=parcela,
+                valor=parcela.valor,
+                data_movimento=data_pagamento,
+                descricao=f"Pagamento da parcela {parcela.numero_parcela} do contrato {contrato.nome_curso_acao}",
+                usuario=request.user
             )
         
-        # Obter data de pagamento
-        data_pagamento = request.data.get('data_pagamento', timezone.now().date())
-        atividade_pagamento = request.data.get('atividade_pagamento', '')
-        observacao = request.data.get('observacao', '')
-        
-        # Atualizar parcela
-        parcela.status = 'pago'
-        parcela.data_pagamento = data_pagamento
-        parcela.atividade_pagamento = atividade_pagamento
-        parcela.observacao = observacao
-        parcela.save()
-        
-        # Atualizar total pago no contrato
-        contrato = parcela.contrato
-        contrato.total_pago = contrato.parcelas.filter(status='pago').aggregate(total=Sum('valor'))['total'] or 0
-        contrato.save()
+        serializer = self.get_serializer(parcela)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['post'])
+    def pagar_lote(self, request):
+        """
+        Registra o pagamento de várias parcelas de uma vez (ex.: folha mensal de bolsas).
+        Retorna o resultado de cada parcela; as que não puderem ser pagas não impedem as demais.
+        """
+        serializer = PagamentoLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        dados = serializer.validated_data
         
-        # Registrar movimento financeiro
-        MovimentoFinanceiro.objects.create(
-            tipo='saida',
-            fonte_recurso=contrato.meta.fonte_recurso,
-            setor=contrato.setor,
-            rubrica=contrato.rubrica,
-            contrato=contrato,
-            parcela=parcela,
-            valor=parcela.valor,
-            data_movimento=data_pagamento,
-            descricao=f"Pagamento da parcela {parcela.numero_parcela} do contrato {contrato.nome_curso_acao}",
-            usuario=request.user
+        resultados = registrar_pagamentos_lote(
+            dados['parcelas'],
+            request.user,
+            data_pagamento=dados.get('data_pagamento'),
+            atividade_pagamento=dados.get('atividade_pagamento'),
+            observacao=dados.get('observacao'),
+            setores=contexto_acesso(request).setores,
         )
+        pagas = sum(1 for resultado in resultados if resultado['resultado'] == 'pago')
         
-        serializer = self.get_serializer(parcela)
-        return Response(serializer.data)
+        return Response({
+            'pagas': pagas,
+            'erros': len(resultados) - pagas,
+            'resultados': resultados,
+        })
     
-    @action(detail=True, methods=['post'])
-    def cancelar_pagamento(self, request, pk=None):
+    @action(detail=False, methods=['post'])
+    def remessa_cnab(self, request):
         """
-        Cancela o pagamento de uma parcela.
+        Gera em streaming o arquivo de remessa CNAB 240 das parcelas pendentes informadas
+        (ou vencendo até data_ate) e registra a remessa; parcelas aguardando retorno de
+        outra remessa só entram com `reenviar`.
         """
-        parcela = self.get_object()
+        serializer = RemessaCnabSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        dados = serializer.validated_data
         
-        # Verificar se a parcela está paga
-        if parcela.status != 'pago':
+        parcelas = cnab.parcelas_remessa(dados.get('parcelas'), dados.get('data_ate'), dados['reenviar'])
+        if not parcelas.exists():
             return Response(
-                {"detail": "Esta parcela não está paga."},
+                {"detail": "Nenhuma parcela pendente para a remessa."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Atualizar parcela
-        parcela.status = 'pendente'
-        parcela.data_pagamento = None
-        parcela.save()
-        
-        # Atualizar total pago no contrato
-        contrato = parcela.contrato
-        contrato.total_pago = contrato.parcelas.filter(status='pago').aggregate(total=Sum('valor'))['total'] or 0
-        contrato.save()
+        data_pagamento = dados.get('data_pagamento') or timezone.localdate()
+        remessa = cnab.registrar_remessa(parcelas, data_pagamento, request.user, dados['reenviar'])
+        registros = cnab.gerar_registros(cnab.parcelas_da_remessa(remessa), data_pagamento, remessa.nsa)
+        resposta = StreamingHttpResponse(cnab.blocos_remessa(registros), content_type='text/plain; charset=ascii')
+        resposta['Content-Disposition'] = f'attachment; filename="remessa_{remessa.nsa:06d}.rem"'
+        return resposta
+    
+    @action(detail=False, methods=['post'])
+    def retorno_cnab(self, request):
+        """
+        Processa o arquivo de retorno CNAB 240 e baixa em lote as parcelas pagas pelo banco.
+        """
+        serializer = RetornoCnabSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        # Excluir movimento financeiro
-        MovimentoFinanceiro.objects.filter(
-            contrato=contrato,
-            parcela=parcela
-        ).delete()
+        return Response(cnab.processar_retorno(serializer.validated_data['arquivo'], request.user))
+    
+    @action(detail=True, methods=['post'])
+    def cancelar_pagamento(self, request, pk=None):
+        """
+        Cancela o pagamento de uma parcela.
+        """
+        with transaction.atomic():
+            parcela = self._parcela_bloqueada()
+            
+            # Verificar se a parcela está paga
+            if parcela.status != 'pago':
+                return Response(
+                    {"detail": "Esta parcela não está paga."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # Atualizar parcela
+            parcela.status = 'pendente'
+            parcela.data_pagamento = None
+            parcela.save()
+            
+            # Atualizar total pago no contrato pela variação
+            contrato = parcela.contrato
+            ajustar_total_pago_auditado({contrato.pk: contrato}, {contrato.pk: -parcela.valor})
+            
+            # Excluir movimento financeiro
+            MovimentoFinanceiro.objects.filter(
+                contrato=contrato,
+                parcela=parcela
+            ).delete()
         
         serializer = self.get_serializer(parcela)
         return Response(serializer.data)
 
 
-class HistoricoProcessoViewSet(viewsets.ReadOnlyModelViewSet):
+class HistoricoProcessoViewSet(EscopoSetorMixin, ConsultaDinamicaMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint para visualizar históricos de processos.
     """
     queryset = HistoricoProcesso.objects.all()
     serializer_class = HistoricoProcessoSerializer
+    campos_setor = ('contrato__setor',)
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['contrato', 'usuario', 'status_anterior', 'status_novo']
@@ -239,7 +360,7 @@ class HistoricoProcessoViewSet(viewsets.ReadOnlyModelViewSet):
     ordering = ['-data_alteracao']
 
 
-class MovimentoFinanceiroViewSet(viewsets.ModelViewSet):
+class MovimentoFinanceiroViewSet(EscopoSetorMixin, ListagemRapidaMixin, ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar movimentos financeiros.
     """
@@ -252,8 +373,20 @@ class MovimentoFinanceiroViewSet(viewsets.ModelViewSet):
     ordering_fields = ['data_movimento', 'valor', 'tipo']
     ordering = ['-data_movimento']
     
+    # A consolidação MovimentoMensal é ajustada pelos sinais na mesma transação da gravação
+    @transaction.atomic
     def perform_create(self, serializer):
+        self.verificar_escopo(serializer)
         serializer.save(usuario=self.request.user)
+    
+    @transaction.atomic
+    def perform_update(self, serializer):
+        self.verificar_escopo(serializer)
+        serializer.save()
+    
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
 
 
 class VerificacaoDisponibilidadeOrcamentariaView(APIView):
@@ -2,6 +2,8 @@ from rest_framework import viewsets, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
+from core.views.mixins import ConsultaDinamicaMixin
+from core.filters import BuscaTextualFilter
 from core.models import Credor, Bolsista
 from core.serializers.credores_serializers import (
     CredorSerializer, BolsistaSerializer, CredorDetalhadoSerializer,
@@ -12,14 +14,14 @@ from django.db.models import Count, Sum, Q
 from django.utils import timezone
 
 
-class CredorViewSet(viewsets.ModelViewSet):
+class CredorViewSet(ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar credores.
     """
     queryset = Credor.objects.all()
     serializer_class = CredorSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, BuscaTextualFilter]
     filterset_fields = ['ativo']
     search_fields = ['razao_social', 'nome_fantasia', 'cnpj', 'email']
     ordering_fields = ['razao_social', 'cnpj', 'ativo']
@@ -58,14 +60,14 @@ class CredorViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class BolsistaViewSet(viewsets.ModelViewSet):
+class BolsistaViewSet(ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar bolsistas.
     """
     queryset = Bolsista.objects.all()
     serializer_class = BolsistaSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, BuscaTextualFilter]
     filterset_fields = ['ativo']
     search_fields = ['nome', 'cpf', 'email']
     ordering_fields = ['nome', 'cpf', 'ativo']
@@ -1,7 +1,9 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from core.views.mixins import ConsultaDinamicaMixin, EscopoSetorMixin
 from core.models import (
     Setor, Programa, FonteRecurso, Meta, Atividade, 
     Rubrica, AlocacaoRecurso, TransferenciaRecurso
@@ -12,14 +14,18 @@ from core.serializers.estrutura_serializers import (
     TransferenciaRecursoSerializer, FonteRecursoDetalhadaSerializer,
     MetaDetalhadaSerializer, AtividadeDetalhadaSerializer
 )
+from core.services.acesso import contexto_acesso
+from core.services.orcamento import arvore_em_cache, verificar_consistencia
+from core.services.simulacao import simular
 
 
-class SetorViewSet(viewsets.ModelViewSet):
+class SetorViewSet(EscopoSetorMixin, ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar setores.
     """
     queryset = Setor.objects.all()
     serializer_class = SetorSerializer
+    campos_setor = ('pk',)
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['ativo', 'responsavel']
@@ -54,7 +60,7 @@ class SetorViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ProgramaViewSet(viewsets.ModelViewSet):
+class ProgramaViewSet(ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar programas.
     """
@@ -84,7 +90,7 @@ class ProgramaViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class FonteRecursoViewSet(viewsets.ModelViewSet):
+class FonteRecursoViewSet(ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar fontes de recursos.
     """
@@ -128,7 +134,7 @@ class FonteRecursoViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class MetaViewSet(viewsets.ModelViewSet):
+class MetaViewSet(ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar metas.
     """
@@ -173,7 +179,7 @@ class MetaViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class AtividadeViewSet(viewsets.ModelViewSet):
+class AtividadeViewSet(ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar atividades.
     """
@@ -218,7 +224,7 @@ class AtividadeViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class RubricaViewSet(viewsets.ModelViewSet):
+class RubricaViewSet(ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar rubricas.
     """
@@ -268,7 +274,7 @@ class RubricaViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class AlocacaoRecursoViewSet(viewsets.ModelViewSet):
+class AlocacaoRecursoViewSet(EscopoSetorMixin, ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar alocações de recursos.
     """
@@ -287,12 +293,15 @@ class AlocacaoRecursoViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class TransferenciaRecursoViewSet(viewsets.ModelViewSet):
+class TransferenciaRecursoViewSet(EscopoSetorMixin, ConsultaDinamicaMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar transferências de recursos.
     """
     queryset = TransferenciaRecurso.objects.all()
     serializer_class = TransferenciaRecursoSerializer
+    campos_setor = ('setor_origem', 'setor_destino')
+    # Quem está fora do setor de origem não movimenta os recursos dele
+    campos_setor_gravacao = ('setor_origem',)
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['setor_origem', 'setor_destino', 'rubrica', 'status']
@@ -394,3 +403,91 @@ class TransferenciaRecursoViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(transferencia)
         return Response(serializer.data)
+
+
+def _filtros_ramo(request):
+    """
+    Lê `fonte`, `meta` e `atividade` da query string; None se algum não for inteiro.
+    """
+    filtros = {}
+    for nome in ('fonte', 'meta', 'atividade'):
+        valor = request.query_params.get(nome)
+        if valor in (None, ''):
+            continue
+        try:
+            filtros[nome] = int(valor)
+        except ValueError:
+            return None
+    return filtros
+
+
+def _resposta_filtro_invalido():
+    return Response(
+        {"detail": "Os parâmetros 'fonte', 'meta' e 'atividade' devem ser números inteiros."},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+class ArvoreOrcamentariaView(APIView):
+    """
+    API endpoint para obter a árvore Fonte → Meta → Atividade → Rubrica com os
+    valores previsto, alocado, comprometido e pago consolidados em cada nível.
+    
+    Parâmetros opcionais: `fonte`, `meta` ou `atividade` (id da raiz do ramo) e
+    `ativo=true` para ignorar itens inativos.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, format=None):
+        filtros = _filtros_ramo(request)
+        if filtros is None:
+            return _resposta_filtro_invalido()
+        
+        apenas_ativos = request.query_params.get('ativo', '').lower() in ('true', '1')
+        
+        return Response(arvore_em_cache(
+            apenas_ativos=apenas_ativos, setores=contexto_acesso(request).setores, **filtros
+        ))
+
+
+class ConsistenciaOrcamentariaView(APIView):
+    """
+    API endpoint para listar inconsistências da estrutura orçamentária (somas que
+    ultrapassam o limite do nível acima), na árvore inteira ou no ramo informado.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, format=None):
+        filtros = _filtros_ramo(request)
+        if filtros is None:
+            return _resposta_filtro_invalido()
+        
+        violacoes = verificar_consistencia(**filtros)
+        return Response({'total': len(violacoes), 'violacoes': violacoes})
+
+
+class SimulacaoOrcamentariaView(APIView):
+    """
+    API endpoint para simular transferências, alocações e novos contratos sobre os
+    saldos atuais por setor/rubrica, sem gravar nada no banco.
+    
+    Corpo: {"operacoes": [{"tipo": "transferencia", "setor_origem": 1, "setor_destino": 2,
+    "rubrica": 3, "valor": "1000.00"}, {"tipo": "contrato", "setor": 2, "rubrica": 3,
+    "valor": "500.00"}, ...]}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, format=None):
+        operacoes = request.data.get('operacoes')
+        if not isinstance(operacoes, list):
+            return Response(
+                {"detail": "Informe 'operacoes' como uma lista."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            resultado = simular(operacoes)
+        except ValueError as erro:
+            return Response({"detail": str(erro)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(resultado)
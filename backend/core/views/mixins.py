@@ -0,0 +1,93 @@
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from core.serializers.dinamicos import planejar_consulta
+from core.serializers.leitura import plano_leitura
+from core.services.acesso import contexto_acesso
+
+
+class ListagemRapidaMixin:
+    """
+    Serve a action `list` pelo caminho rápido de leitura (`values_list()` + plano
+    pré-calculado) quando o serializer da listagem permite; caso contrário, usa o
+    `list` padrão do DRF. A saída é idêntica à do serializer.
+    """
+    
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        plano = plano_leitura(type(serializer), tuple(serializer.fields))
+        if plano is None:
+            return super().list(request, *args, **kwargs)
+        
+        queryset = plano.aplicar(self.filter_queryset(self.get_queryset()))
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plano.serializar(page))
+        
+        return Response(plano.serializar(queryset))
+
+
+class ConsultaDinamicaMixin:
+    """
+    Ajusta o queryset de `list`/`retrieve` aos campos que o serializer vai de fato
+    emitir (`?fields=`/`?expand=`): `.only()` nas colunas, `select_related` nas FKs
+    e `prefetch_related` nas relações expandidas.
+    """
+    
+    acoes_planejadas = ('list', 'retrieve')
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, 'action', None) in self.acoes_planejadas:
+            queryset = planejar_consulta(queryset, self.get_serializer())
+        return queryset
+
+
+class EscopoSetorMixin:
+    """
+    Restringe o queryset aos setores visíveis para o usuário da requisição
+    (ContextoAcesso). `campos_setor` são os caminhos do modelo até o setor; com mais
+    de um, basta um deles estar no escopo.
+    
+    Na gravação, todos os `campos_setor_gravacao` (padrão: `campos_setor`) do objeto
+    resultante precisam estar no escopo; viewsets que redefinem perform_create ou
+    perform_update chamam `verificar_escopo` antes de salvar.
+    """
+    
+    campos_setor = ('setor',)
+    campos_setor_gravacao = None
+    
+    def get_queryset(self):
+        return contexto_acesso(self.request).filtrar(super().get_queryset(), *self.campos_setor)
+    
+    def _setor_gravado(self, serializer, campo):
+        # Setor resultante da gravação: dado enviado ou, na falta dele, o da instância
+        instancia = serializer.instance
+        raiz, *resto = campo.split('__')
+        if raiz == 'pk':
+            return instancia.pk if instancia is not None else None
+        valor = serializer.validated_data.get(raiz, getattr(instancia, raiz, None))
+        if resto:
+            for parte in resto[:-1]:
+                valor = getattr(valor, parte, None)
+            valor = getattr(valor, f'{resto[-1]}_id', None)
+        return getattr(valor, 'pk', valor)
+    
+    def verificar_escopo(self, serializer):
+        """
+        Levanta PermissionDenied se a gravação deixar o objeto fora dos setores do usuário.
+        """
+        acesso = contexto_acesso(self.request)
+        if acesso.irrestrito:
+            return
+        for campo in self.campos_setor_gravacao or self.campos_setor:
+            if not acesso.permite(self._setor_gravado(serializer, campo)):
+                raise PermissionDenied('Setor fora do seu escopo de acesso.')
+    
+    def perform_create(self, serializer):
+        self.verificar_escopo(serializer)
+        super().perform_create(serializer)
+    
+    def perform_update(self, serializer):
+        self.verificar_escopo(serializer)
+        super().perform_update(serializer)
@@ -3,19 +3,25 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
-from django.db.models import Sum, Count, Q, F
+from django.db import transaction
+from django.db.models import Sum, Count, Q
 from django.utils import timezone
-from datetime import timedelta
 import calendar
 from core.models import (
-    ConfiguracaoSistema, Notificacao, RelatorioGerado, ProjecaoOrcamentaria,
+    ConfiguracaoSistema, Notificacao, ContadorNotificacoes, RelatorioGerado, ProjecaoOrcamentaria,
     Contrato, Setor, FonteRecurso, Meta, Atividade, Rubrica, AlocacaoRecurso,
     MovimentoFinanceiro, Credor, Bolsista
 )
+from core.services import movimento_mensal
+from core.services.metricas import metricas_conexoes
+from core.services.projecao import atualizar_projecoes, relatorio_variacao, somar_meses
+from core.services.acesso import contexto_acesso
+from core.services.series import serie_em_cache
+from core.views.mixins import EscopoSetorMixin
 from core.serializers.sistema_serializers import (
     ConfiguracaoSistemaSerializer, NotificacaoSerializer, RelatorioGeradoSerializer,
-    ProjecaoOrcamentariaSerializer, DashboardResumoSerializer,
-    DashboardContratosSerializer, DashboardFinanceiroSerializer
+    ProjecaoOrcamentariaSerializer, ProjecaoParametrosSerializer, DashboardResumoSerializer,
+    DashboardContratosSerializer, DashboardFinanceiroSerializer, SerieParametrosSerializer
 )
 
 
@@ -49,6 +55,22 @@ class NotificacaoViewSet(viewsets.ModelViewSet):
         """
         return Notificacao.objects.filter(usuario=self.request.user)
     
+    def perform_update(self, serializer):
+        # Manter o contador coerente quando `lida` ou `usuario` é alterado por PUT/PATCH.
+        # O estado anterior é relido com a linha travada, para que PATCHes concorrentes
+        # não ajustem o contador duas vezes pela mesma mudança.
+        with transaction.atomic():
+            antes = Notificacao.objects.select_for_update().values('lida', 'usuario_id').get(
+                pk=serializer.instance.pk
+            )
+            notificacao = serializer.save()
+            
+            if (antes['lida'], antes['usuario_id']) != (notificacao.lida, notificacao.usuario_id):
+                if not antes['lida']:
+                    ContadorNotificacoes.ajustar(antes['usuario_id'], -1)
+                if not notificacao.lida:
+                    ContadorNotificacoes.ajustar(notificacao.usuario_id, 1)
+    
     @action(detail=True, methods=['post'])
     def marcar_como_lida(self, request, pk=None):
         """
@@ -56,16 +78,22 @@ class NotificacaoViewSet(viewsets.ModelViewSet):
         """
         notificacao = self.get_object()
         
-        if notificacao.lida:
+        # Atualização condicional: só decrementa o contador se esta chamada mudou o estado
+        agora = timezone.now()
+        atualizadas = Notificacao.objects.filter(pk=notificacao.pk, lida=False).update(
+            lida=True, data_leitura=agora
+        )
+        
+        if not atualizadas:
             return Response(
                 {"detail": "Esta notificação já está marcada como lida."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        notificacao.lida = True
-        notificacao.data_leitura = timezone.now()
-        notificacao.save()
+        ContadorNotificacoes.ajustar(notificacao.usuario_id, -1)
         
+        notificacao.lida = True
+        notificacao.data_leitura = agora
         serializer = self.get_serializer(notificacao)
         return Response(serializer.data)
     
@@ -74,8 +102,10 @@ class NotificacaoViewSet(viewsets.ModelViewSet):
         """
         Marca todas as notificações do usuário como lidas.
         """
-        notificacoes = self.get_queryset().filter(lida=False)
-        count = notificacoes.count()
+        # O UPDATE já retorna a quantidade de linhas afetadas, dispensando o COUNT prévio
+        count = self.get_queryset().filter(lida=False).update(
+            lida=True, data_leitura=timezone.now()
+        )
         
         if count == 0:
             return Response(
@@ -83,9 +113,16 @@ class NotificacaoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        notificacoes.update(lida=True, data_leitura=timezone.now())
+        ContadorNotificacoes.ajustar(request.user.pk, -count)
         
         return Response({"detail": f"{count} notificações marcadas como lidas."})
+    
+    @action(detail=False, methods=['get'])
+    def contagem(self, request):
+        """
+        Retorna a quantidade de notificações não lidas do usuário a partir do contador desnormalizado.
+        """
+        return Response({"nao_lidas": ContadorNotificacoes.obter(request.user.pk)})
 
 
 class RelatorioGeradoViewSet(viewsets.ModelViewSet):
@@ -105,7 +142,7 @@ class RelatorioGeradoViewSet(viewsets.ModelViewSet):
         serializer.save(usuario=self.request.user)
 
 
-class ProjecaoOrcamentariaViewSet(viewsets.ModelViewSet):
+class ProjecaoOrcamentariaViewSet(EscopoSetorMixin, viewsets.ModelViewSet):
     """
     API endpoint para gerenciar projeções orçamentárias.
     """
@@ -118,8 +155,55 @@ class ProjecaoOrcamentariaViewSet(viewsets.ModelViewSet):
     ordering_fields = ['mes_referencia', 'valor_previsto', 'valor_realizado']
     ordering = ['mes_referencia']
     
+    def get_permissions(self):
+        if self.action == 'recalcular':
+            return [permissions.IsAdminUser()]
+        return super().get_permissions()
+    
     def perform_create(self, serializer):
+        self.verificar_escopo(serializer)
         serializer.save(criado_por=self.request.user)
+    
+    @action(detail=False, methods=['post'])
+    def recalcular(self, request):
+        """
+        Recalcula previsto (parcelas) e realizado (movimentos) no horizonte informado.
+        """
+        parametros = ProjecaoParametrosSerializer(data=request.data)
+        parametros.is_valid(raise_exception=True)
+        dados = parametros.validated_data
+        
+        gravadas = atualizar_projecoes(
+            request.user,
+            inicio=dados.get('inicio'),
+            meses=dados.get('meses'),
+            setor=dados.get('setor'),
+        )
+        return Response({'projecoes_gravadas': gravadas})
+    
+    @action(detail=False, methods=['get'])
+    def variacao(self, request):
+        """
+        Relatório de variação entre previsto e realizado por mês.
+        """
+        parametros = ProjecaoParametrosSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        dados = dict(parametros.validated_data)
+        
+        return Response(relatorio_variacao(
+            dados.pop('inicio', None), dados.pop('meses', None),
+            setores=contexto_acesso(request).setores, **dados
+        ))
+
+
+class MetricasConexoesView(APIView):
+    """
+    API endpoint com as métricas de conexões com o banco do worker que atendeu a requisição.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request, format=None):
+        return Response(metricas_conexoes())
 
 
 class DashboardResumoView(APIView):
@@ -129,45 +213,50 @@ class DashboardResumoView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, format=None):
-        # Total de contratos
-        total_contratos = Contrato.objects.count()
+        acesso = contexto_acesso(request)
+        contratos = acesso.filtrar(Contrato.objects.all())
         
-        # Total de bolsistas
-        total_bolsistas = Bolsista.objects.count()
+        # Total de contratos
+        total_contratos = contratos.count()
         
-        # Total de credores
-        total_credores = Credor.objects.count()
+        # Total de bolsistas e credores (com escopo restrito, os que têm contratos nos setores visíveis)
+        bolsistas, credores = Bolsista.objects.all(), Credor.objects.all()
+        if not acesso.irrestrito:
+            bolsistas = acesso.filtrar(bolsistas, 'contratos__setor').distinct()
+            credores = acesso.filtrar(credores, 'contratos__setor').distinct()
+        total_bolsistas = bolsistas.count()
+        total_credores = credores.count()
         
         # Valor total de contratos
-        valor_total_contratos = Contrato.objects.aggregate(total=Sum('valor_total'))['total'] or 0
+        valor_total_contratos = contratos.aggregate(total=Sum('valor_total'))['total'] or 0
         
         # Valor total pago
-        valor_total_pago = Contrato.objects.aggregate(total=Sum('total_pago'))['total'] or 0
+        valor_total_pago = contratos.aggregate(total=Sum('total_pago'))['total'] or 0
         
         # Contratos por setor
         contratos_por_setor = dict(
-            Contrato.objects.values('setor__nome')
+            contratos.values('setor__nome')
             .annotate(total=Count('id'))
             .values_list('setor__nome', 'total')
         )
         
         # Valores por setor
         valores_por_setor = dict(
-            Contrato.objects.values('setor__nome')
+            contratos.values('setor__nome')
             .annotate(total=Sum('valor_total'))
             .values_list('setor__nome', 'total')
         )
         
         # Contratos por status
         contratos_por_status = dict(
-            Contrato.objects.values('status_processo')
+            contratos.values('status_processo')
             .annotate(total=Count('id'))
             .values_list('status_processo', 'total')
         )
         
         # Contratos recentes
         contratos_recentes = list(
-            Contrato.objects.order_by('-data_criacao')[:5]
+            contratos.order_by('-criado_em')[:5]
             .values('id', 'nome_curso_acao', 'valor_total', 'data_inicio', 'data_fim', 'setor__nome')
         )
         
@@ -194,67 +283,41 @@ class DashboardContratosView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, format=None):
-        # Contratos por mês (últimos 12 meses)
-        hoje = timezone.now().date()
-        meses = {}
-        
-        for i in range(11, -1, -1):
-            mes = hoje.replace(day=1) - timedelta(days=i*30)
-            mes_str = mes.strftime('%Y-%m')
-            meses[mes_str] = 0
-        
-        contratos_por_mes = dict(
-            Contrato.objects.filter(
-                data_criacao__gte=hoje.replace(day=1) - timedelta(days=365)
-            )
-            .annotate(mes=F('data_criacao__year') * 100 + F('data_criacao__month'))
-            .values('mes')
-            .annotate(total=Count('id'))
-            .values_list('mes', 'total')
-        )
-        
-        contratos_por_mes_formatado = {}
-        for mes_num, total in contratos_por_mes.items():
-            ano = mes_num // 100
-            mes = mes_num % 100
-            mes_str = f"{ano}-{mes:02d}"
-            contratos_por_mes_formatado[mes_str] = total
-        
-        # Valores por mês (últimos 12 meses)
-        valores_por_mes = dict(
-            Contrato.objects.filter(
-                data_criacao__gte=hoje.replace(day=1) - timedelta(days=365)
-            )
-            .annotate(mes=F('data_criacao__year') * 100 + F('data_criacao__month'))
-            .values('mes')
-            .annotate(total=Sum('valor_total'))
-            .values_list('mes', 'total')
-        )
-        
-        valores_por_mes_formatado = {}
-        for mes_num, total in valores_por_mes.items():
-            ano = mes_num // 100
-            mes = mes_num % 100
-            mes_str = f"{ano}-{mes:02d}"
-            valores_por_mes_formatado[mes_str] = total
+        acesso = contexto_acesso(request)
+        contratos = acesso.filtrar(Contrato.objects.all())
+        
+        # Contratos e valores por mês (últimos 12 meses), pela data de início
+        fim = timezone.now().date()
+        inicio = somar_meses(fim, -11)
+        quantidades = serie_em_cache('contratos', 'mes', inicio, fim, acesso=acesso)
+        valores = serie_em_cache('contratado', 'mes', inicio, fim, acesso=acesso)
+        
+        contratos_por_mes_formatado = {
+            mes.strftime('%Y-%m'): total
+            for mes, total in zip(quantidades['periodos'], quantidades['total'])
+        }
+        valores_por_mes_formatado = {
+            mes.strftime('%Y-%m'): total
+            for mes, total in zip(valores['periodos'], valores['total'])
+        }
         
         # Contratos por tipo
         contratos_por_tipo = dict(
-            Contrato.objects.values('tipo')
+            contratos.values('tipo')
             .annotate(total=Count('id'))
             .values_list('tipo', 'total')
         )
         
         # Valores por tipo
         valores_por_tipo = dict(
-            Contrato.objects.values('tipo')
+            contratos.values('tipo')
             .annotate(total=Sum('valor_total'))
             .values_list('tipo', 'total')
         )
         
         # Top bolsistas
         top_bolsistas = list(
-            Contrato.objects.filter(bolsista__isnull=False)
+            contratos.filter(bolsista__isnull=False)
             .values('bolsista__nome')
             .annotate(total=Count('id'), valor_total=Sum('valor_total'))
             .order_by('-valor_total')[:5]
@@ -263,7 +326,7 @@ class DashboardContratosView(APIView):
         
         # Top credores
         top_credores = list(
-            Contrato.objects.filter(credor__isnull=False)
+            contratos.filter(credor__isnull=False)
             .values('credor__razao_social')
             .annotate(total=Count('id'), valor_total=Sum('valor_total'))
             .order_by('-valor_total')[:5]
@@ -290,14 +353,21 @@ class DashboardFinanceiroView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, format=None):
-        # Orçamento total
-        orcamento_total = FonteRecurso.objects.aggregate(total=Sum('valor_total'))['total'] or 0
+        acesso = contexto_acesso(request)
+        contratos = acesso.filtrar(Contrato.objects.all())
+        alocacoes = acesso.filtrar(AlocacaoRecurso.objects.all())
+        
+        # Orçamento total (com escopo restrito, o alocado aos setores visíveis)
+        if acesso.irrestrito:
+            orcamento_total = FonteRecurso.objects.aggregate(total=Sum('valor_total'))['total'] or 0
+        else:
+            orcamento_total = alocacoes.aggregate(total=Sum('valor_alocado'))['total'] or 0
         
         # Valor comprometido em contratos
-        comprometido = Contrato.objects.aggregate(total=Sum('valor_total'))['total'] or 0
+        comprometido = contratos.aggregate(total=Sum('valor_total'))['total'] or 0
         
         # Valor pago
-        pago = Contrato.objects.aggregate(total=Sum('total_pago'))['total'] or 0
+        pago = contratos.aggregate(total=Sum('total_pago'))['total'] or 0
         
         # Valor disponível
         disponivel = orcamento_total - comprometido
@@ -332,34 +402,22 @@ class DashboardFinanceiroView(APIView):
         
         # Orçamento por setor
         orcamento_por_setor = dict(
-            AlocacaoRecurso.objects.values('setor__nome')
+            alocacoes.values('setor__nome')
             .annotate(total=Sum('valor_alocado'))
             .values_list('setor__nome', 'total')
         )
         
-        # Fluxo de caixa mensal (últimos 12 meses)
-        hoje = timezone.now().date()
+        # Fluxo de caixa mensal (últimos 12 meses), lido da consolidação MovimentoMensal
+        inicio = somar_meses(timezone.now().date(), -11)
+        totais = movimento_mensal.totais_por_mes(inicio, somar_meses(inicio, 11), setores=acesso.setores)
         fluxo_caixa_mensal = {}
         
-        for i in range(11, -1, -1):
-            mes = hoje.replace(day=1) - timedelta(days=i*30)
-            mes_str = mes.strftime('%Y-%m')
-            
-            # Entradas do mês
-            entradas = MovimentoFinanceiro.objects.filter(
-                tipo='entrada',
-                data_movimento__year=mes.year,
-                data_movimento__month=mes.month
-            ).aggregate(total=Sum('valor'))['total'] or 0
-            
-            # Saídas do mês
-            saidas = MovimentoFinanceiro.objects.filter(
-                tipo='saida',
-                data_movimento__year=mes.year,
-                data_movimento__month=mes.month
-            ).aggregate(total=Sum('valor'))['total'] or 0
+        for i in range(12):
+            mes = somar_meses(inicio, i)
+            entradas = totais.get(mes, {}).get('entrada', 0)
+            saidas = totais.get(mes, {}).get('saida', 0)
             
-            fluxo_caixa_mensal[mes_str] = {
+            fluxo_caixa_mensal[mes.strftime('%Y-%m')] = {
                 'entradas': entradas,
                 'saidas': saidas,
                 'saldo': entradas - saidas
@@ -382,6 +440,38 @@ class DashboardFinanceiroView(APIView):
         return Response(serializer.data)
 
 
+class DashboardSeriesView(APIView):
+    """
+    API endpoint para séries temporais de indicadores financeiros (contratado, pago,
+    entradas, saídas, saldo) por dia, semana, mês, trimestre ou ano, opcionalmente
+    agrupadas por setor, fonte, rubrica ou tipo. Períodos sem valor vêm com zero.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, format=None):
+        parametros = SerieParametrosSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        dados = parametros.validated_data
+        
+        fim = dados.get('fim') or timezone.now().date()
+        inicio = dados.get('inicio') or somar_meses(fim, -11)
+        
+        try:
+            serie = serie_em_cache(
+                dados['metrica'], dados['granularidade'], inicio, fim, dados.get('agrupamento'),
+                acesso=contexto_acesso(request)
+            )
+        except ValueError as erro:
+            return Response({"detail": str(erro)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'metrica': dados['metrica'],
+            'granularidade': dados['granularidade'],
+            'agrupamento': dados.get('agrupamento'),
+            **serie,
+        })
+
+
 class RelatorioContratosView(APIView):
     """
     API endpoint para gerar relatório de contratos.
@@ -396,8 +486,9 @@ class RelatorioContratosView(APIView):
         data_inicio = request.query_params.get('data_inicio')
         data_fim = request.query_params.get('data_fim')
         
-        # Consulta base
-        queryset = Contrato.objects.all()
+        # Consulta base (restrita aos setores visíveis para o usuário)
+        acesso = contexto_acesso(request)
+        queryset = acesso.filtrar(Contrato.objects.all())
         
         # Aplicar filtros
         if setor_id:
@@ -476,8 +567,9 @@ class RelatorioFinanceiroView(APIView):
         data_inicio = request.query_params.get('data_inicio')
         data_fim = request.query_params.get('data_fim')
         
-        # Consulta base para movimentos
-        queryset = MovimentoFinanceiro.objects.all()
+        # Consulta base para movimentos (restrita aos setores visíveis para o usuário)
+        acesso = contexto_acesso(request)
+        queryset = acesso.filtrar(MovimentoFinanceiro.objects.all())
         
         # Aplicar filtros
         if setor_id:
@@ -553,8 +645,11 @@ class RelatorioBolsistasView(APIView):
         ativo = request.query_params.get('ativo')
         data_referencia = request.query_params.get('data_referencia', timezone.now().date().isoformat())
         
-        # Consulta base
+        # Consulta base (bolsistas com contratos nos setores visíveis para o usuário)
+        acesso = contexto_acesso(request)
         queryset = Bolsista.objects.all()
+        if not acesso.irrestrito:
+            queryset = acesso.filtrar(queryset, 'contratos__setor').distinct()
         
         # Aplicar filtros
         if ativo == 'true':
@@ -572,7 +667,7 @@ class RelatorioBolsistasView(APIView):
         bolsistas = []
         
         for bolsista in queryset:
-            contratos_query = bolsista.contratos.all()
+            contratos_query = acesso.filtrar(bolsista.contratos.all())
             
             if setor_id:
                 contratos_query = contratos_query.filter(setor_id=setor_id)
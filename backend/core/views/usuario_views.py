@@ -94,7 +94,8 @@ class UserInfoView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        # O usuário da autenticação pode vir do cache só com os campos de acesso
+        return Usuario.objects.select_related('perfil').get(pk=self.request.user.pk)
 
 
 class ChangePasswordView(generics.UpdateAPIView):
@@ -105,7 +106,7 @@ class ChangePasswordView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        return Usuario.objects.get(pk=self.request.user.pk)
     
     def update(self, request, *args, **kwargs):
         user = self.get_object()
@@ -0,0 +1,83 @@
+"""
+Configuração do Gunicorn para o backend do CCBJ Financeiro.
+
+Perfis (GUNICORN_PERFIL):
+- wsgi (padrão): workers gthread servindo ccbj_financeiro.wsgi. Um relatório lento
+  ocupa apenas uma thread, não o worker inteiro.
+- asgi: workers do uvicorn servindo ccbj_financeiro.asgi, para respostas em
+  streaming e SSE que não devem prender threads síncronas.
+
+Variáveis reconhecidas:
+- PORT / GUNICORN_BIND: endereço de escuta (padrão 0.0.0.0:8000)
+- GUNICORN_WORKERS: processos (padrão 2 * CPUs + 1 no wsgi, CPUs + 1 no asgi)
+- GUNICORN_THREADS: threads por worker no perfil wsgi (padrão 4)
+- DB_MAX_CONEXOES_POR_WORKER: limite de conexões com o banco por worker (padrão 4). No
+  perfil wsgi limita GUNICORN_THREADS, já que cada thread mantém sua conexão; é o que
+  aplica o limite enquanto o pool nativo do Django (5.1+) não está disponível
+- GUNICORN_TIMEOUT / GUNICORN_GRACEFUL_TIMEOUT / GUNICORN_KEEPALIVE
+- GUNICORN_MAX_REQUESTS / GUNICORN_MAX_REQUESTS_JITTER: reciclagem de workers
+- GUNICORN_PRELOAD: carrega a aplicação no master antes do fork (padrão true)
+"""
+import multiprocessing
+import os
+
+
+def _inteiro(nome, padrao):
+    return int(os.environ.get(nome, padrao))
+
+
+def _booleano(nome, padrao):
+    return os.environ.get(nome, str(padrao)).strip().lower() in ('1', 'true', 'sim', 'yes', 'on')
+
+
+perfil = os.environ.get('GUNICORN_PERFIL', 'wsgi').strip().lower()
+cpus = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+if perfil == 'asgi':
+    wsgi_app = 'ccbj_financeiro.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = _inteiro('GUNICORN_WORKERS', cpus + 1)
+    threads = 1
+    # No ASGI as views síncronas rodam em threads efêmeras; conexões persistentes
+    # ficariam órfãs, então o padrão passa a ser fechar ao fim de cada requisição
+    os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+else:
+    wsgi_app = 'ccbj_financeiro.wsgi:application'
+    worker_class = 'gthread'
+    workers = _inteiro('GUNICORN_WORKERS', cpus * 2 + 1)
+    # Cada thread mantém sua própria conexão com o banco; não ultrapassar o limite por worker
+    # (mesmo padrão do max_size do pool em settings/banco.py)
+    threads = max(1, min(_inteiro('GUNICORN_THREADS', 4), _inteiro('DB_MAX_CONEXOES_POR_WORKER', 4)))
+
+timeout = _inteiro('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _inteiro('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _inteiro('GUNICORN_KEEPALIVE', 5)
+
+# Recicla workers periodicamente para conter vazamentos de memória
+max_requests = _inteiro('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _inteiro('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+preload_app = _booleano('GUNICORN_PRELOAD', True)
+
+# Heartbeat dos workers em memória evita bloqueios em discos lentos de containers
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """
+    Descarta conexões abertas pelo master durante o preload.
+    
+    Um socket de banco herdado pelo fork seria compartilhado entre processos.
+    """
+    if not preload_app:
+        return
+    
+    from django.db import connections
+    connections.close_all()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Compara os perfis wsgi e asgi do gunicorn.conf.py sob a mesma carga.
+
+Sobe o Gunicorn com cada perfil, executa a mesma mistura de requisições de
+scripts/teste_carga.py e imprime vazão e latências (p50/p95/p99) por perfil.
+
+Uso (a partir de backend/, com dados de `manage.py gerar_dados_carga`):
+    CARGA_SENHA=<senha> python scripts/comparar_perfis_gunicorn.py --requisicoes 1000 --concorrencia 32
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from teste_carga import CENARIOS, TesteCarga, autenticar
+
+DIRETORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def aguardar_porta(host, porta, limite=30):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        try:
+            with socket.create_connection((host, porta), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def medir_perfil(perfil, args, cenarios):
+    ambiente = dict(os.environ, GUNICORN_PERFIL=perfil, GUNICORN_BIND=f'{args.host}:{args.porta}')
+    if args.workers:
+        ambiente['GUNICORN_WORKERS'] = str(args.workers)
+    
+    processo = subprocess.Popen(
+        ['gunicorn', '-c', 'gunicorn.conf.py'],
+        cwd=DIRETORIO_BACKEND,
+        env=ambiente,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not aguardar_porta(args.host, args.porta):
+            raise RuntimeError(f'Gunicorn não respondeu no perfil {perfil}')
+        
+        base = f'http://{args.host}:{args.porta}'
+        token = autenticar(base, args.usuario, args.senha)
+        
+        # Aquecimento: importa módulos preguiçosos e abre conexões antes de medir
+        aquecimento = TesteCarga(base, token, cenarios, timeout=args.timeout, semente=0)
+        aquecimento.executar(args.concorrencia, args.concorrencia)
+        
+        teste = TesteCarga(base, token, cenarios, timeout=args.timeout, semente=1)
+        teste.preparar()
+        return teste.executar(args.requisicoes, args.concorrencia)[1]
+    finally:
+        processo.send_signal(signal.SIGTERM)
+        try:
+            processo.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--usuario', default=os.environ.get('CARGA_USUARIO', 'carga'))
+    parser.add_argument('--senha', default=os.environ.get('CARGA_SENHA'),
+                        help='Senha exibida por gerar_dados_carga (ou a variável CARGA_SENHA)')
+    parser.add_argument('--perfil', action='append', choices=['wsgi', 'asgi'], help='Perfis a comparar')
+    parser.add_argument('--requisicoes', type=int, default=500)
+    parser.add_argument('--concorrencia', type=int, default=20)
+    parser.add_argument('--workers', type=int, help='Fixa o número de workers em todos os perfis')
+    parser.add_argument('--com-pagamentos', action='store_true', help='Inclui registro de pagamentos na carga')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+    if not args.senha:
+        parser.error('informe --senha ou defina CARGA_SENHA')
+    
+    # Sem pagamentos por padrão: cada perfil parte do mesmo estado do banco
+    cenarios = [c for c in CENARIOS if args.com_pagamentos or c[2] != 'POST']
+    
+    print(f"{'perfil':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>8}")
+    for perfil in args.perfil or ['wsgi', 'asgi']:
+        r = medir_perfil(perfil, args, cenarios)
+        print(f"{perfil:<8}{r['rps']:>10.1f}{r['p50']:>10.1f}{r['p95']:>10.1f}{r['p99']:>10.1f}{r['erros']:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+"""
+Teste de carga concorrente da API, sem dependências externas.
+
+Autentica via JWT, dispara uma mistura ponderada de requisições (dashboards, listagens,
+relatórios e registro de pagamentos) e imprime vazão e latências p50/p95/p99 por endpoint.
+Use junto com `python manage.py gerar_dados_carga`, com a senha que o comando exibe.
+
+Uso:
+    CARGA_SENHA=<senha> python scripts/teste_carga.py --base http://127.0.0.1:8000 --requisicoes 2000 --concorrencia 32
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+PREFIXO_API = '/api/v1'
+
+# (nome, peso, método, caminho); {pagina}, {termo} e {parcela} são sorteados a cada requisição
+CENARIOS = [
+    ('dashboard_resumo', 10, 'GET', '/dashboard/resumo/'),
+    ('dashboard_contratos', 8, 'GET', '/dashboard/contratos/'),
+    ('dashboard_financeiro', 8, 'GET', '/dashboard/financeiro/'),
+    ('contratos_lista', 25, 'GET', '/contratos/?page={pagina}'),
+    ('contratos_busca', 8, 'GET', '/contratos/?q={termo}'),
+    ('parcelas_lista', 10, 'GET', '/parcelas-contratos/?status=pendente&page={pagina}'),
+    ('movimentos_lista', 10, 'GET', '/movimentos-financeiros/?page={pagina}'),
+    ('relatorio_contratos', 5, 'GET', '/relatorios/contratos/'),
+    ('relatorio_financeiro', 5, 'GET', '/relatorios/financeiro/'),
+    ('registrar_pagamento', 6, 'POST', '/parcelas-contratos/{parcela}/registrar_pagamento/'),
+]
+
+TERMOS = ['teatro', 'danca', 'oficina', 'curso', 'musica', 'festival', 'audiovisual']
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def requisitar(url, token=None, metodo='GET', corpo=None, timeout=30.0):
+    """
+    Executa uma requisição e devolve (segundos, status, corpo). Status 0 indica falha de rede.
+    """
+    cabecalhos = {'Accept': 'application/json'}
+    dados = None
+    if token:
+        cabecalhos['Authorization'] = f'Bearer {token}'
+    if corpo is not None:
+        cabecalhos['Content-Type'] = 'application/json'
+        dados = json.dumps(corpo).encode()
+    
+    inicio = time.perf_counter()
+    try:
+        with urlopen(Request(url, data=dados, headers=cabecalhos, method=metodo), timeout=timeout) as resposta:
+            conteudo = resposta.read()
+            status = resposta.status
+    except HTTPError as erro:
+        conteudo, status = erro.read(), erro.code
+    except (URLError, OSError):
+        conteudo, status = b'', 0
+    return time.perf_counter() - inicio, status, conteudo
+
+
+def autenticar(base, usuario, senha):
+    _, status, conteudo = requisitar(
+        f'{base}{PREFIXO_API}/auth/token/', metodo='POST', corpo={'username': usuario, 'password': senha}
+    )
+    if status != 200:
+        raise RuntimeError(f'Falha na autenticação ({status}): {conteudo[:200]!r}')
+    return json.loads(conteudo)['access']
+
+
+def resumir(latencias, erros, duracao):
+    """
+    Agrega latências (segundos) em vazão e percentis em milissegundos.
+    """
+    ms = [latencia * 1000 for latencia in latencias]
+    total = len(ms) + erros
+    return {
+        'requisicoes': total,
+        'erros': erros,
+        'rps': total / duracao if duracao else 0.0,
+        'p50': percentil(ms, 50),
+        'p95': percentil(ms, 95),
+        'p99': percentil(ms, 99),
+        'media': statistics.mean(ms) if ms else 0.0,
+    }
+
+
+class TesteCarga:
+    """
+    Distribui requisições entre os cenários conforme o peso e coleta as latências.
+    """
+    
+    def __init__(self, base, token, cenarios=CENARIOS, timeout=30.0, semente=None):
+        self.base = base.rstrip('/') + PREFIXO_API
+        self.token = token
+        self.cenarios = cenarios
+        self.timeout = timeout
+        self.rng = random.Random(semente)
+        self.paginas = 20
+        self.parcelas = []
+        self._trava = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.erros = defaultdict(int)
+    
+    def preparar(self):
+        """
+        Descobre quantas páginas existem e reserva parcelas pendentes para os pagamentos.
+        """
+        _, status, conteudo = requisitar(f'{self.base}/contratos/', self.token, timeout=self.timeout)
+        if status == 200:
+            self.paginas = max(1, -(-json.loads(conteudo).get('count', 0) // 20))
+        
+        if any(nome == 'registrar_pagamento' for nome, *_ in self.cenarios):
+            for pagina in range(1, 11):
+                _, status, conteudo = requisitar(
+                    f'{self.base}/parcelas-contratos/?status=pendente&page={pagina}', self.token, timeout=self.timeout
+                )
+                if status != 200:
+                    break
+                self.parcelas.extend(item['id'] for item in json.loads(conteudo).get('results', []))
+            self.rng.shuffle(self.parcelas)
+    
+    def _sortear(self):
+        with self._trava:
+            nome, _, metodo, caminho = self.rng.choices(self.cenarios, weights=[c[1] for c in self.cenarios])[0]
+            parametros = {'pagina': self.rng.randint(1, min(self.paginas, 50)), 'termo': self.rng.choice(TERMOS)}
+            
+            if '{parcela}' in caminho:
+                if not self.parcelas:
+                    # Sem parcelas pendentes restantes, a requisição vira uma listagem
+                    return 'contratos_lista', 'GET', '/contratos/?page=1', None
+                parametros['parcela'] = self.parcelas.pop()
+        
+        corpo = {'observacao': 'teste de carga'} if metodo == 'POST' else None
+        return nome, metodo, caminho.format(**parametros), corpo
+    
+    def _executar_uma(self, _):
+        nome, metodo, caminho, corpo = self._sortear()
+        latencia, status, _ = requisitar(self.base + caminho, self.token, metodo, corpo, self.timeout)
+        
+        with self._trava:
+            if 200 <= status < 400:
+                self.latencias[nome].append(latencia)
+            else:
+                self.erros[nome] += 1
+    
+    def executar(self, requisicoes, concorrencia):
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            list(executor.map(self._executar_uma, range(requisicoes)))
+        self.duracao = time.perf_counter() - inicio
+        return self.resultados()
+    
+    def resultados(self):
+        nomes = sorted(set(self.latencias) | set(self.erros))
+        por_cenario = {
+            nome: resumir(self.latencias[nome], self.erros[nome], self.duracao)
+            for nome in nomes
+        }
+        geral = resumir(
+            [latencia for valores in self.latencias.values() for latencia in valores],
+            sum(self.erros.values()),
+            self.duracao,
+        )
+        return por_cenario, geral
+
+
+def imprimir(por_cenario, geral):
+    print(f"{'endpoint':<24}{'req':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'erros':>7}")
+    for nome, r in list(por_cenario.items()) + [('TOTAL', geral)]:
+        print(f"{nome:<24}{r['requisicoes']:>7}{r['rps']:>9.1f}{r['p50']:>9.1f}"
+              f"{r['p95']:>9.1f}{r['p99']:>9.1f}{r['erros']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--base', default=os.environ.get('CARGA_BASE', 'http://127.0.0.1:8000'))
+    parser.add_argument('--usuario', default=os.environ.get('CARGA_USUARIO', 'carga'))
+    parser.add_argument('--senha', default=os.environ.get('CARGA_SENHA'),
+                        help='Senha exibida por gerar_dados_carga (ou a variável CARGA_SENHA)')
+    parser.add_argument('--requisicoes', type=int, default=1000)
+    parser.add_argument('--concorrencia', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--sem-pagamentos', action='store_true', help='Não registra pagamentos (carga só de leitura).')
+    parser.add_argument('--semente', type=int)
+    parser.add_argument('--json', help='Grava os resultados neste arquivo.')
+    args = parser.parse_args()
+    if not args.senha:
+        parser.error('informe --senha ou defina CARGA_SENHA')
+    
+    cenarios = [c for c in CENARIOS if not (args.sem_pagamentos and c[2] == 'POST')]
+    token = autenticar(args.base, args.usuario, args.senha)
+    
+    teste = TesteCarga(args.base, token, cenarios, timeout=args.timeout, semente=args.semente)
+    teste.preparar()
+    por_cenario, geral = teste.executar(args.requisicoes, args.concorrencia)
+    imprimir(por_cenario, geral)
+    
+    if args.json:
+        with open(args.json, 'w') as arquivo:
+            json.dump({'cenarios': por_cenario, 'total': geral}, arquivo, indent=2)
+    return 0 if geral['erros'] < geral['requisicoes'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())